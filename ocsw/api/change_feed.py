@@ -0,0 +1,177 @@
+"""Incremental change feed.
+
+Objects edited after a watermark are fetched with a ``lastEditDate`` filter,
+deletions are found by periodically comparing the set of known ids with the
+ids on the server.
+"""
+
+from ..constants import DEFAULT_PAGE_SIZE, DEFAULT_RECONCILE_INTERVAL
+from ..utils.date_fns import time_ms
+from ..utils.query_params import Compare, query_filter
+
+# collection: client list method
+COLLECTION_METHODS = dict(
+    device="devices",
+    blueprint="blueprints",
+    edge_action="edge_actions",
+    cloud_action="actions",
+    connector="connectors",
+    stream="streams",
+)
+
+
+class ChangeFeedMixin:
+    async def iter_changes(
+        self,
+        collection,
+        watermark=None,
+        company_name=None,
+        fields=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        seen_ids=(),
+    ):
+        """Iterate over objects edited after the watermark.
+
+        Objects are sorted by lastEditDate, each next page is requested
+        from the lastEditDate of the previous page, so objects edited during
+        the iteration are not skipped. Several objects can be edited in the
+        same millisecond, so the search starts at the watermark itself and
+        skips seen_ids still edited at the watermark, like
+        :py:class:`ocsw.api.pagination.KeysetCursor`.
+
+        Args:
+            collection (str): one of COLLECTION_METHODS
+            watermark (int, optional): lastEditDate of the last seen change,
+                                       None for all objects
+            company_name (str, optional): company name
+            fields (list, optional): fields of the objects
+            page_size (int): maximum number of objects per request
+            seen_ids (iterable): ids of the objects already seen with the
+                                 lastEditDate of the watermark
+
+        Yields:
+            list: page of changed objects
+        """
+        func = getattr(self, COLLECTION_METHODS[collection])
+        if fields:
+            keys = ("id", "lastEditDate")
+            fields = list(fields) + [key for key in keys if key not in fields]
+        cursor, start = watermark, 0
+        seen = set(seen_ids)
+        while True:
+            filters = None
+            if cursor is not None:
+                filters = query_filter(
+                    Compare("lastEditDate", ">=", int(cursor))
+                )
+            resp = await func(
+                company_name=company_name,
+                fields=fields,
+                filters=filters,
+                sort="lastEditDate",
+                order="asc",
+                start=start,
+                limit=page_size,
+            )
+            page = resp.get("body") or []
+            changed = [
+                item
+                for item in page
+                if item["id"] not in seen or item.get("lastEditDate") != cursor
+            ]
+            if changed:
+                yield changed
+            if len(page) < page_size:
+                break
+            last = page[-1].get("lastEditDate")
+            if last == cursor:
+                # the whole page has the same lastEditDate
+                start += len(page)
+            else:
+                cursor, start = last, 0
+                seen = set()
+            seen.update(
+                item["id"]
+                for item in page
+                if item.get("lastEditDate") == cursor
+            )
+
+    async def deleted_ids(
+        self,
+        collection,
+        known_ids,
+        company_name=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Return ids of known_ids which are removed on the server."""
+        func = getattr(self, COLLECTION_METHODS[collection])
+        ids = set()
+        async for page in self.iter_pages(
+            func, company_name=company_name, fields=["id"], page_size=page_size
+        ):
+            ids.update(item["id"] for item in page)
+        return set(known_ids) - ids
+
+    async def changes(
+        self,
+        collection,
+        state,
+        company,
+        reconcile=None,
+        reconcile_interval=DEFAULT_RECONCILE_INTERVAL,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Follow changes of the collection since the persisted watermark.
+
+        The watermark is saved in state when the iteration is completed.
+
+        Args:
+            collection (str): one of COLLECTION_METHODS
+            state (ocsw.utils.store.Store): known ids and watermarks
+            company (dict): company {id, name}
+            reconcile (bool, optional): force (True) or skip (False) the
+                                        search for removed objects, by
+                                        default it is done once per
+                                        reconcile_interval
+            reconcile_interval (int): milliseconds between searches for
+                                      removed objects
+            page_size (int): maximum number of objects per request
+
+        Yields:
+            tuple: ("changed", list of objects) or ("deleted", set of ids)
+        """
+        watermark, reconciled = state.get_watermark(collection, company["id"])
+        started = time_ms()
+        if reconcile is None:
+            reconcile = started - (reconciled or 0) >= reconcile_interval
+
+        seen_ids = ()
+        if watermark is not None:
+            seen_ids = state.ids(
+                collection, company["id"], last_edit_date=watermark
+            )
+        async for page in self.iter_changes(
+            collection,
+            watermark,
+            company_name=company["name"],
+            page_size=page_size,
+            seen_ids=seen_ids,
+        ):
+            edit_dates = [item.get("lastEditDate") or 0 for item in page]
+            watermark = max([watermark or 0] + edit_dates)
+            yield "changed", page
+
+        if reconcile:
+            known_ids = state.ids(collection, company["id"])
+            if known_ids:
+                deleted = await self.deleted_ids(
+                    collection,
+                    known_ids,
+                    company_name=company["name"],
+                    page_size=page_size,
+                )
+                if deleted:
+                    yield "deleted", deleted
+            reconciled = started
+
+        state.set_watermark(collection, company["id"], watermark, reconciled)
@@ -33,6 +33,7 @@ from ..constants import (
 )
 from .action import ActionApiMixin
 from .blueprint import BlueprintApiMixin
+from .change_feed import ChangeFeedMixin
 from .company import CompanyApiMixin
 from .connector import ConnectorApiMixin
 from .device import DeviceApiMixin
@@ -41,6 +42,7 @@ from .firmware import FirmwareApiMixin
 from .group import GroupApiMixin
 from .identity import IdentityApiMixin
 from .local_action import EdgeActionApiMixin
+from .pagination import PaginationMixin
 from .release import ReleaseApiMixin
 from .stream import StreamApiMixin
 
@@ -48,6 +50,7 @@ from .stream import StreamApiMixin
 class APIClient(
     ActionApiMixin,
     BlueprintApiMixin,
+    ChangeFeedMixin,
     CompanyApiMixin,
     ConnectorApiMixin,
     DeviceApiMixin,
@@ -56,6 +59,7 @@ class APIClient(
     GroupApiMixin,
     IdentityApiMixin,
     EdgeActionApiMixin,
+    PaginationMixin,
     ReleaseApiMixin,
     StreamApiMixin,
 ):
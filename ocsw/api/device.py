@@ -1,4 +1,12 @@
-from ..utils.query_params import query_params
+import asyncio
+
+from .. import errors
+from ..constants import DEFAULT_CONCURRENCY
+from ..utils.limiter import Limiter
+from ..utils.query_params import Field, query_filter, query_params
+
+# maximum number of device identifiers in one filter expression
+INSPECT_CHUNK_SIZE = 50
 
 
 class DeviceApiMixin:
@@ -46,6 +54,83 @@ class DeviceApiMixin:
         params = query_params(**query)
         return await self._get(url, params=params)
 
+    async def inspect_devices(
+        self,
+        device_identifiers,
+        company_name=None,
+        fields=None,
+        chunk_size=INSPECT_CHUNK_SIZE,
+        concurrency=DEFAULT_CONCURRENCY,
+    ):
+        """Retrieve info of many devices by id or name.
+
+        Identifiers are sent in chunks as ``id in [...] || name in [...]``
+        filters of the device list, identifiers not found by the filters
+        are requested one by one.
+
+        Args:
+            device_identifiers (list): device names or ids
+            company_name (str): Company name
+            fields (list, optional): fields of the devices, "id" and "name"
+                                     are always included
+            chunk_size (int): maximum number of identifiers per request
+            concurrency (int): maximum number of concurrent requests
+
+        Returns:
+            (list): Device information dictionaries in the order of
+                    device_identifiers
+
+        Raises:
+            :py:class:`ocsw.errors.APIError`
+                If the server returns an error.
+        """
+        identifiers = list(dict.fromkeys(device_identifiers))
+        if fields:
+            keys = ("id", "name")
+            fields = list(fields) + [key for key in keys if key not in fields]
+        limiter = Limiter(concurrency)
+
+        async def fetch_chunk(chunk):
+            filters = query_filter(
+                Field("id").in_(chunk) | Field("name").in_(chunk)
+            )
+            try:
+                resp = await limiter.run(
+                    self.devices(
+                        company_name=company_name,
+                        fields=fields,
+                        filters=filters,
+                        limit=len(chunk),
+                    )
+                )
+            except errors.APIError:
+                # the identifiers of the chunk are requested one by one
+                return []
+            return resp.get("body") or []
+
+        chunks = []
+        for start in range(0, len(identifiers), chunk_size):
+            stop = start + chunk_size
+            chunks.append(identifiers[start:stop])
+        found = dict()
+        for page in await asyncio.gather(*map(fetch_chunk, chunks)):
+            for device in page:
+                found[device.get("id")] = device
+                found[device.get("name")] = device
+
+        missing = [uid for uid in identifiers if uid not in found]
+        responses = await limiter.gather(
+            *[
+                self.inspect_device(
+                    uid, company_name=company_name, fields=fields
+                )
+                for uid in missing
+            ]
+        )
+        for uid, resp in zip(missing, responses):
+            found[uid] = resp.get("body")
+        return [found[uid] for uid in device_identifiers]
+
     async def create_device(self, name, imei, fsn, company_name=None):
         """Create a Device.
 
@@ -1,4 +1,84 @@
-from ..utils.query_params import query_params
+import asyncio
+import time
+
+import aiohttp
+
+from .. import errors
+from ..constants import DEFAULT_CONCURRENCY, DEFAULT_PAGE_SIZE
+from ..utils.date_fns import time_ms
+from ..utils.limiter import Limiter
+from ..utils.poll import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    AdaptiveInterval,
+)
+from ..utils.query_params import Field, in_filter, query_params
+from ..utils.reorder import DEFAULT_REORDER_SIZE, ReorderBuffer
+from ..utils.stats import DEFAULT_BUCKET, EventStats
+from .pagination import KeysetCursor
+
+# maximum number of stream paths in one filter expression
+LATEST_CHUNK_SIZE = 50
+# maximum number of pages scanned for the latest events of one chunk
+LATEST_MAX_PAGES = 3
+
+# number of the latest events shown before following a stream
+DEFAULT_TAIL_LAST = 10
+# number of time sub-ranges of the event export
+DEFAULT_EXPORT_PARTITIONS = 16
+# maximum number of pages an export partition fetches ahead
+DEFAULT_EXPORT_QUEUE = 4
+# milliseconds events of many streams are held to put them in order
+DEFAULT_TAIL_SKEW = 2000
+# consecutive failed polls of a followed stream retried before giving up
+DEFAULT_TAIL_RETRIES = 5
+
+
+class EventCursor(KeysetCursor):
+    """Position in a stream: creationDate and ids of the events seen at it.
+
+    Events are created with millisecond dates, so several events can share
+    the date of the cursor, the ids tell which of them were already seen.
+    """
+
+    def __init__(self, date=0, ids=()):
+        super().__init__("creationDate", date, ids)
+
+    @property
+    def date(self):
+        return self.value
+
+
+def is_transient(ex):
+    """Return True if the request may succeed when it is repeated."""
+    if isinstance(ex, errors.APIError):
+        return ex.is_server_error()
+    return isinstance(ex, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+async def _retry_transient(func, args, retries, min_delay, max_delay):
+    """Await func(*args), repeat it after transient errors.
+
+    The delay doubles after every failure, from min_delay up to max_delay
+    seconds; any other failure, or more than retries failures in a row, is
+    raised.
+    """
+    failures = 0
+    while True:
+        try:
+            return await func(*args)
+        except Exception as ex:  # pylint: disable=broad-except
+            failures += 1
+            if not is_transient(ex) or failures > retries:
+                raise
+        await asyncio.sleep(min(max_delay, min_delay * 2**failures))
+
+
+def _tail_fields(fields):
+    if not fields:
+        return fields
+    keys = ("id", "creationDate")
+    return list(fields) + [key for key in keys if key not in fields]
 
 
 class EventApiMixin:
@@ -23,3 +103,509 @@ class EventApiMixin:
         if stream_path:
             params["path"] = stream_path
         return await self._get(url, params=params)
+
+    async def latest_events(
+        self,
+        stream_paths,
+        fields=None,
+        chunk_size=LATEST_CHUNK_SIZE,
+        page_size=DEFAULT_PAGE_SIZE,
+        max_pages=LATEST_MAX_PAGES,
+        concurrency=DEFAULT_CONCURRENCY,
+    ):
+        """Find the newest event of each stream.
+
+        Paths are sent in chunks as ``path in [...]`` filters of events
+        sorted by creationDate, the first event seen for a path is its
+        newest one. A chunk is scanned for at most max_pages pages, the
+        paths still without an event after that (e.g. next to a chatty
+        stream) are requested one by one with limit=1.
+
+        Args:
+            stream_paths (list): stream paths
+            fields (list, optional): fields of the events, "path" and
+                                     "creationDate" are always included
+            chunk_size (int): maximum number of paths per request
+            page_size (int): maximum number of events per request
+            max_pages (int): maximum number of pages per chunk
+            concurrency (int): maximum number of concurrent requests
+
+        Returns:
+            (dict): stream path to the newest event, None for streams
+                    without events
+        """
+        paths = list(dict.fromkeys(stream_paths))
+        if fields:
+            keys = ("path", "creationDate")
+            fields = list(fields) + [key for key in keys if key not in fields]
+        limiter = Limiter(concurrency)
+        latest = dict()
+        fallback = []
+
+        async def scan_chunk(chunk):
+            pending = set(chunk)
+            filters = in_filter("path", chunk)
+            for page_number in range(max_pages):
+                try:
+                    resp = await limiter.run(
+                        self.events_by_stream_path(
+                            None,
+                            fields=fields,
+                            filters=filters,
+                            sort="creationDate",
+                            order="desc",
+                            start=page_number * page_size,
+                            limit=page_size,
+                        )
+                    )
+                except errors.APIError:
+                    break
+                page = resp.get("body") or []
+                for event in page:
+                    path = event.get("path")
+                    if path in pending:
+                        pending.discard(path)
+                        latest[path] = event
+                if len(page) < page_size:
+                    # all events of the chunk are seen
+                    latest.update((path, None) for path in pending)
+                    return
+                if not pending:
+                    return
+            fallback.extend(pending)
+
+        chunks = []
+        for start in range(0, len(paths), chunk_size):
+            stop = start + chunk_size
+            chunks.append(paths[start:stop])
+        await asyncio.gather(*map(scan_chunk, chunks))
+
+        responses = await limiter.gather(
+            *[
+                self.events_by_stream_path(
+                    path, fields=fields, order="desc", limit=1
+                )
+                for path in fallback
+            ]
+        )
+        for path, resp in zip(fallback, responses):
+            body = resp.get("body") or []
+            latest[path] = body[0] if body else None
+        return latest
+
+    async def iter_event_pages(
+        self,
+        source,
+        cursor,
+        until=None,
+        fields=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        limiter=None,
+    ):
+        """Iterate over the events created since the cursor, oldest first.
+
+        Pages are requested by :py:meth:`PaginationMixin.iter_pages` with
+        the cursor as keyset, so each request filters from the date of the
+        last event instead of growing start offsets.
+
+        Args:
+            source (str): stream id or path
+            cursor (EventCursor): position in the stream, moved past the
+                                  yielded events
+            until (int, optional): creationDate the events are created
+                                   before
+            fields (list, optional): fields of the events, "id" and
+                                     "creationDate" are always included
+            page_size (int): maximum number of events per request
+            limiter (ocsw.utils.limiter.Limiter, optional): limiter of
+                                                            the requests
+
+        Yields:
+            list: new events
+        """
+        func = self.events if limiter is None else limiter.wrap(self.events)
+        filters = None
+        if until is not None:
+            filters = Field("creationDate") < until
+        async for page in self.iter_pages(
+            func,
+            source,
+            keyset=cursor,
+            fields=_tail_fields(fields),
+            filters=filters,
+            order="asc",
+            page_size=page_size,
+        ):
+            yield page
+
+    async def poll_events(
+        self,
+        source,
+        cursor,
+        fields=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        limiter=None,
+    ):
+        """Fetch the events created since the cursor, oldest first.
+
+        Accepts the same arguments as :py:meth:`iter_event_pages`.
+
+        Returns:
+            (list): new events
+        """
+        events = []
+        async for page in self.iter_event_pages(
+            source, cursor, fields=fields, page_size=page_size, limiter=limiter
+        ):
+            events.extend(page)
+        return events
+
+    async def export_events(
+        self,
+        source,
+        since,
+        until,
+        fields=None,
+        partitions=DEFAULT_EXPORT_PARTITIONS,
+        limiter=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        queue_size=DEFAULT_EXPORT_QUEUE,
+    ):
+        """Iterate over the events created in [since, until) in order.
+
+        The time range is split into partitions fetched concurrently with
+        :py:meth:`iter_event_pages`, pages are yielded partition after
+        partition. Each partition buffers at most queue_size pages ahead
+        of the output, so memory does not grow with the range.
+
+        Args:
+            source (str): stream id or path
+            since (int): first creationDate
+            until (int): creationDate after the last one
+            fields (list, optional): fields of the events
+            partitions (int): number of sub-ranges
+            limiter (ocsw.utils.limiter.Limiter, optional): concurrency
+                                                            and rate
+            page_size (int): maximum number of events per request
+            queue_size (int): maximum number of pages buffered per
+                              partition
+
+        Yields:
+            list: events
+
+        Raises:
+            Exception: failure of a partition, e.g. ocsw.errors.Error or
+                       aiohttp.ClientError, when its pages are reached
+        """
+        limiter = limiter or Limiter()
+        partitions = max(1, min(partitions, until - since))
+        bounds = [
+            since + (until - since) * idx // partitions
+            for idx in range(partitions + 1)
+        ]
+        queues = [asyncio.Queue(queue_size) for _ in range(partitions)]
+
+        async def fetch(queue, start, stop):
+            try:
+                async for page in self.iter_event_pages(
+                    source,
+                    EventCursor(start),
+                    until=stop,
+                    fields=fields,
+                    page_size=page_size,
+                    limiter=limiter,
+                ):
+                    await queue.put(page)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                # any failure, e.g. aiohttp.ClientError, reaches the consumer
+                await queue.put(ex)
+            else:
+                await queue.put(None)
+
+        tasks = [
+            asyncio.ensure_future(fetch(queue, start, stop))
+            for queue, start, stop in zip(queues, bounds, bounds[1:])
+        ]
+        try:
+            for queue in queues:
+                while True:
+                    page = await queue.get()
+                    if page is None:
+                        break
+                    if isinstance(page, Exception):
+                        raise page
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def first_event_date(self, source):
+        """Return creationDate of the first event of the stream, or None."""
+        resp = await self.events(
+            source,
+            fields=["id", "creationDate"],
+            sort="creationDate",
+            order="asc",
+            limit=1,
+        )
+        first = resp.get("body") or []
+        return first[0]["creationDate"] if first else None
+
+    async def event_stats(
+        self,
+        source,
+        paths,
+        since=None,
+        until=None,
+        bucket=DEFAULT_BUCKET,
+        partitions=DEFAULT_EXPORT_PARTITIONS,
+        limiter=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Aggregate values of the events created in [since, until).
+
+        Events are fetched by :py:meth:`export_events` and accounted page
+        by page, so memory does not grow with the number of events.
+
+        Args:
+            source (str): stream id or path
+            paths (list): dotted paths of the aggregated values,
+                          e.g. ["elems.temperature"]
+            since (int, optional): first creationDate, by default the
+                                   date of the first event
+            until (int, optional): creationDate after the last one, by
+                                   default now
+            bucket (int): milliseconds per rate bucket
+            partitions (int): number of sub-ranges fetched concurrently
+            limiter (ocsw.utils.limiter.Limiter, optional): concurrency
+                                                            and rate
+            page_size (int): maximum number of events per request
+
+        Returns:
+            ocsw.utils.stats.EventStats: aggregates of the events
+        """
+        try:
+            stats = EventStats(paths, bucket)
+        except ValueError as ex:
+            raise errors.Error(str(ex))
+        if until is None:
+            until = time_ms()
+        if since is None:
+            since = await self.first_event_date(source)
+        if since is None or since >= until:
+            return stats
+        fields = sorted(set(path.split(".")[0] for path in paths))
+        async for page in self.export_events(
+            source,
+            since,
+            until,
+            fields=fields,
+            partitions=partitions,
+            limiter=limiter,
+            page_size=page_size,
+        ):
+            for event in page:
+                stats.add(event)
+        return stats
+
+    async def _tail_start(self, source, last, since, fields, limiter=None):
+        """Return the cursor to follow the stream from and the last events."""
+        if since is not None:
+            return EventCursor(since), []
+        func = self.events if limiter is None else limiter.wrap(self.events)
+        resp = await func(
+            source,
+            fields=_tail_fields(fields),
+            sort="creationDate",
+            order="desc",
+            limit=max(last, 1),
+        )
+        latest = list(reversed(resp.get("body") or []))
+        cursor = EventCursor()
+        for event in latest:
+            cursor.add(event)
+        return cursor, latest[-last:] if last else []
+
+    async def follow_events(
+        self,
+        source,
+        last=DEFAULT_TAIL_LAST,
+        since=None,
+        fields=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        interval=None,
+        limiter=None,
+        retries=DEFAULT_TAIL_RETRIES,
+    ):
+        """Iterate over the events of the stream as they are created.
+
+        Requests failed with transient errors (see :py:func:`is_transient`)
+        are repeated with a growing delay; any other failure, or more than
+        retries failures in a row, is raised.
+
+        Args:
+            source (str): stream id or path
+            last (int): number of the latest events yielded first,
+                        ignored if since is given
+            since (int, optional): creationDate to follow the stream from
+            fields (list, optional): fields of the events
+            page_size (int): maximum number of events per request
+            interval (AdaptiveInterval, optional): delay between polls
+            limiter (ocsw.utils.limiter.Limiter, optional): limiter of
+                                                            the requests
+            retries (int): consecutive failed requests repeated
+
+        Yields:
+            dict: event
+        """
+        interval = interval or AdaptiveInterval()
+
+        async def retrying(func, *args):
+            return await _retry_transient(
+                func, args, retries, interval.minimum, interval.maximum
+            )
+
+        async def poll(cursor):
+            # the cursor only moves past the events of complete polls
+            polled = EventCursor(cursor.date, cursor.ids)
+            events = await self.poll_events(
+                source,
+                polled,
+                fields=fields,
+                page_size=page_size,
+                limiter=limiter,
+            )
+            return polled, events
+
+        cursor, events = await retrying(
+            self._tail_start, source, last, since, fields, limiter
+        )
+        for event in events:
+            yield event
+
+        polled = time.monotonic()
+        while True:
+            await asyncio.sleep(interval.value)
+            cursor, events = await retrying(poll, cursor)
+            for event in events:
+                yield event
+            now = time.monotonic()
+            interval.update(len(events), now - polled)
+            polled = now
+
+    async def follow_streams(
+        self,
+        sources,
+        last=0,
+        since=None,
+        fields=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        limiter=None,
+        min_interval=DEFAULT_MIN_INTERVAL,
+        max_interval=DEFAULT_MAX_INTERVAL,
+        skew=DEFAULT_TAIL_SKEW,
+        buffer_size=DEFAULT_REORDER_SIZE,
+        retries=DEFAULT_TAIL_RETRIES,
+    ):
+        """Iterate over the events of many streams ordered by creationDate.
+
+        Every stream is polled by its own task with its own adaptive
+        interval, all requests go through the limiter. Events wait in a
+        ReorderBuffer until every stream has been polled after their
+        creationDate (less skew milliseconds for clock differences and
+        ingestion delay), so the output is ordered unless the buffer
+        overflows.
+
+        Polls failed with transient errors (see :py:func:`is_transient`)
+        are repeated with a growing delay; any other failure, or more than
+        retries failures in a row, is raised by the iterator.
+
+        Args:
+            sources (list): stream ids or paths
+            last (int): number of the latest events of each stream yielded
+                        first, ignored if since is given
+            since (int, optional): creationDate to follow the streams from
+            fields (list, optional): fields of the events
+            page_size (int): maximum number of events per request
+            limiter (ocsw.utils.limiter.Limiter, optional): concurrency
+                                                            and rate
+            min_interval (float): minimum seconds between polls of a stream
+            max_interval (float): maximum seconds between polls of a stream
+            skew (int): milliseconds events are held after the polls
+            buffer_size (int): maximum number of held events
+            retries (int): consecutive failed polls of a stream repeated
+
+        Yields:
+            dict: event
+        """
+        sources = list(dict.fromkeys(sources))
+        limiter = limiter or Limiter()
+        queue = asyncio.Queue()
+        marks = dict.fromkeys(sources, 0)
+        buffer = ReorderBuffer(buffer_size)
+
+        async def poll(source, cursor):
+            # pages are queued as they arrive, the poll start date becomes
+            # the mark of the stream only when the whole poll succeeded
+            started, count = time_ms(), 0
+            async for page in self.iter_event_pages(
+                source,
+                cursor,
+                fields=fields,
+                page_size=page_size,
+                limiter=limiter,
+            ):
+                count += len(page)
+                await queue.put((source, None, page))
+            await queue.put((source, started, []))
+            return count
+
+        async def retrying(func, *args):
+            return await _retry_transient(
+                func, args, retries, min_interval, max_interval
+            )
+
+        async def start(source):
+            started = time_ms()
+            cursor, events = await self._tail_start(
+                source, last, since, fields, limiter=limiter
+            )
+            await queue.put((source, started, events))
+            return cursor
+
+        async def follow(source):
+            try:
+                cursor = await retrying(start, source)
+                interval = AdaptiveInterval(min_interval, max_interval)
+                polled = time.monotonic()
+                while True:
+                    await asyncio.sleep(interval.value)
+                    count = await retrying(poll, source, cursor)
+                    now = time.monotonic()
+                    interval.update(count, now - polled)
+                    polled = now
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                await queue.put((source, None, ex))
+
+        tasks = [asyncio.ensure_future(follow(source)) for source in sources]
+        try:
+            while True:
+                source, started, events = await queue.get()
+                if isinstance(events, Exception):
+                    raise events
+                if started is not None:
+                    marks[source] = started
+                for event in events:
+                    buffer.push(event.get("creationDate") or 0, event)
+                watermark = min(marks.values()) - skew
+                for event in buffer.pop_ready(watermark):
+                    yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
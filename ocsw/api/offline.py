@@ -0,0 +1,159 @@
+"""Client reading objects from the local mirror.
+
+Implements the list and inspect methods of :py:class:`APIClient` for the
+collections kept by :py:class:`ocsw.utils.store.Store`, responses have the
+same {head, body} shape as the Octave Cloud API. Filter expressions of the
+list methods are evaluated locally by :py:mod:`ocsw.utils.predicate`.
+"""
+
+import itertools
+
+from .. import errors
+from ..utils.predicate import compile_filter
+from ..utils.query_params import query_filter
+from ..utils.store import project
+from .pagination import PaginationMixin
+
+
+def response(body):
+    return dict(head=dict(status=200, ok=True, offline=True), body=body)
+
+
+class OfflineClient(PaginationMixin):
+    """Read-only client for the local mirror."""
+
+    def __init__(self, store, company=None, **_kwargs):
+        self.store = store
+        self._company_identifer = company
+
+    @property
+    def current_company(self):
+        if self._company_identifer is None:
+            msg = "Company identifier not set. Check configuration."
+            raise errors.Error(msg)
+        return self._company_identifer
+
+    def company_id(self, company_name=None):
+        company_name = company_name or self.current_company
+        company = self.store.get("company", company_name)
+        if company is None:
+            msg = f"Company {company_name!r} not found in the local mirror"
+            raise errors.Error(msg)
+        return company["id"]
+
+    async def companies(self, **query):
+        return response(self.store.find("company", **_find_query(query)))
+
+    async def inspect_company(self, company_id, **query):
+        return self._inspect("company", company_id, None, query)
+
+    def _list(self, collection, company_name, query):
+        company_id = self.company_id(company_name)
+        filters = query.get("filters")
+        if not filters:
+            items = self.store.find(
+                collection, company_id=company_id, **_find_query(query)
+            )
+            return response(items)
+        # the filter is applied before start and limit
+        try:
+            match = compile_filter(query_filter(filters))
+        except ValueError as ex:
+            raise errors.Error(str(ex))
+        find_query = _find_query(query)
+        start = find_query.pop("start", 0) or 0
+        limit = find_query.pop("limit", None)
+        fields = find_query.pop("fields", None)
+        items = filter(
+            match,
+            self.store.find(collection, company_id=company_id, **find_query),
+        )
+        stop = None if limit is None else start + limit
+        items = [
+            project(item, fields)
+            for item in itertools.islice(items, start, stop)
+        ]
+        return response(items)
+
+    def _inspect(self, collection, identifier, company_name, query):
+        version_number = query.pop("version_number", None)
+        company_id = None
+        if collection != "company":
+            company_id = self.company_id(company_name)
+        item = self.store.get(
+            collection,
+            identifier,
+            company_id=company_id,
+            fields=query.get("fields"),
+        )
+        if item is None:
+            msg = f"{collection} {identifier!r} not found in the local mirror"
+            raise errors.NotFound(msg)
+        if version_number is not None and item.get("version") not in (
+            None,
+            version_number,
+        ):
+            msg = f"Version {version_number} of {identifier!r} is not mirrored"
+            raise errors.Error(msg)
+        return response(item)
+
+    async def devices(self, company_name=None, **query):
+        return self._list("device", company_name, query)
+
+    async def inspect_device(
+        self, device_identifier, company_name=None, **query
+    ):
+        return self._inspect("device", device_identifier, company_name, query)
+
+    async def inspect_devices(
+        self, device_identifiers, company_name=None, fields=None, **_kwargs
+    ):
+        query = dict(fields=fields)
+        return [
+            self._inspect("device", uid, company_name, query)["body"]
+            for uid in device_identifiers
+        ]
+
+    async def blueprints(self, company_name=None, **query):
+        return self._list("blueprint", company_name, query)
+
+    async def inspect_blueprint(self, object_id, company_name=None, **query):
+        return self._inspect("blueprint", object_id, company_name, query)
+
+    async def edge_actions(self, company_name=None, **query):
+        return self._list("edge_action", company_name, query)
+
+    async def inspect_edge_action(self, object_id, company_name=None, **query):
+        return self._inspect("edge_action", object_id, company_name, query)
+
+    async def actions(self, company_name=None, **query):
+        return self._list("cloud_action", company_name, query)
+
+    async def inspect_action(self, object_id, company_name=None, **query):
+        return self._inspect("cloud_action", object_id, company_name, query)
+
+    async def connectors(self, company_name=None, **query):
+        return self._list("connector", company_name, query)
+
+    async def inspect_connector(self, object_id, company_name=None, **query):
+        return self._inspect("connector", object_id, company_name, query)
+
+    async def streams(self, company_name=None, **query):
+        return self._list("stream", company_name, query)
+
+    async def inspect_stream(self, stream_id, company_name=None, **query):
+        return self._inspect("stream", stream_id, company_name, query)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def unavailable(*_args, **_kwargs):
+            raise errors.Error(f"{name!r} is not available offline")
+
+        return unavailable
+
+
+def _find_query(query):
+    keys = ("sort", "order", "start", "limit", "fields")
+    return dict((key, query[key]) for key in keys if key in query)
@@ -0,0 +1,183 @@
+"""Paging over list endpoints.
+
+Octave list endpoints accept ``start`` and ``limit``; these helpers walk
+such endpoints page by page so callers can consume records as they arrive.
+
+Deep ``start`` offsets are slow on large collections and unstable while
+records are inserted, so endpoints listed in KEYSET_KEYS are paged by key
+instead: records are sorted by the key and every next page is requested
+with a filter from the key of the last record.
+"""
+
+from ..constants import DEFAULT_PAGE_SIZE
+from ..utils.query_params import And, Compare
+
+# list method: key of the keyset pagination
+KEYSET_KEYS = dict(
+    events="creationDate",
+    events_by_stream_id="creationDate",
+    events_by_stream_path="creationDate",
+    device_events="creationDate",
+)
+
+
+class KeysetCursor:
+    """Position in a collection sorted by key: last key and ids seen at it.
+
+    Keys are not unique (e.g. events created in the same millisecond), so
+    pages are requested with ``key>=last`` (``<=`` in descending order)
+    and the ids tell which records of the last key were already seen.
+    """
+
+    def __init__(self, key, value=None, ids=(), descending=False):
+        self.key = key
+        self.value = value
+        self.ids = set(ids)
+        self.descending = descending
+
+    def add(self, item):
+        """Move the cursor to the record, return False if it was seen."""
+        value = item.get(self.key)
+        if value is None:
+            return True
+        if self.value is not None:
+            before = (
+                value > self.value if self.descending else value < self.value
+            )
+            if before or (value == self.value and item.get("id") in self.ids):
+                return False
+        if value != self.value:
+            self.value = value
+            self.ids = set()
+        self.ids.add(item.get("id"))
+        return True
+
+    def condition(self, value):
+        """Filter of the records from the key value, None for all."""
+        if value is None:
+            return None
+        return Compare(self.key, "<=" if self.descending else ">=", value)
+
+
+def keyset_cursor(func, keyset, start, query):
+    """Return KeysetCursor to page func with, None for start offsets.
+
+    The default keyset of the endpoint is not used when the search starts
+    at an offset, since records skipped by the offset cannot be told apart
+    from the unseen ones with the same key.
+    """
+    if keyset is False or (keyset is None and start):
+        return None
+    if isinstance(keyset, KeysetCursor):
+        return keyset
+    key = keyset or KEYSET_KEYS.get(getattr(func, "__name__", None))
+    if not key or query.get("sort") not in (None, key):
+        return None
+    return KeysetCursor(key, descending=query.get("order") == "desc")
+
+
+class PaginationMixin:
+    async def iter_pages(
+        self,
+        func,
+        *args,
+        limit=None,
+        start=0,
+        page_size=DEFAULT_PAGE_SIZE,
+        keyset=None,
+        **query,
+    ):
+        """Iterate over pages of a list endpoint.
+
+        Args:
+            func (coroutine function): list method of the client,
+                                       e.g. ``client.devices``
+            limit (int, optional): maximum number of records,
+                                   None for all records
+            start (int): start index of the search
+            page_size (int): maximum number of records per request
+            keyset (str, KeysetCursor, bool, optional): key to page by,
+                a cursor to continue from, False for start offsets; by
+                default the key of the endpoint in KEYSET_KEYS, if the
+                records are not sorted by another field and start is 0.
+                The key and "id" are added to the requested fields.
+
+        Yields:
+            list: body of each response
+        """
+        cursor = keyset_cursor(func, keyset, start, query)
+        if cursor is not None:
+            pages = self._iter_keyset_pages(
+                func, args, cursor, limit, start, page_size, query
+            )
+            async for page in pages:
+                yield page
+            return
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = (
+                page_size if remaining is None else min(page_size, remaining)
+            )
+            resp = await func(*args, start=start, limit=size, **query)
+            page = resp.get("body") or []
+            if page:
+                yield page
+            if len(page) < size:
+                break
+            start += len(page)
+            if remaining is not None:
+                remaining -= len(page)
+
+    @staticmethod
+    async def _iter_keyset_pages(
+        func, args, cursor, limit, start, page_size, query
+    ):
+        filters = query.pop("filters", None)
+        query["sort"] = cursor.key
+        fields = query.get("fields")
+        if fields:
+            keys = (cursor.key, "id")
+            query["fields"] = list(fields) + [
+                key for key in keys if key not in fields
+            ]
+        value, remaining = cursor.value, limit
+        while remaining is None or remaining > 0:
+            size = (
+                page_size if remaining is None else min(page_size, remaining)
+            )
+            conditions = [
+                expr for expr in (filters, cursor.condition(value)) if expr
+            ]
+            resp = await func(
+                *args,
+                start=start,
+                limit=size,
+                filters=And(*conditions) if conditions else None,
+                **query,
+            )
+            page = resp.get("body") or []
+            items = [item for item in page if cursor.add(item)]
+            if items:
+                yield items
+            if len(page) < size:
+                break
+            if remaining is not None:
+                remaining -= len(items)
+            if cursor.value == value:
+                # the whole page has the same key
+                start += len(page)
+            else:
+                value, start = cursor.value, 0
+
+    async def iter_items(self, func, *args, **kwargs):
+        """Iterate over records of a list endpoint.
+
+        Accepts the same arguments as :py:meth:`iter_pages`.
+
+        Yields:
+            dict: record
+        """
+        async for page in self.iter_pages(func, *args, **kwargs):
+            for item in page:
+                yield item
@@ -39,7 +39,10 @@ def main():
     parser.add_argument(
         "-H", action=HelpAction, help="show help from all command"
     )
-    parser.set_defaults(config_filename=constants.DEFAULT_CONFIG)
+    parser.set_defaults(
+        config_filename=constants.DEFAULT_CONFIG,
+        store_filename=constants.DEFAULT_STORE,
+    )
     parser.add_argument(
         "-C",
         metavar="PATH",
@@ -58,6 +61,11 @@ def main():
         action="store_true",
         help="decrypt secrets and displays plain text",
     )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="read objects from the local mirror (see 'cloud mirror')",
+    )
 
     parser.set_defaults(func=lambda **_kwargs: parser.print_help())
     subparsers = parser.add_subparsers(title="commands", metavar="")
@@ -33,7 +33,8 @@ from ..utils import render
 from ..utils.color_diff import color_diff
 from ..utils.format_date import ISO_8601, format_date
 from ..utils.format_pretty_json import pformatj, pprintj
-from ..utils.table import ObjTable
+from ..utils.output import add_output_argument, print_records
+from ..utils.table import column_fields
 
 
 async def cmd_blueprint_inspect(
@@ -54,9 +55,7 @@ async def cmd_blueprint_inspect(
     pprintj(items)
 
 
-async def cmd_blueprint_ls(client, **_kwargs):
-    fields = ["id", "displayName", "creationDate", "lastEditDate", "version"]
-
+async def cmd_blueprint_ls(client, output="table", **_kwargs):
     columns = [
         dict(field="id", title="ID"),
         dict(field="displayName", title="DISPLAY NAME"),
@@ -79,11 +78,10 @@ async def cmd_blueprint_ls(client, **_kwargs):
         # dict(field='observations', title='observations'),
     ]
 
-    resp = await client.blueprints(fields=fields)
-    data = resp.get("body")
-
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    blueprints = client.iter_items(
+        client.blueprints, fields=column_fields(columns)
+    )
+    await print_records(blueprints, columns, output)
 
 
 async def cmd_blueprint_diff(
@@ -126,6 +124,7 @@ def init_cli(subparsers):
 
     parser_ls = sub.add_parser("ls", help="display blueprint list")
     parser_ls.set_defaults(func=cmd_blueprint_ls)
+    add_output_argument(parser_ls)
 
     parser_inspect = sub.add_parser(
         "inspect",
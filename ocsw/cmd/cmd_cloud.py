@@ -22,111 +22,178 @@
 
 import asyncio
 import os
-import shutil
-
-import yaml
 
+from .. import errors
+from ..api.change_feed import COLLECTION_METHODS
+from ..constants import DEFAULT_CONCURRENCY
+from ..utils.bulk import error_message
+from ..utils.export_tree import (
+    BLOB_DIRNAME,
+    BackgroundWriter,
+    BlobStore,
+    ExportTree,
+    object_hash,
+    read_manifest,
+    write_manifest,
+)
 from ..utils.helpers import match_company_name
+from ..utils.limiter import Limiter
+from ..utils.serializer import dump_yaml
+from ..utils.store import Store
+from ..utils.workspace import (
+    local_changes,
+    merge_object,
+    object_kind,
+    remove_object,
+    store_bases,
+)
 
 LIMIT = 1000  # TODO: set from configure
 
 
-class Dumper(yaml.SafeDumper):
-    @staticmethod
-    def str_presenter(dumper, data):
-        if "\n" in data:  # check for multiline string
-            items = [item.rstrip() for item in data.splitlines()]
-            return dumper.represent_scalar(
-                "tag:yaml.org,2002:str", "\n".join(items), style="|"
-            )
-        return dumper.represent_scalar("tag:yaml.org,2002:str", data)
+# kind of the fetched object: client update method
+UPDATE_METHODS = dict(
+    edge_action="update_edge_action",
+    cloud_action="update_action",
+)
+
+# kind of the fetched object: name of the object directory
+FETCH_TEMPLATES = dict(
+    edge_action="{description}__{id}",
+    cloud_action="{description}__{id}",
+    blueprint="{displayName}__{id}",
+)
+
+# kind of the fetched object: client inspect method
+INSPECT_METHODS = dict(
+    edge_action="inspect_edge_action",
+    cloud_action="inspect_action",
+    blueprint="inspect_blueprint",
+)
+
+# fields of the objects listed by cloud pull
+PULL_FIELDS = [
+    "id",
+    "version",
+    "companyId",
+    "description",
+    "displayName",
+    "edgePackage",
+]
+
+# files stored once in the blob store by --dedup
+BLOB_FILES = ("action.js", "edgePackage.yaml")
+
+BLUEPRINT_CP_PROPS = [
+    "displayName",
+    "edgePackage",
+    "localActions",
+    "observations",
+    "state",
+    "version",
+]
+
+
+def blueprint_version(blueprint):
+    version = blueprint.get("version")
+    if version is not None and blueprint.get("edgePackage"):
+        version = "{}:{}".format(version, blueprint["edgePackage"])
+    return version
+
+
+def fetch_path(company_name, kind, item):
+    """Return directory of the object in the fetched tree."""
+    name = FETCH_TEMPLATES[kind].format(**item)
+    return os.path.join(company_name, kind, name)
+
+
+def render_action(action):
+    meta = dict(
+        disabled=action.get("disabled", True),
+        source=action.get("source", ""),
+        description=action.get("description", ""),
+        version=action.get("version", 1),
+    )
+    return {
+        "action.js": action.get("js", "").encode(encoding="utf-8"),
+        "meta.yaml": dump_yaml(meta),
+    }
 
 
-Dumper.add_representer(str, Dumper.str_presenter)
+def render_fetched_blueprint(blueprint, edge_package_index=None):
+    meta = dict()
+    for key in BLUEPRINT_CP_PROPS:
+        meta[key] = blueprint.get(key)
+    files = {"meta.yaml": dump_yaml(meta)}
+    if edge_package_index:
+        edge_package = edge_package_index.get(blueprint.get("edgePackage"))
+        files["edgePackage.yaml"] = dump_yaml(edge_package)
+    return files
 
 
-def save_edge_action(base_path, company_name, edge_action):
-    name = "{description}__{id}".format(**edge_action)
-    path = os.path.join(base_path, company_name, "edge_action", name)
-    export_action(path, edge_action)
+async def save_edge_action(tree, company_name, edge_action):
+    path = fetch_path(company_name, "edge_action", edge_action)
+    await export_action(tree, path, edge_action)
 
 
-def save_cloud_action(base_path, company_name, cloud_action):
-    name = "{description}__{id}".format(**cloud_action)
-    path = os.path.join(base_path, company_name, "cloud_action", name)
-    export_action(path, cloud_action)
+async def save_cloud_action(tree, company_name, cloud_action):
+    path = fetch_path(company_name, "cloud_action", cloud_action)
+    await export_action(tree, path, cloud_action)
 
 
-def save_blueprint(
-    base_path, company_name, blueprint, edge_package_index=None
+async def save_blueprint(
+    tree, company_name, blueprint, edge_package_index=None
 ):
-    name = "{displayName}__{id}".format(**blueprint)
-    path = os.path.join(base_path, company_name, "blueprint", name)
-    os.makedirs(path, exist_ok=True)
-
-    blueprint_cp_props = [
-        "displayName",
-        "edgePackage",
-        "localActions",
-        "observations",
-        "state",
-        "version",
-    ]
-
-    meta = dict()
-    for key in blueprint_cp_props:
-        meta[key] = blueprint.get(key)
-    filename = os.path.join(path, "meta.yaml")
-    with open(filename, "wb") as fileptr:
-        yaml.dump(
-            meta,
-            fileptr,
-            default_flow_style=False,
-            allow_unicode=True,
-            encoding="utf-8",
-            Dumper=Dumper,
-        )
-    if edge_package_index:
-        edge_package = edge_package_index.get(blueprint.get("edgePackage"))
-        filename = os.path.join(path, "edgePackage.yaml")
-        with open(filename, "wb") as fileptr:
-            yaml.dump(
-                edge_package,
-                fileptr,
-                default_flow_style=False,
-                allow_unicode=True,
-                encoding="utf-8",
-                Dumper=Dumper,
-            )
+    path = fetch_path(company_name, "blueprint", blueprint)
+    await tree.awrite(
+        path,
+        blueprint.get("id"),
+        blueprint_version(blueprint),
+        lambda: render_fetched_blueprint(blueprint, edge_package_index),
+    )
 
 
-async def _fetch_edge_actions(client, base_path, companies):
+async def _fetch_edge_actions(client, tree, companies):
     for company in companies:
         resp = await client.edge_actions(
             fields=[], company_name=company["name"], limit=LIMIT
         )
         list_action = resp.get("body")
-        for action in list_action:
-            company_name = match_company_name(
-                companies, action.get("companyId", company)
-            )
-            save_edge_action(base_path, company_name, action)
+        await asyncio.gather(
+            *[
+                save_edge_action(
+                    tree,
+                    match_company_name(
+                        companies, action.get("companyId", company)
+                    ),
+                    action,
+                )
+                for action in list_action
+            ]
+        )
 
 
-async def _fetch_cloud_actions(client, base_path, companies):
+async def _fetch_cloud_actions(client, tree, companies):
     for company in companies:
         resp = await client.actions(
             fields=[], company_name=company["name"], limit=LIMIT
         )
         list_action = resp.get("body")
-        for action in list_action:
-            company_name = match_company_name(
-                companies, action.get("companyId", company)
-            )
-            save_cloud_action(base_path, company_name, action)
+        await asyncio.gather(
+            *[
+                save_cloud_action(
+                    tree,
+                    match_company_name(
+                        companies, action.get("companyId", company)
+                    ),
+                    action,
+                )
+                for action in list_action
+            ]
+        )
 
 
-async def _fetch_blueprints(client, base_path, companies):
+async def _fetch_blueprints(client, tree, companies):
     resp = await client.firmwares()
     data = resp.get("body")
     edge_package_index = dict((item["id"], item) for item in data)
@@ -136,41 +203,93 @@ async def _fetch_blueprints(client, base_path, companies):
             fields=[], company_name=company["name"], limit=LIMIT
         )
         list_blueprint = resp.get("body")
-        for blueprint in list_blueprint:
-            company_name = match_company_name(
-                companies, blueprint.get("companyId", company)
-            )
-            save_blueprint(
-                base_path, company_name, blueprint, edge_package_index
-            )
+        await asyncio.gather(
+            *[
+                save_blueprint(
+                    tree,
+                    match_company_name(
+                        companies, blueprint.get("companyId", company)
+                    ),
+                    blueprint,
+                    edge_package_index,
+                )
+                for blueprint in list_blueprint
+            ]
+        )
+
+
+async def get_companies(client, get_all=False):
+    """Return all companies or the current one."""
+    resp = await client.companies(field=["id", "name"])
+    list_companies = resp.get("body")
+    if get_all:
+        return list_companies
+    return [
+        item
+        for item in list_companies
+        if client.current_company in item.values()
+    ]
+
+
+def get_blob_store(root, dedup=False, fsync=False):
+    if not dedup:
+        return None
+    return BlobStore(os.path.join(root, BLOB_DIRNAME), fsync=fsync)
+
+
+def prune_blobs(root, blobs):
+    if blobs is None:
+        return
+    removed = blobs.prune(root)
+    print(
+        "{}: {written} blobs written, {reused} reused, {} removed".format(
+            blobs.root, removed, **blobs.stats
+        )
+    )
+
+
+def print_export_stats(path, tree):
+    print(
+        "{}: {written} written, {skipped} unchanged, {removed} removed".format(
+            path, **tree.stats
+        )
+    )
 
 
 async def cmd_cloud_fetch(
-    client, config_path, config_filename, get_all=False, **_kwargs
+    client,
+    config_path,
+    config_filename,
+    get_all=False,
+    incremental=False,
+    fsync=False,
+    atomic=True,
+    dedup=False,
+    **_kwargs,
 ):
     """Download objects and refs from cloud."""
     workdir = os.path.dirname(os.path.join(config_path, config_filename))
     base_path = os.path.join(workdir, "company")
-    os.makedirs(base_path, exist_ok=True)
-    shutil.rmtree(base_path, ignore_errors=False, onerror=None)
 
-    # get all companies
-    resp = await client.companies(field=["id", "name"])
-    list_companies = resp.get("body")
-
-    companies = [client.current_company]
-    if get_all:
-        companies = list_companies
-    else:
-        companies = [
-            item
-            for item in list_companies
-            if client.current_company in item.values()
-        ]
-
-    await _fetch_edge_actions(client, base_path, companies)
-    await _fetch_cloud_actions(client, base_path, companies)
-    await _fetch_blueprints(client, base_path, companies)
+    companies = await get_companies(client, get_all)
+
+    # fetched files are kept as merge bases of cloud pull
+    bases = BlobStore(os.path.join(base_path, BLOB_DIRNAME), fsync=fsync)
+    with BackgroundWriter() as writer, ExportTree(
+        base_path,
+        incremental=incremental,
+        writer=writer,
+        fsync=fsync,
+        atomic=atomic,
+        blobs=bases if dedup else None,
+        blob_names=BLOB_FILES,
+        bases=bases,
+    ) as tree:
+        await _fetch_edge_actions(client, tree, companies)
+        await _fetch_cloud_actions(client, tree, companies)
+        await _fetch_blueprints(client, tree, companies)
+    print_export_stats(base_path, tree)
+    prune_blobs(base_path, bases)
 
 
 def get_template_filename4blueprint(items):
@@ -185,62 +304,24 @@ def get_template_filename4actions(items):
     return "{description}" if uniq_description else "{description}__{id}"
 
 
-def export_action(outpath, action):
-    os.makedirs(outpath, exist_ok=True)
-
-    # save action.js
-    filename = os.path.join(outpath, "action.js")
-    js_body = action.get("js", "")
-    with open(filename, "wb") as fileptr:
-        fileptr.write(js_body.encode(encoding="utf-8"))
-
-    # save meta.yaml
-    meta = dict(
-        disabled=action.get("disabled", True),
-        source=action.get("source", ""),
-        description=action.get("description", ""),
-        version=action.get("version", 1),
+async def export_action(tree, path, action):
+    await tree.awrite(
+        path,
+        action.get("id"),
+        action.get("version"),
+        lambda: render_action(action),
     )
-    filename = os.path.join(outpath, "meta.yaml")
-    with open(filename, "wb") as fileptr:
-        yaml.dump(
-            meta,
-            fileptr,
-            default_flow_style=False,
-            allow_unicode=True,
-            encoding="utf-8",
-            Dumper=Dumper,
-        )
 
 
-def export_blueprint(outpath, blueprint):
-    os.makedirs(outpath, exist_ok=True)
+async def export_blueprint(tree, path, blueprint, edge_package=None):
+    def render():
+        files = {"meta.yaml": dump_yaml(blueprint)}
+        if edge_package:
+            files["edgePackage.yaml"] = dump_yaml(edge_package)
+        return files
 
-    meta = blueprint
-    filename = os.path.join(outpath, "meta.yaml")
-    with open(filename, "wb") as fileptr:
-        yaml.dump(
-            meta,
-            fileptr,
-            default_flow_style=False,
-            allow_unicode=True,
-            encoding="utf-8",
-            Dumper=Dumper,
-        )
-
-
-def export_edge_package(outpath, edge_package):
-    os.makedirs(outpath, exist_ok=True)
-    filename = os.path.join(outpath, "edgePackage.yaml")
-    with open(filename, "wb") as fileptr:
-        yaml.dump(
-            edge_package,
-            fileptr,
-            default_flow_style=False,
-            allow_unicode=True,
-            encoding="utf-8",
-            Dumper=Dumper,
-        )
+    version = blueprint_version(blueprint)
+    await tree.awrite(path, blueprint.get("id"), version, render)
 
 
 async def get_edge_package_index(client, company_name=None):
@@ -249,7 +330,10 @@ async def get_edge_package_index(client, company_name=None):
     return dict((item["id"], item) for item in data)
 
 
-async def get_local_actions4blueprint(client, company_name, blueprint):
+async def get_local_actions4blueprint(
+    client, company_name, blueprint, limiter=None, action_ids=None
+):
+    limiter = limiter or Limiter()
     futures = [
         client.inspect_edge_action(
             action_id,
@@ -257,59 +341,462 @@ async def get_local_actions4blueprint(client, company_name, blueprint):
             company_name=company_name,
         )
         for action_id, action_v in blueprint.get("localActions", {}).items()
+        if action_ids is None or action_id in action_ids
     ]
-    return [resp.get("body") for resp in await asyncio.gather(*futures)]
+    return [resp.get("body") for resp in await limiter.gather(*futures)]
+
+
+def exported_local_actions(tree, actions_path, local_actions):
+    """Return stubs {id: {id, version, description}} of the local actions
+    exported before with the version of the blueprint.
+
+    The description is taken from the exported path, so the action does
+    not have to be fetched to compute the paths of the others.
+    """
+    prefix = actions_path + os.sep
+    stubs = dict()
+    for path, entry in tree.previous.items():
+        uid = entry.get("id")
+        if not path.startswith(prefix) or uid not in local_actions:
+            continue
+        version = local_actions[uid].get("version")
+        if version is None or entry.get("version") != version:
+            continue
+        description = os.path.relpath(path, actions_path)
+        suffix = f"__{uid}"
+        if description.endswith(suffix):
+            description = description[: -len(suffix)]
+        stubs[uid] = dict(id=uid, version=version, description=description)
+    return stubs
+
+
+async def _export_blueprint(
+    client, limiter, tree, company_name, blueprint_path, blueprint
+):
+    actions_path = os.path.join(blueprint_path, "localActions")
+    local_actions = blueprint.get("localActions", {})
+    stubs = exported_local_actions(tree, actions_path, local_actions)
+    actions = await get_local_actions4blueprint(
+        client,
+        company_name,
+        blueprint,
+        limiter,
+        action_ids=set(local_actions) - set(stubs),
+    )
+
+    template_filename4actions = get_template_filename4actions(
+        actions + list(stubs.values())
+    )
+    # unchanged actions are fetched only if their files must be rewritten
+    stale = set(
+        uid
+        for uid, stub in stubs.items()
+        if not tree.is_unchanged(
+            os.path.join(
+                actions_path, template_filename4actions.format(**stub)
+            ),
+            uid,
+            stub["version"],
+        )
+    )
+    if stale:
+        actions += await get_local_actions4blueprint(
+            client, company_name, blueprint, limiter, action_ids=stale
+        )
+    actions += [stub for uid, stub in stubs.items() if uid not in stale]
+    await asyncio.gather(
+        *[
+            export_action(
+                tree,
+                os.path.join(
+                    actions_path, template_filename4actions.format(**action)
+                ),
+                action,
+            )
+            for action in actions
+        ]
+    )
 
 
-async def _export_blueprints(client, company_name=None, outpath="."):
-    resp = await client.blueprints(company_name=company_name, limit=LIMIT)
-    edge_package_index = await get_edge_package_index(
-        client, company_name=company_name
+async def _export_blueprints(client, limiter, tree, company_name=None):
+    resp, edge_package_index = await asyncio.gather(
+        limiter.run(client.blueprints(company_name=company_name, limit=LIMIT)),
+        limiter.run(get_edge_package_index(client, company_name=company_name)),
     )
 
     list_blueprint = resp.get("body")
     template_filename4blueprint = get_template_filename4blueprint(
         list_blueprint
     )
+    futures = []
     for blueprint in list_blueprint:
-        blueprint_name = template_filename4blueprint.format(**blueprint)
-        blueprint_path = os.path.join(outpath, blueprint_name)
-        export_blueprint(blueprint_path, blueprint)
-        edge_package_id = blueprint.get("edgePackage")
-        if edge_package_id:
-            edge_package = edge_package_index.get(edge_package_id)
-            export_edge_package(blueprint_path, edge_package)
-
-        actions = await get_local_actions4blueprint(
-            client, company_name, blueprint
+        blueprint_path = template_filename4blueprint.format(**blueprint)
+        edge_package = edge_package_index.get(blueprint.get("edgePackage"))
+        futures.append(
+            export_blueprint(tree, blueprint_path, blueprint, edge_package)
         )
-
-        template_filename4actions = get_template_filename4actions(actions)
-        for action in actions:
-            actions_path = os.path.join(blueprint_path, "localActions")
-            action_name = template_filename4actions.format(**action)
-            action_path = os.path.join(actions_path, action_name)
-            export_action(action_path, action)
+        futures.append(
+            _export_blueprint(
+                client, limiter, tree, company_name, blueprint_path, blueprint
+            )
+        )
+    await asyncio.gather(*futures)
 
 
-async def _export_cloud_actions(client, company_name=None, outpath="."):
-    resp = await client.actions(company_name=company_name, limit=LIMIT)
-    actions = resp.get("body")
+async def _export_cloud_actions(client, limiter, tree, company_name=None):
+    actions = [
+        action
+        async for action in client.iter_items(
+            limiter.wrap(client.actions), company_name=company_name
+        )
+    ]
 
+    # names depend on all descriptions, so the files are written after
+    # the last page, once per action
     template_filename4actions = get_template_filename4actions(actions)
-    for action in actions:
-        for action in actions:
-            action_name = template_filename4actions.format(**action)
-            action_path = os.path.join(outpath, action_name)
-            export_action(action_path, action)
+    await asyncio.gather(
+        *[
+            export_action(
+                tree, template_filename4actions.format(**action), action
+            )
+            for action in actions
+        ]
+    )
 
 
-async def cmd_cloud_export(client, config_path, get_all=False, **_kwargs):
-    """Download objects and refs from cloud."""
+async def _export_tree(func, client, limiter, outpath, company_name, **kwargs):
+    with ExportTree(outpath, **kwargs) as tree:
+        await func(client, limiter, tree, company_name=company_name)
+    print_export_stats(outpath, tree)
+
+
+async def _export_company(client, limiter, base_path, company_name, **kwargs):
+    await asyncio.gather(
+        _export_tree(
+            _export_blueprints,
+            client,
+            limiter,
+            os.path.join(base_path, "blueprints"),
+            company_name,
+            **kwargs,
+        ),
+        _export_tree(
+            _export_cloud_actions,
+            client,
+            limiter,
+            os.path.join(base_path, "cloud_actions"),
+            company_name,
+            **kwargs,
+        ),
+    )
+
+
+async def cmd_cloud_export(
+    client,
+    config_path,
+    get_all=False,
+    incremental=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    fsync=False,
+    atomic=True,
+    dedup=False,
+    **_kwargs,
+):
+    """Download objects and refs from cloud.
+
+    Companies, blueprints and actions are exported concurrently, no more
+    than concurrency requests are sent at the same time. Files are rendered
+    and written by a thread pool.
+    """
     prj_path = os.path.dirname(os.path.join(config_path, ".."))
+    limiter = Limiter(concurrency)
 
-    # get all companies
-    resp = await client.companies(field=["id", "name"])
+    companies = await get_companies(client, get_all)
+    companies_name = [uid["name"] for uid in companies]
+
+    companies_path = os.path.join(prj_path, "companies")
+    blobs = get_blob_store(companies_path, dedup, fsync)
+    with BackgroundWriter() as writer:
+        await asyncio.gather(
+            *[
+                _export_company(
+                    client,
+                    limiter,
+                    os.path.join(companies_path, company_name),
+                    company_name,
+                    incremental=incremental,
+                    writer=writer,
+                    fsync=fsync,
+                    atomic=atomic,
+                    blobs=blobs,
+                    blob_names=BLOB_FILES,
+                )
+                for company_name in companies_name
+            ]
+        )
+    prune_blobs(companies_path, blobs)
+
+
+async def _server_versions(client, kind, company_name):
+    func = getattr(client, COLLECTION_METHODS[kind])
+    items = client.iter_items(
+        func, company_name=company_name, fields=["id", "version"]
+    )
+    return dict([(item["id"], item.get("version")) async for item in items])
+
+
+async def _plan_push(client, limiter, changes, force=False):
+    groups = sorted(set((item.company_name, item.kind) for item in changes))
+    results = await limiter.gather(
+        *[_server_versions(client, kind, company) for company, kind in groups]
+    )
+    versions = dict(zip(groups, results))
+    plan = []
+    for change in changes:
+        server = versions[(change.company_name, change.kind)]
+        if change.conflicts:
+            status = "unmerged"
+        elif change.uid not in server:
+            status = "missing"
+        elif server[change.uid] != change.version and not force:
+            status = "conflict"
+        else:
+            status = "update"
+        plan.append((status, change))
+    return plan
+
+
+async def _push_change(client, limiter, change):
+    func = getattr(client, UPDATE_METHODS[change.kind])
+    resp = await limiter.run(
+        func(change.uid, props=change.props, company_name=change.company_name)
+    )
+    return resp.get("body") or {}
+
+
+async def cmd_cloud_push(
+    client,
+    config_path,
+    config_filename,
+    dry_run=False,
+    force=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    rate=None,
+    **_kwargs,
+):
+    """Update objects edited in the fetched tree on the server.
+
+    Only objects whose files differ from the manifest of the last fetch
+    are sent, and only if the version on the server is still the fetched
+    one. Objects merged with conflicts by 'cloud pull' are not sent while
+    their files have conflict markers.
+    """
+    workdir = os.path.dirname(os.path.join(config_path, config_filename))
+    base_path = os.path.join(workdir, "company")
+    objects = read_manifest(base_path)
+    if not objects:
+        raise errors.Error("Nothing to push, run 'cloud fetch' first")
+
+    changes = list(local_changes(base_path, objects, UPDATE_METHODS))
+    if not changes:
+        print("Everything up-to-date")
+        return
+
+    bases = BlobStore(os.path.join(base_path, BLOB_DIRNAME))
+    limiter = Limiter(concurrency, rate=rate)
+    plan = await _plan_push(client, limiter, changes, force=force)
+    for status, change in plan:
+        names = change.conflicts if status == "unmerged" else change.props
+        print(f"{status:<8} {change.path}: {', '.join(sorted(names))}")
+    updates = [change for status, change in plan if status == "update"]
+    if dry_run or not updates:
+        return
+
+    results = await asyncio.gather(
+        *[_push_change(client, limiter, change) for change in updates],
+        return_exceptions=True,
+    )
+    failed = 0
+    for change, result in zip(updates, results):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"failed   {change.path}: {error_message(result)}")
+            continue
+        entry = objects[change.path]
+        entry["version"] = result.get("version", entry.get("version"))
+        entry["files"].update(change.files)
+        entry.pop("conflicts", None)
+        # the pushed files are the merge bases of the next pull
+        store_bases(base_path, change, bases)
+    write_manifest(base_path, objects)
+    print(f"{len(updates) - failed} updated, {failed} failed")
+    if failed:
+        raise errors.Error(f"{failed} objects were not updated")
+
+
+async def _list_objects(client, limiter, kind, company):
+    func = getattr(client, COLLECTION_METHODS[kind])
+
+    async def collect():
+        items = client.iter_items(
+            func, company_name=company["name"], fields=PULL_FIELDS
+        )
+        return [item async for item in items]
+
+    return await limiter.run(collect())
+
+
+async def _inspect_object(client, limiter, kind, company_name, item):
+    func = getattr(client, INSPECT_METHODS[kind])
+    resp = await limiter.run(func(item["id"], company_name=company_name))
+    return resp.get("body")
+
+
+def object_version(kind, item):
+    if kind == "blueprint":
+        return blueprint_version(item)
+    return item.get("version")
+
+
+async def cmd_cloud_pull(
+    client,
+    config_path,
+    config_filename,
+    get_all=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    **_kwargs,
+):
+    """Fetch objects changed on the server and merge them into local files.
+
+    Only objects whose version differs from the last fetch are downloaded.
+    Files edited locally are merged with the server changes using the
+    fetched files as the common base.
+    """
+    workdir = os.path.dirname(os.path.join(config_path, config_filename))
+    base_path = os.path.join(workdir, "company")
+    previous = read_manifest(base_path)
+    if not previous:
+        raise errors.Error("Nothing to pull into, run 'cloud fetch' first")
+    bases = BlobStore(os.path.join(base_path, BLOB_DIRNAME))
+    limiter = Limiter(concurrency)
+
+    companies = await get_companies(client, get_all)
+    groups = [
+        (kind, company) for company in companies for kind in FETCH_TEMPLATES
+    ]
+    listings = await asyncio.gather(
+        *[
+            _list_objects(client, limiter, kind, company)
+            for kind, company in groups
+        ]
+    )
+
+    paths = dict((entry.get("id"), path) for path, entry in previous.items())
+    listed, changed = set(), []
+    for (kind, company), items in zip(groups, listings):
+        for item in items:
+            company_name = match_company_name(
+                companies, item.get("companyId", company)
+            )
+            path = fetch_path(company_name, kind, item)
+            old_path = paths.get(item["id"], path)
+            listed.add(old_path)
+            version = object_version(kind, item)
+            entry = previous.get(old_path)
+            if (
+                entry
+                and version is not None
+                and entry.get("version") == version
+                and old_path == path
+            ):
+                continue
+            changed.append((kind, company_name, old_path, path, item))
+
+    edge_package_index = None
+    if any(kind == "blueprint" for kind, *_ in changed):
+        edge_package_index = await get_edge_package_index(client)
+    results = await asyncio.gather(
+        *[
+            _inspect_object(client, limiter, kind, company_name, item)
+            for kind, company_name, _, _, item in changed
+        ]
+    )
+
+    objects = dict(previous)
+    conflicts = 0
+    for (kind, _, old_path, path, _), obj in zip(changed, results):
+        if kind == "blueprint":
+            files = render_fetched_blueprint(obj, edge_package_index)
+        else:
+            files = render_action(obj)
+        digests, names = merge_object(
+            base_path, old_path, previous.get(old_path), path, files, bases
+        )
+        objects.pop(old_path, None)
+        objects[path] = dict(
+            id=obj.get("id"),
+            version=object_version(kind, obj),
+            hash=object_hash(digests),
+            files=digests,
+        )
+        if names:
+            objects[path]["conflicts"] = names
+            conflicts += 1
+            print(f"conflict {path}: {', '.join(names)}")
+        else:
+            print(f"updated  {path}")
+
+    company_names = set(company["name"] for company in companies)
+    for path, entry in previous.items():
+        company_name, kind = object_kind(path)
+        if (
+            path in listed
+            or company_name not in company_names
+            or kind not in FETCH_TEMPLATES
+        ):
+            continue
+        if remove_object(base_path, path, entry):
+            print(f"removed  {path}")
+        else:
+            print(f"kept     {path}: removed on the server, edited locally")
+        objects.pop(path)
+
+    write_manifest(base_path, objects)
+    bases.prune(base_path)
+    print(f"{len(changed)} changed, {conflicts} conflicts")
+    if conflicts:
+        raise errors.Error(
+            f"Merge conflicts in {conflicts} objects, "
+            "resolve them before 'cloud push'"
+        )
+
+
+async def _mirror_collection(client, store, collection, company, reconcile):
+    changed, deleted = 0, 0
+    async for kind, items in client.changes(
+        collection, store, company, reconcile=reconcile, page_size=LIMIT
+    ):
+        if kind == "changed":
+            changed += store.upsert(
+                collection, items, company_id=company["id"]
+            )
+        else:
+            store.remove(collection, items)
+            deleted += len(items)
+    return changed, deleted
+
+
+async def cmd_cloud_mirror(
+    client,
+    config_path,
+    store_filename,
+    get_all=False,
+    full=False,
+    reconcile=None,
+    **_kwargs,
+):
+    """Download changed objects into the local mirror used by --offline."""
+    resp = await client.companies()
     list_companies = resp.get("body")
 
     if get_all:
@@ -320,24 +807,21 @@ async def cmd_cloud_export(client, config_path, get_all=False, **_kwargs):
             for item in list_companies
             if client.current_company in item.values()
         ]
-    companies_name = [uid["name"] for uid in companies]
 
-    for company_name in companies_name:
-        base_path = os.path.join(prj_path, "companies", company_name)
-        # export blueprints
-        outpath = os.path.join(base_path, "blueprints")
-        os.makedirs(outpath, exist_ok=True)
-        shutil.rmtree(outpath, ignore_errors=False, onerror=None)
-        await _export_blueprints(
-            client, company_name=company_name, outpath=outpath
-        )
-        # export cloud actions
-        outpath = os.path.join(base_path, "cloud_actions")
-        os.makedirs(outpath, exist_ok=True)
-        shutil.rmtree(outpath, ignore_errors=False, onerror=None)
-        await _export_cloud_actions(
-            client, company_name=company_name, outpath=outpath
-        )
+    with Store(os.path.join(config_path, store_filename)) as store:
+        store.upsert("company", list_companies)
+        store.prune("company", [item["id"] for item in list_companies])
+        for company in companies:
+            for collection in COLLECTION_METHODS:
+                if full:
+                    store.set_watermark(collection, company["id"], None)
+                changed, deleted = await _mirror_collection(
+                    client, store, collection, company, full or reconcile
+                )
+                print(
+                    f"{company['name']}: {collection} "
+                    f"{changed} changed, {deleted} deleted"
+                )
 
 
 def init_cli(subparsers):
@@ -358,6 +842,29 @@ def init_cli(subparsers):
         dest="get_all",
         help="from all companies",
     )
+    parser_fetch.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="rewrite only changed objects, keep unchanged files",
+    )
+    parser_fetch.add_argument(
+        "--fsync",
+        action="store_true",
+        help="flush written files to disk",
+    )
+    parser_fetch.add_argument(
+        "--no-atomic",
+        action="store_false",
+        dest="atomic",
+        help="write files in place instead of renaming temporary files",
+    )
+    parser_fetch.add_argument(
+        "--dedup",
+        action="store_true",
+        help="store action.js and edgePackage.yaml once per content "
+        "in .objects, with references in object directories",
+    )
 
     # FETCH
     parser_export = sub.add_parser(
@@ -371,16 +878,111 @@ def init_cli(subparsers):
         dest="get_all",
         help="from all companies",
     )
+    parser_export.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="rewrite only changed objects, keep unchanged files",
+    )
+    parser_export.add_argument(
+        "--fsync",
+        action="store_true",
+        help="flush written files to disk",
+    )
+    parser_export.add_argument(
+        "--no-atomic",
+        action="store_false",
+        dest="atomic",
+        help="write files in place instead of renaming temporary files",
+    )
+    parser_export.add_argument(
+        "--dedup",
+        action="store_true",
+        help="store action.js and edgePackage.yaml once per content "
+        "in .objects, with references in object directories",
+    )
+    parser_export.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+
+    # MIRROR
+    parser_mirror = sub.add_parser(
+        "mirror",
+        help="download objects into the local mirror used by --offline",
+    )
+    parser_mirror.set_defaults(func=cmd_cloud_mirror)
+    parser_mirror.add_argument(
+        "--all",
+        action="store_true",
+        dest="get_all",
+        help="from all companies",
+    )
+    parser_mirror.add_argument(
+        "--full",
+        action="store_true",
+        help="download all objects, not only changed since the last run",
+    )
+    parser_mirror.add_argument(
+        "--reconcile",
+        action="store_true",
+        default=None,
+        help="search for removed objects (done once a day by default)",
+    )
 
-    # TODO: implement this
-    # # PULL
-    # parser_pull = sub.add_parser(
-    #     "pull", help="fetch and integrate with local package",
-    # )
-    # parser_pull.set_defaults(func=cmd_cloud_pull)
+    # PULL
+    parser_pull = sub.add_parser(
+        "pull",
+        help="fetch changed objects and merge them into local files",
+    )
+    parser_pull.set_defaults(func=cmd_cloud_pull)
+    parser_pull.add_argument(
+        "--all",
+        action="store_true",
+        dest="get_all",
+        help="from all companies",
+    )
+    parser_pull.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
 
-    # # PUSH
-    # parser_push = sub.add_parser(
-    #     "push", help="update remote refs along with associated objects",
-    # )
-    # parser_push.set_defaults(func=cmd_cloud_push)
+    # PUSH
+    parser_push = sub.add_parser(
+        "push",
+        help="update remote objects edited in the fetched tree",
+    )
+    parser_push.set_defaults(func=cmd_cloud_push)
+    parser_push.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="print the plan without updating objects",
+    )
+    parser_push.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="update objects changed on the server since the fetch",
+    )
+    parser_push.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_push.add_argument(
+        "--rate",
+        type=float,
+        help="maximum number of requests per second",
+    )
@@ -27,7 +27,7 @@ from ..utils import render
 from ..utils.color_diff import color_diff
 from ..utils.format_date import ISO_8601, format_date
 from ..utils.format_pretty_json import pprintj
-from ..utils.table import ObjTable
+from ..utils.output import add_output_argument, print_records
 
 
 async def cmd_cloud_actions_inspect(
@@ -48,7 +48,9 @@ async def cmd_cloud_actions_inspect(
     pprintj(items)
 
 
-async def cmd_cloud_actions_ls(client, limit, start, **_kwargs):
+async def cmd_cloud_actions_ls(
+    client, limit, start, output="table", **_kwargs
+):
 
     fields = [
         "id",
@@ -59,15 +61,14 @@ async def cmd_cloud_actions_ls(client, limit, start, **_kwargs):
         "version",
         # "companyId",
     ]
-    resp = await client.actions(
+    list_data = client.iter_items(
+        client.actions,
         fields=fields,
         sort="description",
         limit=limit,
         start=start,
     )
 
-    list_data = resp.get("body")
-
     columns = [
         dict(field="id", title="ID"),
         dict(field="description", title="NAME", render=render.map),
@@ -82,8 +83,7 @@ async def cmd_cloud_actions_ls(client, limit, start, **_kwargs):
         # dict(field="companyId")
     ]
 
-    table = ObjTable(data=list_data, columns=columns)
-    print(table)
+    await print_records(list_data, columns, output)
 
 
 async def cmd_cloud_actions_diff(
@@ -162,6 +162,7 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_lc)
 
     # DIFF
     parser_diff = sub.add_parser(
@@ -27,7 +27,7 @@ from ..utils import render
 from ..utils.config import Config
 from ..utils.format_pretty_json import pprintj
 from ..utils.helpers import get_company_name
-from ..utils.table import ObjTable
+from ..utils.output import add_output_argument, print_records
 
 
 async def cmd_inspect(client, companies, **_kwargs):
@@ -36,7 +36,7 @@ async def cmd_inspect(client, companies, **_kwargs):
     pprintj(items)
 
 
-async def cmd_ls(client, **_kwargs):
+async def cmd_ls(client, output="table", **_kwargs):
     fields = [
         "id",
         "name",
@@ -66,10 +66,8 @@ async def cmd_ls(client, **_kwargs):
         ),
     ]
 
-    resp = await client.companies(fields=fields)
-    data = resp.get("body")
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    companies = client.iter_items(client.companies, fields=fields)
+    await print_records(companies, columns, output)
 
 
 async def cmd_switch(client, config_path, config_filename, company, **_kwargs):
@@ -95,6 +93,7 @@ def init_cli(subparsers):
     # LS
     parser_ls = sub.add_parser("ls", help="display company list")
     parser_ls.set_defaults(func=cmd_ls)
+    add_output_argument(parser_ls)
 
     # INSPECT
     parser_inspect = sub.add_parser(
@@ -20,16 +20,38 @@
 
 """Manage Devices."""
 
-import asyncio
-import json
+import sys
 from operator import itemgetter
 
+from .. import errors
+from ..api.event import DEFAULT_EXPORT_PARTITIONS
+from ..constants import DEFAULT_CONCURRENCY
 from ..utils import render
 from ..utils.argparse_action import KeyValueAction
+from ..utils.bulk import (
+    INPUT_FORMATS,
+    Journal,
+    Progress,
+    error_message,
+    read_lines,
+    read_rows,
+    run_bulk,
+)
+from ..utils.date_fns import parse_timestamp
 from ..utils.format_date import format_date
 from ..utils.format_pretty_json import pprintj
 from ..utils.helpers import get
-from ..utils.table import ObjTable
+from ..utils.limiter import Limiter
+from ..utils.output import add_output_argument, print_records
+from ..utils.parquet import DEFAULT_ROW_GROUP_SIZE, ParquetWriter
+from ..utils.query_params import And, Field
+from ..utils.stats import (
+    DEFAULT_BUCKET,
+    DEFAULT_PERCENTILES,
+    add_stats_arguments,
+    print_stats,
+)
+from ..utils.table import ObjTable, column_fields
 
 
 async def cmd_devices_inspect(client, devices, **_kwargs):
@@ -39,23 +61,14 @@ async def cmd_devices_inspect(client, devices, **_kwargs):
         client (ocsw.api.client.APIClient): APIClient
         devices (list): list of device id or name
     """
-    futures = [client.inspect_device(uid) for uid in devices]
-    items = [resp.get("body") for resp in await asyncio.gather(*futures)]
+    items = await client.inspect_devices(devices)
     pprintj(items)
 
 
-async def cmd_device_ls(client, show_tags, limit, start, **_kwargs):
+async def cmd_device_ls(
+    client, show_tags, limit, start, output="table", **_kwargs
+):
     """List devices connectivity."""
-    fields = [
-        "id",
-        "displayName",
-        "name",
-        "lastEditDate",
-        "lastSeen",
-        "synced",
-        "report",
-    ]
-
     columns = [
         # dict(field='id', title='ID'),
         dict(field="name", title="NAME"),
@@ -87,27 +100,19 @@ async def cmd_device_ls(client, show_tags, limit, start, **_kwargs):
         ),
     ]
     if show_tags:
-        fields.append("tags")
         columns.append(dict(field="tags", title="TAGS"))
+    fields = column_fields(columns, extra=["id"])
 
-    resp = await client.devices(fields=fields, limit=limit, start=start)
-    data = resp.get("body")
-
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    devices = client.iter_items(
+        client.devices, fields=fields, limit=limit, start=start
+    )
+    await print_records(devices, columns, output)
 
 
-async def cmd_device_lc(client, show_tags, limit, start, **_kwargs):
+async def cmd_device_lc(
+    client, show_tags, limit, start, output="table", **_kwargs
+):
     """List devices configuration."""
-    fields = [
-        "id",
-        "displayName",
-        "name",
-        "synced",
-        "dirty",
-        "lastEditDate",
-        "localVersions",
-    ]
     columns = [
         # dict(field='id', title='ID'),
         dict(field="name", title="NAME"),
@@ -116,6 +121,8 @@ async def cmd_device_lc(client, show_tags, limit, start, **_kwargs):
             field="blueprint.displayName",
             title="BLUEPRINT NAME",
             render=render.map,
+            # joined by localVersions.blueprintId
+            fields=["localVersions"],
         ),
         dict(
             field="localVersions.blueprintVersion",
@@ -150,40 +157,32 @@ async def cmd_device_lc(client, show_tags, limit, start, **_kwargs):
     # "{{.localVersions.legato}}"
 
     if show_tags:
-        fields.append("tags")
         columns.append(dict(field="tags", title="TAGS"))
+    fields = column_fields(columns, extra=["id"])
 
-    # devices
-    devices_resp = await client.devices(
-        fields=fields, limit=limit, start=start
-    )
-    devices_data = devices_resp.get("body")
     # blueprints
     blueprints_resp = await client.blueprints(fields=["id", "displayName"])
-
-    # map devices and blueprints
     index_blueprints = dict(
         (blueprint.get("id"), blueprint)
         for blueprint in blueprints_resp.get("body")
     )
-    for device in devices_data:
-        blueprint_id = get(device, "localVersions.blueprintId")
-        device["blueprint"] = index_blueprints.get(blueprint_id)
 
-    table = ObjTable(data=devices_data, columns=columns)
-    print(table)
+    # map devices and blueprints
+    async def devices():
+        async for device in client.iter_items(
+            client.devices, fields=fields, limit=limit, start=start
+        ):
+            blueprint_id = get(device, "localVersions.blueprintId")
+            device["blueprint"] = index_blueprints.get(blueprint_id)
+            yield device
 
+    await print_records(devices(), columns, output)
 
-async def cmd_device_li(client, show_tags, limit, start, **_kwargs):
-    """List devices identity."""
-    fields = [
-        "id",
-        "displayName",
-        "name",
-        "creationDate",
-        "hardware",
-    ]
 
+async def cmd_device_li(
+    client, show_tags, limit, start, output="table", **_kwargs
+):
+    """List devices identity."""
     columns = [
         dict(field="name", title="NAME"),
         dict(field="displayName", title="DISPLAY NAME"),
@@ -196,6 +195,8 @@ async def cmd_device_li(client, show_tags, limit, start, **_kwargs):
             field="event.0.creationDate",
             title="LAST EVENT",
             render=render.timestamp_delta,
+            # joined by name
+            fields=[],
         ),
         dict(field="hardware.model", title="MODEL", render=render.map),
         dict(field="hardware.module", title="MODULE", render=render.map),
@@ -206,36 +207,26 @@ async def cmd_device_li(client, show_tags, limit, start, **_kwargs):
         dict(field="id", title="ID"),
     ]
     if show_tags:
-        fields.append("tags")
         columns.append(dict(field="tags", title="TAGS"))
+    fields = column_fields(columns)
 
-    resp = await client.devices(fields=fields, limit=limit, start=start)
-    data = resp.get("body")
-    futures = [
-        client.events(
-            f'/{client.current_company}/devices/{item["name"]}/:inbox',
-            limit=1,
-            order="desc",
-            fields=["id", "elems", "creationDate", "path"],
-        )
-        for item in data
-    ]
-    # futures = [
-    #     client.device_events(
-    #         f'{item["name"]}/:inbox',
-    #         limit=1,
-    #         order="desc",
-    #         fields=["id", "elems", "creationDate", "path"],
-    #     )
-    #     for item in data
-    # ]
-
-    resp = await asyncio.gather(*futures)
-    for idx, item in enumerate(data):
-        item["event"] = resp[idx].get("body")
-
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    async def devices():
+        async for page in client.iter_pages(
+            client.devices, fields=fields, limit=limit, start=start
+        ):
+            paths = [
+                f'/{client.current_company}/devices/{item["name"]}/:inbox'
+                for item in page
+            ]
+            latest = await client.latest_events(
+                paths, fields=["id", "elems", "creationDate", "path"]
+            )
+            for path, item in zip(paths, page):
+                event = latest.get(path)
+                item["event"] = [event] if event else []
+                yield item
+
+    await print_records(devices(), columns, output)
 
 
 async def cmd_device_actions(client, device_identifier, **_kwargs):
@@ -281,8 +272,168 @@ async def cmd_device_tags(client, device_identifier, tags, **_kwargs):
     pprintj(resp)
 
 
+# fields of the devices fetched by "device retag"
+RETAG_FIELDS = ["id", "name", "tags"]
+
+
+def tag_delta(tags, set_tags=None, remove_tags=(), replace=False):
+    """Compute the tags of the device after the change.
+
+    >>> tag_delta({"a": "1"}, {"b": "2"})
+    ({'a': '1', 'b': '2'}, {'add': {'b': '2'}, 'remove': [], 'change': {}})
+
+    Args:
+        tags (dict): current tags
+        set_tags (dict, optional): tags to add or change
+        remove_tags (list): keys of tags to remove
+        replace (bool): the new tags are exactly set_tags
+
+    Returns:
+        tuple: (new tags, delta), delta is None if nothing changes
+    """
+    tags = tags or {}
+    set_tags = set_tags or {}
+    if replace:
+        target = dict(set_tags)
+    else:
+        target = dict(tags)
+        target.update(set_tags)
+        for key in remove_tags:
+            target.pop(key, None)
+    delta = dict(
+        add=dict((k, v) for k, v in target.items() if k not in tags),
+        remove=[key for key in tags if key not in target],
+        change=dict(
+            (k, v) for k, v in target.items() if k in tags and tags[k] != v
+        ),
+    )
+    if not any(delta.values()):
+        return target, None
+    return target, delta
+
+
+def format_tag_delta(delta):
+    """Format delta as "+added=value -removed ~changed=value"."""
+    return " ".join(
+        [f"+{key}={val}" for key, val in delta["add"].items()]
+        + [f"-{key}" for key in delta["remove"]]
+        + [f"~{key}={val}" for key, val in delta["change"].items()]
+    )
+
+
+async def select_devices(client, filters=None, match_tags=None, filename=None):
+    """Fetch id, name and tags of the selected devices.
+
+    Devices are listed from the file or by the filter expression, match_tags
+    adds "tags.KEY==VALUE" conditions to the filter.
+    """
+    if filename:
+        identifiers = list(read_lines(filename))
+        devices = await client.inspect_devices(
+            identifiers, fields=RETAG_FIELDS
+        )
+        return [
+            device
+            for device in devices
+            if all(
+                (device.get("tags") or {}).get(key) == val
+                for key, val in (match_tags or {}).items()
+            )
+        ]
+    conditions = [filters] if filters else []
+    try:
+        conditions.extend(
+            Field(f"tags.{key}") == val
+            for key, val in (match_tags or {}).items()
+        )
+    except ValueError as ex:
+        raise errors.Error(str(ex))
+    if not conditions:
+        raise errors.Error(
+            "No devices selected, use --filter, --tag or --file"
+        )
+    devices = []
+    async for page in client.iter_pages(
+        client.devices, fields=RETAG_FIELDS, filters=And(*conditions)
+    ):
+        devices.extend(page)
+    return devices
+
+
+async def cmd_device_retag(
+    client,
+    filters=None,
+    match_tags=None,
+    filename=None,
+    set_tags=None,
+    remove_tags=None,
+    replace=False,
+    dry_run=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    rate=None,
+    **_kwargs,
+):
+    """Change tags of many devices.
+
+    Only devices whose tags differ from the target are updated, the update
+    request carries all tags of the device since it replaces them.
+    """
+    if not set_tags and not remove_tags and not replace:
+        raise errors.Error("No tag changes, use --set, --remove or --replace")
+    devices = await select_devices(client, filters, match_tags, filename)
+
+    changes = []
+    for device in devices:
+        target, delta = tag_delta(
+            device.get("tags"), set_tags, remove_tags or (), replace
+        )
+        if delta is not None:
+            changes.append((device, target, delta))
+    unchanged = len(devices) - len(changes)
+
+    if dry_run:
+        for device, _target, delta in changes:
+            print(f"{device.get('name')}: {format_tag_delta(delta)}")
+        print(f"{len(changes)} to update, {unchanged} unchanged")
+        return
+
+    async def update(change):
+        device, target, _delta = change
+        await client.update_device(device["id"], props=dict(tags=target))
+
+    progress = Progress()
+    failed = []
+
+    def on_result(change, _result, error):
+        progress.update(error is None)
+        if error is not None:
+            failed.append(change[0])
+            name = change[0].get("name")
+            print(f"{name}: {error_message(error)}", file=sys.stderr)
+
+    limiter = Limiter(concurrency, rate=rate)
+    try:
+        await run_bulk(changes, update, limiter, on_result)
+    finally:
+        progress.close()
+    print(
+        f"{len(changes) - len(failed)} updated, {len(failed)} failed, "
+        f"{unchanged} unchanged"
+    )
+    if failed:
+        raise errors.Error(
+            f"{len(failed)} devices were not updated, run again to retry them"
+        )
+
+
 async def cmd_device_recent_events(
-    client, device_identifier, limit, start, only_body, **_kwargs
+    client,
+    device_identifier,
+    limit,
+    start,
+    only_body,
+    output="table",
+    **_kwargs,
 ):
     """List devices recent events."""
     resp = await client.inspect_device(
@@ -291,42 +442,71 @@ async def cmd_device_recent_events(
     device_data = resp.get("body")
     device_path = device_data["path"]
 
-    resp = await client.device_events(
+    events = client.iter_items(
+        client.device_events,
         device_identifier,
         limit=limit,
         start=start,
         fields=["elems", "creationDate", "path"],
-        filters=f'path!="{device_path}/:inbox"',
+        filters=Field("path") != f"{device_path}/:inbox",
         sort="creationDate",
         order="desc",
     )
-    data = resp.get("body")
 
-    if only_body:
-        print(json.dumps(data, indent=2))
-    else:
-        columns = [
-            dict(
-                field="creationDate",
-                title="creationDate",
-                render=lambda a, b: format_date(
-                    a[b["field"]], "%b %d, %Y %X %Z%z"
-                ),
-            ),
-            dict(
-                field="path",
-                title="EVENT FROM",
-                render=lambda a, b: a["path"].split(f"{device_path}/")[-1],
+    columns = [
+        dict(
+            field="creationDate",
+            title="creationDate",
+            render=lambda a, b: format_date(
+                a[b["field"]], "%b %d, %Y %X %Z%z"
             ),
-            dict(field="elems", width=70),
-        ]
+        ),
+        dict(
+            field="path",
+            title="EVENT FROM",
+            render=lambda a, b: a["path"].split(f"{device_path}/")[-1],
+        ),
+        dict(field="elems", width=70),
+    ]
+    await print_records(events, columns, "json" if only_body else output)
+
 
-        table = ObjTable(data=data, columns=columns)
-        print(table)
+async def cmd_device_stats(
+    client,
+    device_identifier,
+    stream,
+    paths,
+    since=None,
+    until=None,
+    bucket=DEFAULT_BUCKET,
+    percentiles=None,
+    rates=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    partitions=DEFAULT_EXPORT_PARTITIONS,
+    output="table",
+    **_kwargs,
+):
+    """Print aggregates of elems of the events of a device stream."""
+    resp = await client.inspect_device(
+        device_identifier, fields=["id", "name", "path"]
+    )
+    device_path = resp.get("body")["path"]
+    stats = await client.event_stats(
+        f"{device_path}/{stream.lstrip('/')}",
+        paths,
+        since=since,
+        until=until,
+        bucket=bucket,
+        partitions=partitions,
+        limiter=Limiter(concurrency),
+    )
+    await print_stats(
+        stats, percentiles or DEFAULT_PERCENTILES, rates=rates, output=output
+    )
 
 
 async def cmd_device_recent_changes(
-    client, device_identifier, limit, start, **_kwargs
+    client, device_identifier, limit, start, output="table", **_kwargs
 ):
     """List devices recent changes events."""
     resp = await client.inspect_device(
@@ -335,7 +515,8 @@ async def cmd_device_recent_changes(
     device_data = resp.get("body")
     device_path = device_data["path"]
 
-    resp = await client.events(
+    events = client.iter_items(
+        client.events,
         f"{device_path}/:inbox",
         limit=limit,
         start=start,
@@ -344,7 +525,6 @@ async def cmd_device_recent_changes(
         order="desc",
     )
 
-    data = resp.get("body")
     columns = [
         dict(
             field="creationDate",
@@ -356,9 +536,48 @@ async def cmd_device_recent_changes(
         dict(field="elems", width=70),
         # dict(field='path')
     ]
+    await print_records(events, columns, output)
 
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+
+DEVICE_EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("name", "string"),
+    ("displayName", "string"),
+    ("creationDate", "int64"),
+    ("lastEditDate", "int64"),
+    ("lastSeen", "int64"),
+    ("synced", "bool"),
+    ("dirty", "bool"),
+    ("report.developerMode.enable.value", "bool"),
+    ("report.signal.bars.value", "float64"),
+    ("report.signal.rat.value", "string"),
+    ("report.battery.voltage.value", "float64"),
+    ("localVersions.blueprintId", "string"),
+    ("localVersions.blueprintVersion", "int64"),
+    ("localVersions.edge", "string"),
+    ("localVersions.firmware", "string"),
+    ("localVersions.legato", "string"),
+    ("hardware.model", "string"),
+    ("hardware.module", "string"),
+    ("hardware.fsn", "string"),
+    ("hardware.imei", "string"),
+    ("hardware.countryCode", "string"),
+    ("tags", "string"),
+]
+
+
+async def cmd_device_export(client, filename, row_group_size, **_kwargs):
+    """Export devices into Parquet file."""
+    fields = sorted(
+        set(path.split(".")[0] for path, _ in DEVICE_EXPORT_COLUMNS)
+    )
+    writer = ParquetWriter(filename, DEVICE_EXPORT_COLUMNS, row_group_size)
+    try:
+        async for device in client.iter_items(client.devices, fields=fields):
+            writer.write(device)
+    finally:
+        writer.close()
+    print(f"{writer.count} devices exported to {filename}")
 
 
 async def cmd_device_create(client, name, imei, fsn, **_kwargs):
@@ -366,11 +585,126 @@ async def cmd_device_create(client, name, imei, fsn, **_kwargs):
     pprintj(resp)
 
 
-async def cmd_device_rm(client, devices, **_kwargs):
-    for device_identifier in devices:
+# columns of the provisioning input
+PROVISION_FIELDS = ("name", "imei", "fsn")
+
+
+async def cmd_device_provision(
+    client,
+    filename,
+    input_format=None,
+    journal_filename=None,
+    concurrency=DEFAULT_CONCURRENCY,
+    **_kwargs,
+):
+    """Provision devices listed in CSV or NDJSON file.
+
+    Every row needs name, imei and fsn. Outcomes are appended to the
+    journal, devices provisioned by a previous run with the same journal
+    are skipped.
+    """
+    if journal_filename is None:
+        if filename == "-":
+            raise errors.Error("--journal is required to read from stdin")
+        journal_filename = filename + ".journal"
+    stats = dict(provisioned=0, failed=0, skipped=0)
+
+    async def provision(row):
+        missing = [key for key in PROVISION_FIELDS if not row.get(key)]
+        if missing:
+            raise errors.Error(f"missing {', '.join(missing)}")
+        resp = await client.create_device(row["name"], row["imei"], row["fsn"])
+        return resp.get("body") or {}
+
+    with Journal(journal_filename) as journal:
+
+        def rows():
+            for row in read_rows(filename, input_format):
+                if row.get("name") in journal.done:
+                    stats["skipped"] += 1
+                    continue
+                yield row
+
+        def on_result(row, body, error):
+            name = row.get("name")
+            if error is None:
+                journal.record(name, True, id=body.get("id"))
+                stats["provisioned"] += 1
+                return
+            message = error_message(error)
+            journal.record(name, False, error=message)
+            stats["failed"] += 1
+            print(f"{name}: {message}", file=sys.stderr)
+
+        await run_bulk(rows(), provision, Limiter(concurrency), on_result)
+
+    print(
+        "{provisioned} provisioned, {failed} failed, {skipped} skipped".format(
+            **stats
+        )
+    )
+    if stats["failed"]:
+        raise errors.Error(
+            f"{stats['failed']} devices were not provisioned, "
+            f"run again to retry them (journal {journal_filename})"
+        )
+
+
+# retry file of "device rm"
+DEFAULT_RM_FAILED = "device-rm.failed"
+
+
+async def cmd_device_rm(
+    client,
+    devices,
+    filename=None,
+    failed_filename=DEFAULT_RM_FAILED,
+    concurrency=DEFAULT_CONCURRENCY,
+    rate=None,
+    **_kwargs,
+):
+    """Remove devices given as arguments and listed in the file.
+
+    Identifiers of devices that were not removed are written into
+    failed_filename, which can be passed back as the file to retry.
+    """
+    if not devices and not filename:
+        raise errors.Error("No devices given, use DEVICE or --file")
+
+    def identifiers():
+        yield from devices
+        if filename:
+            yield from read_lines(filename)
+
+    async def remove(device_identifier):
         resp = await client.remove_device(device_identifier)
         messages = resp.get("messages") or []
-        print("\n".join(messages))
+        if messages:
+            print("\n".join(messages))
+
+    progress = Progress()
+    failed = []
+
+    def on_result(device_identifier, _result, error):
+        progress.update(error is None)
+        if error is not None:
+            failed.append(device_identifier)
+            print(
+                f"{device_identifier}: {error_message(error)}", file=sys.stderr
+            )
+
+    limiter = Limiter(concurrency, rate=rate)
+    try:
+        await run_bulk(identifiers(), remove, limiter, on_result)
+    finally:
+        progress.close()
+    if failed:
+        with open(failed_filename, "w") as fileptr:
+            fileptr.write("".join(f"{uid}\n" for uid in failed))
+        raise errors.Error(
+            f"{len(failed)} devices were not removed, retry with "
+            f"'device rm -f {failed_filename}'"
+        )
 
 
 def init_cli(subparsers):
@@ -399,6 +733,37 @@ def init_cli(subparsers):
         "-f", "--fsn", required=True, help="serial number of the device"
     )
 
+    # PROVISION
+    parser_provision = sub.add_parser(
+        "provision", help="create devices listed in CSV or NDJSON file"
+    )
+    parser_provision.set_defaults(func=cmd_device_provision)
+    parser_provision.add_argument(
+        "filename",
+        metavar="FILE",
+        help="rows with name, imei and fsn, - for stdin",
+    )
+    parser_provision.add_argument(
+        "--format",
+        dest="input_format",
+        choices=INPUT_FORMATS,
+        help="input format (default by file extension)",
+    )
+    parser_provision.add_argument(
+        "--journal",
+        dest="journal_filename",
+        metavar="FILE",
+        help="journal of provisioned rows (default FILE.journal)",
+    )
+    parser_provision.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+
     # INSPECT
     parser_inspect = sub.add_parser(
         "inspect", help="display detailed information on one or more devices"
@@ -434,6 +799,7 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_lc)
 
     # LI
     parser_li = sub.add_parser("li", help="list devices identity")
@@ -461,6 +827,7 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_li)
 
     # LS
     parser_ls = sub.add_parser("ls", help="list devices connectivity")
@@ -488,12 +855,55 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_ls)
+
+    # EXPORT
+    parser_export = sub.add_parser(
+        "export", help="export devices into Parquet file"
+    )
+    parser_export.set_defaults(func=cmd_device_export)
+    parser_export.add_argument("filename", metavar="FILE", help="output file")
+    parser_export.add_argument(
+        "--row-group-size",
+        dest="row_group_size",
+        type=int,
+        help='rows per Parquet row group (default "%(default)s")',
+        default=DEFAULT_ROW_GROUP_SIZE,
+    )
 
     # RM
     parser_rm = sub.add_parser("rm", help="remove one or more devices")
     parser_rm.set_defaults(func=cmd_device_rm)
     parser_rm.add_argument(
-        "devices", metavar="DEVICE", nargs="+", help="device id or name"
+        "devices", metavar="DEVICE", nargs="*", help="device id or name"
+    )
+    parser_rm.add_argument(
+        "-f",
+        "--file",
+        dest="filename",
+        metavar="FILE",
+        help="file with one device id or name per line, - for stdin",
+    )
+    parser_rm.add_argument(
+        "--failed",
+        dest="failed_filename",
+        metavar="FILE",
+        default=DEFAULT_RM_FAILED,
+        help="file for devices that were not removed "
+        "(default: %(default)s)",
+    )
+    parser_rm.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_rm.add_argument(
+        "--rate",
+        type=float,
+        help="maximum number of requests per second",
     )
 
     # TAGS
@@ -510,17 +920,82 @@ def init_cli(subparsers):
         help="add category=value params",
     )
 
+    # RETAG
+    parser_retag = sub.add_parser(
+        "retag", help="change tags of the selected devices"
+    )
+    parser_retag.set_defaults(func=cmd_device_retag)
+    parser_retag.add_argument(
+        "--filter",
+        dest="filters",
+        metavar="EXPR",
+        help="select devices by filter expression",
+    )
+    parser_retag.add_argument(
+        "--tag",
+        dest="match_tags",
+        metavar="TAG=VALUE",
+        action=KeyValueAction,
+        help="select devices with the tag value",
+    )
+    parser_retag.add_argument(
+        "-f",
+        "--file",
+        dest="filename",
+        metavar="FILE",
+        help="file with one device id or name per line, - for stdin",
+    )
+    parser_retag.add_argument(
+        "--set",
+        dest="set_tags",
+        metavar="TAG=VALUE",
+        action=KeyValueAction,
+        help="add or change the tag",
+    )
+    parser_retag.add_argument(
+        "--remove",
+        dest="remove_tags",
+        metavar="TAG",
+        action="append",
+        help="remove the tag",
+    )
+    parser_retag.add_argument(
+        "--replace",
+        action="store_true",
+        help="replace all tags with the --set ones",
+    )
+    parser_retag.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="only show the tag changes",
+    )
+    parser_retag.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_retag.add_argument(
+        "--rate",
+        type=float,
+        help="maximum number of requests per second",
+    )
+
     # Recent events
     parser_events = sub.add_parser("events", help="display recent events")
     parser_events.set_defaults(func=cmd_device_recent_events)
     parser_events.add_argument(
         "device_identifier", metavar="DEVICE", help="device id or name"
     )
-    parser_events.add_argument(
+    parser_events_format = parser_events.add_mutually_exclusive_group()
+    parser_events_format.add_argument(
         "-b",
         "--body",
         dest="only_body",
-        help="output only body",
+        help="output only body, same as -o json",
         action="store_true",
     )
     parser_events.add_argument(
@@ -539,6 +1014,7 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_events_format)
 
     # Recent changes events
     parser_changes = sub.add_parser("changes", help="display recent changes")
@@ -562,3 +1038,48 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_changes)
+
+    # Stats of stream events
+    parser_stats = sub.add_parser(
+        "stats", help="aggregate values of device stream events"
+    )
+    parser_stats.set_defaults(func=cmd_device_stats)
+    parser_stats.add_argument(
+        "device_identifier", metavar="DEVICE", help="device id or name"
+    )
+    parser_stats.add_argument(
+        "stream",
+        metavar="STREAM",
+        help="stream path relative to the device, e.g. :default",
+    )
+    add_stats_arguments(parser_stats)
+    parser_stats.add_argument(
+        "--since",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="first creation date, milliseconds or UTC YYYY-MM-DD[THH:MM[:SS]]"
+        " (default: the first event)",
+    )
+    parser_stats.add_argument(
+        "--until",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="creation date after the last event (default: now)",
+    )
+    parser_stats.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_stats.add_argument(
+        "--partitions",
+        type=int,
+        default=DEFAULT_EXPORT_PARTITIONS,
+        help="number of time sub-ranges fetched concurrently "
+        "(default: %(default)s)",
+    )
+    add_output_argument(parser_stats)
@@ -28,7 +28,7 @@ from ..utils.color_diff import color_diff
 from ..utils.format_date import ISO_8601, format_date
 from ..utils.format_pretty_json import pprintj
 from ..utils.helpers import get
-from ..utils.table import ObjTable
+from ..utils.output import add_output_argument, print_records
 
 
 async def cmd_edge_actions_inspect(
@@ -49,7 +49,7 @@ async def cmd_edge_actions_inspect(
     pprintj(items)
 
 
-async def cmd_edge_actions_ls(client, limit, start, **_kwargs):
+async def cmd_edge_actions_ls(client, limit, start, output="table", **_kwargs):
     fields = [
         "id",
         "description",
@@ -59,15 +59,14 @@ async def cmd_edge_actions_ls(client, limit, start, **_kwargs):
         "version",
         # "companyId",
     ]
-    resp = await client.edge_actions(
+    list_data = client.iter_items(
+        client.edge_actions,
         fields=fields,
         sort="description",
         limit=limit,
         start=start,
     )
 
-    list_data = resp.get("body")
-
     columns = [
         dict(field="id", title="ID"),
         dict(field="description", title="NAME", render=render.map),
@@ -86,8 +85,7 @@ async def cmd_edge_actions_ls(client, limit, start, **_kwargs):
         # dict(field="companyId")
     ]
 
-    table = ObjTable(data=list_data, columns=columns)
-    print(table)
+    await print_records(list_data, columns, output)
 
 
 async def cmd_edge_actions_diff(
@@ -166,6 +164,7 @@ def init_cli(subparsers):
         help="start index of the search",
         default=0,
     )
+    add_output_argument(parser_ls)
 
     # DIFF
     parser_diff = sub.add_parser(
@@ -22,7 +22,8 @@
 
 from ..utils import render
 from ..utils.format_date import format_date
-from ..utils.table import ObjTable, PropTable
+from ..utils.output import add_output_argument, print_records
+from ..utils.table import PropTable, column_fields
 from ..utils.tmd import render_md
 
 
@@ -54,7 +55,7 @@ async def cmd_firmware_note(client, firmwares, **_kwargs):
     print("\n".join(output))
 
 
-async def cmd_firmware_ls(client, **_kwargs):
+async def cmd_firmware_ls(client, output="table", **_kwargs):
 
     columns = [
         dict(field="id", title="ID"),
@@ -72,11 +73,10 @@ async def cmd_firmware_ls(client, **_kwargs):
         dict(field="name", title="NAME"),
     ]
 
-    resp = await client.firmwares()
-    data = resp.get("body")
-
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    firmwares = client.iter_items(
+        client.firmwares, fields=column_fields(columns)
+    )
+    await print_records(firmwares, columns, output)
 
 
 def init_cli(subparsers):
@@ -88,6 +88,7 @@ def init_cli(subparsers):
     # LS
     parser_ls = sub.add_parser("ls", help="list of available firmware")
     parser_ls.set_defaults(func=cmd_firmware_ls)
+    add_output_argument(parser_ls)
 
     # INSPECT
     parser_inspect = sub.add_parser(
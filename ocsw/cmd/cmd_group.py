@@ -24,7 +24,8 @@ import asyncio
 
 from ..utils import render
 from ..utils.format_pretty_json import pprintj
-from ..utils.table import ObjTable
+from ..utils.output import add_output_argument, print_records
+from ..utils.table import column_fields
 
 
 async def cmd_group_inspect(client, groups, **_kwargs):
@@ -33,11 +34,7 @@ async def cmd_group_inspect(client, groups, **_kwargs):
     pprintj(items)
 
 
-async def cmd_group_ls(client, **_kwargs):
-    fields = []
-    resp = await client.groups(fields=fields, refs=1)
-    data = resp.get("body")
-
+async def cmd_group_ls(client, output="table", **_kwargs):
     columns = [
         dict(field="id", title="ID"),
         dict(field="displayName", title="NAME"),
@@ -58,9 +55,8 @@ async def cmd_group_ls(client, **_kwargs):
             render=lambda d, c: len(d.get(c["field"])),
         ),
     ]
-
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    groups = client.iter_items(client.groups, fields=column_fields(columns))
+    await print_records(groups, columns, output)
 
 
 def init_cli(subparsers):
@@ -72,6 +68,7 @@ def init_cli(subparsers):
     # LS
     parser_ls = sub.add_parser("ls", help="display user group list")
     parser_ls.set_defaults(func=cmd_group_ls)
+    add_output_argument(parser_ls)
 
     # INSPECT
     parser_inspect = sub.add_parser(
@@ -21,10 +21,34 @@
 """Manage streams and events."""
 
 import asyncio
+import json
+import sys
 
+from .. import errors
+from ..api.event import (
+    DEFAULT_EXPORT_PARTITIONS,
+    DEFAULT_TAIL_LAST,
+    DEFAULT_TAIL_SKEW,
+)
+from ..constants import DEFAULT_CONCURRENCY
 from ..utils import render
+from ..utils.bulk import read_lines
+from ..utils.date_fns import parse_timestamp, time_ms
 from ..utils.format_pretty_json import pprintj
-from ..utils.table import ObjTable
+from ..utils.limiter import Limiter
+from ..utils.output import add_output_argument, print_records
+from ..utils.parquet import DEFAULT_ROW_GROUP_SIZE, ParquetWriter, column
+from ..utils.poll import (
+    DEFAULT_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    AdaptiveInterval,
+)
+from ..utils.stats import (
+    DEFAULT_BUCKET,
+    DEFAULT_PERCENTILES,
+    add_stats_arguments,
+    print_stats,
+)
 
 
 async def cmd_stream_inspect(client, streams, **_kwargs):
@@ -33,7 +57,7 @@ async def cmd_stream_inspect(client, streams, **_kwargs):
     pprintj(items)
 
 
-async def cmd_stream_ls(client, **_kwargs):
+async def cmd_stream_ls(client, output="table", **_kwargs):
 
     fields = [
         "id",
@@ -47,8 +71,7 @@ async def cmd_stream_ls(client, **_kwargs):
         "path",
     ]
 
-    resp = await client.streams(fields=fields, limit=20, start=40)
-    data = resp.get("body")
+    streams = client.iter_items(client.streams, fields=fields)
 
     columns = [
         dict(field="id", title="ID"),
@@ -62,11 +85,12 @@ async def cmd_stream_ls(client, **_kwargs):
         dict(field="path", title="PATH"),
     ]
 
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    await print_records(streams, columns, output)
 
 
-async def cmd_stream_events_list(client, stream, **_kwargs):
+async def cmd_stream_events_list(
+    client, stream, limit=20, start=0, output="table", **_kwargs
+):
 
     fields = [
         # 'id',
@@ -84,8 +108,15 @@ async def cmd_stream_events_list(client, stream, **_kwargs):
         "elems",
     ]
 
-    resp = await client.events(stream, fields=fields)
-    data = resp.get("body")
+    events = client.iter_items(
+        client.events,
+        stream,
+        limit=limit,
+        start=start,
+        fields=fields,
+        sort="creationDate",
+        order="desc",
+    )
 
     columns = [
         # dict(field='id', title='ID'),
@@ -105,11 +136,146 @@ async def cmd_stream_events_list(client, stream, **_kwargs):
         dict(field="elems", title="elems", width=65),
     ]
 
-    table = ObjTable(
-        data=data,
-        columns=columns,
+    await print_records(events, columns, output)
+
+
+EVENT_EXPORT_COLUMNS = [
+    ("id", "string"),
+    ("streamId", "string"),
+    ("path", "string"),
+    ("creationDate", "int64"),
+    ("generatedDate", "int64"),
+    ("lastEditDate", "int64"),
+    ("tags", "string"),
+    ("elems", "string"),
+]
+
+
+async def cmd_stream_events_export(
+    client,
+    stream,
+    filename,
+    columns,
+    row_group_size,
+    since=None,
+    until=None,
+    concurrency=DEFAULT_CONCURRENCY,
+    partitions=DEFAULT_EXPORT_PARTITIONS,
+    **_kwargs,
+):
+    """Export stream events created in [since, until) into Parquet file.
+
+    By default the range starts at the first event of the stream and ends
+    now, its partitions are fetched concurrently and written in order.
+    """
+    columns = EVENT_EXPORT_COLUMNS + (columns or [])
+    fields = sorted(set(path.split(".")[0] for path, _ in columns))
+    if until is None:
+        until = time_ms()
+    if since is None:
+        since = await client.first_event_date(stream)
+        if since is None:
+            since = until
+    writer = ParquetWriter(filename, columns, row_group_size)
+    try:
+        if since < until:
+            async for page in client.export_events(
+                stream,
+                since,
+                until,
+                fields=fields,
+                partitions=partitions,
+                limiter=Limiter(concurrency),
+            ):
+                for event in page:
+                    writer.write(event)
+    finally:
+        writer.close()
+    print(f"{writer.count} events exported to {filename}")
+
+
+async def cmd_stream_stats(
+    client,
+    stream,
+    paths,
+    since=None,
+    until=None,
+    bucket=DEFAULT_BUCKET,
+    percentiles=None,
+    rates=False,
+    concurrency=DEFAULT_CONCURRENCY,
+    partitions=DEFAULT_EXPORT_PARTITIONS,
+    output="table",
+    **_kwargs,
+):
+    """Print aggregates of elems of the events created in [since, until).
+
+    By default the range starts at the first event of the stream and ends
+    now. Events are aggregated as they are fetched, not kept in memory.
+    """
+    stats = await client.event_stats(
+        stream,
+        paths,
+        since=since,
+        until=until,
+        bucket=bucket,
+        partitions=partitions,
+        limiter=Limiter(concurrency),
     )
-    print(table)
+    await print_stats(
+        stats, percentiles or DEFAULT_PERCENTILES, rates=rates, output=output
+    )
+
+
+async def cmd_stream_tail(
+    client,
+    streams,
+    filename=None,
+    last=DEFAULT_TAIL_LAST,
+    since=None,
+    min_interval=DEFAULT_MIN_INTERVAL,
+    max_interval=DEFAULT_MAX_INTERVAL,
+    concurrency=DEFAULT_CONCURRENCY,
+    rate=None,
+    skew=DEFAULT_TAIL_SKEW,
+    **_kwargs,
+):
+    """Print events of the streams as NDJSON as soon as they are created.
+
+    Events of many streams are merged in order of creationDate.
+    """
+    streams = list(streams)
+    if filename:
+        streams.extend(read_lines(filename))
+    if not streams:
+        raise errors.Error("No streams given, use STREAM or --file")
+    try:
+        interval = AdaptiveInterval(min_interval, max_interval)
+        limiter = Limiter(concurrency, rate=rate)
+    except ValueError as ex:
+        raise errors.Error(str(ex))
+
+    if len(streams) == 1:
+        events = client.follow_events(
+            streams[0],
+            last=last,
+            since=since,
+            interval=interval,
+            limiter=limiter,
+        )
+    else:
+        events = client.follow_streams(
+            streams,
+            last=last,
+            since=since,
+            limiter=limiter,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            skew=skew,
+        )
+    async for event in events:
+        sys.stdout.write(json.dumps(event, separators=(",", ":")) + "\n")
+        sys.stdout.flush()
 
 
 def init_cli(subparsers):
@@ -121,6 +287,7 @@ def init_cli(subparsers):
     # LS
     parser_ls = sub.add_parser("ls", help="display streams list")
     parser_ls.set_defaults(func=cmd_stream_ls)
+    add_output_argument(parser_ls)
 
     # INSPECT
     parser_inspect = sub.add_parser(
@@ -137,3 +304,180 @@ def init_cli(subparsers):
     parser_events.add_argument(
         "stream", metavar="STREAM", help="stream id or path"
     )
+    parser_events.add_argument(
+        "-l",
+        "--limit",
+        dest="limit",
+        type=int,
+        help="maximum response size",
+        default=20,
+    )
+    parser_events.add_argument(
+        "-s",
+        "--start",
+        dest="start",
+        type=int,
+        help="start index of the search",
+        default=0,
+    )
+    add_output_argument(parser_events)
+
+    # TAIL
+    parser_tail = sub.add_parser(
+        "tail", help="follow stream events as they are created"
+    )
+    parser_tail.set_defaults(func=cmd_stream_tail)
+    parser_tail.add_argument(
+        "streams", metavar="STREAM", nargs="*", help="stream id or path"
+    )
+    parser_tail.add_argument(
+        "-f",
+        "--file",
+        dest="filename",
+        metavar="FILE",
+        help="file with one stream id or path per line, - for stdin",
+    )
+    parser_tail.add_argument(
+        "-n",
+        "--last",
+        type=int,
+        default=DEFAULT_TAIL_LAST,
+        help="number of the latest events to show first "
+        "(default: %(default)s)",
+    )
+    parser_tail.add_argument(
+        "--since",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="first creation date, milliseconds or UTC YYYY-MM-DD[THH:MM[:SS]]"
+        " (default: the latest events)",
+    )
+    parser_tail.add_argument(
+        "--min-interval",
+        dest="min_interval",
+        type=float,
+        default=DEFAULT_MIN_INTERVAL,
+        help="minimum seconds between polls (default: %(default)s)",
+    )
+    parser_tail.add_argument(
+        "--max-interval",
+        dest="max_interval",
+        type=float,
+        default=DEFAULT_MAX_INTERVAL,
+        help="maximum seconds between polls of an idle stream "
+        "(default: %(default)s)",
+    )
+    parser_tail.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_tail.add_argument(
+        "--rate",
+        type=float,
+        help="maximum number of requests per second",
+    )
+    parser_tail.add_argument(
+        "--skew",
+        type=int,
+        default=DEFAULT_TAIL_SKEW,
+        help="milliseconds events of many streams are held to merge them "
+        "in order (default: %(default)s)",
+    )
+
+    # EXPORT
+    parser_export = sub.add_parser(
+        "export", help="export stream events into Parquet file"
+    )
+    parser_export.set_defaults(func=cmd_stream_events_export)
+    parser_export.add_argument(
+        "stream", metavar="STREAM", help="stream id or path"
+    )
+    parser_export.add_argument("filename", metavar="FILE", help="output file")
+    parser_export.add_argument(
+        "-c",
+        "--column",
+        dest="columns",
+        metavar="PATH[:TYPE]",
+        type=column,
+        action="append",
+        help="extra column flattened from the event, e.g. "
+        "elems.temperature:float64 (types: string, float64, int64, bool)",
+    )
+    parser_export.add_argument(
+        "--row-group-size",
+        dest="row_group_size",
+        type=int,
+        help='rows per Parquet row group (default "%(default)s")',
+        default=DEFAULT_ROW_GROUP_SIZE,
+    )
+    parser_export.add_argument(
+        "--since",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="first creation date, milliseconds or UTC YYYY-MM-DD[THH:MM[:SS]]"
+        " (default: the first event)",
+    )
+    parser_export.add_argument(
+        "--until",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="creation date after the last exported event (default: now)",
+    )
+    parser_export.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_export.add_argument(
+        "--partitions",
+        type=int,
+        default=DEFAULT_EXPORT_PARTITIONS,
+        help="number of time sub-ranges fetched concurrently "
+        "(default: %(default)s)",
+    )
+
+    # STATS
+    parser_stats = sub.add_parser(
+        "stats", help="aggregate values of stream events"
+    )
+    parser_stats.set_defaults(func=cmd_stream_stats)
+    parser_stats.add_argument(
+        "stream", metavar="STREAM", help="stream id or path"
+    )
+    add_stats_arguments(parser_stats)
+    parser_stats.add_argument(
+        "--since",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="first creation date, milliseconds or UTC YYYY-MM-DD[THH:MM[:SS]]"
+        " (default: the first event)",
+    )
+    parser_stats.add_argument(
+        "--until",
+        type=parse_timestamp,
+        metavar="TIME",
+        help="creation date after the last event (default: now)",
+    )
+    parser_stats.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        dest="concurrency",
+        default=DEFAULT_CONCURRENCY,
+        help="maximum number of concurrent requests (default: %(default)s)",
+    )
+    parser_stats.add_argument(
+        "--partitions",
+        type=int,
+        default=DEFAULT_EXPORT_PARTITIONS,
+        help="number of time sub-ranges fetched concurrently "
+        "(default: %(default)s)",
+    )
+    add_output_argument(parser_stats)
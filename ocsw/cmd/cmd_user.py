@@ -24,8 +24,9 @@ import asyncio
 
 from ..utils import render
 from ..utils.format_pretty_json import pprintj
+from ..utils.output import add_output_argument, print_records
 from ..utils.secrets import mask_secrets
-from ..utils.table import ObjTable
+from ..utils.table import column_fields
 
 
 async def cmd_users_inspect(client, users, show_secrets=False, **_kwargs):
@@ -36,7 +37,7 @@ async def cmd_users_inspect(client, users, show_secrets=False, **_kwargs):
     pprintj(items)
 
 
-async def cmd_user_ls(client, **_kwargs):
+async def cmd_user_ls(client, output="table", **_kwargs):
     columns = [
         dict(field="id", title="ID"),
         dict(field="name", title="USER NAME"),
@@ -49,10 +50,8 @@ async def cmd_user_ls(client, **_kwargs):
             render=render.timestamp_delta,
         ),
     ]
-    resp = await client.identities()
-    data = resp.get("body")
-    table = ObjTable(data=data, columns=columns)
-    print(table)
+    users = client.iter_items(client.identities, fields=column_fields(columns))
+    await print_records(users, columns, output)
 
 
 def init_cli(subparsers):
@@ -64,6 +63,7 @@ def init_cli(subparsers):
     # LS
     parser_ls = sub.add_parser("ls", help="display user list")
     parser_ls.set_defaults(func=cmd_user_ls)
+    add_output_argument(parser_ls)
 
     # INSPECT
     parser_inspect = sub.add_parser(
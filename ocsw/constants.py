@@ -1,7 +1,11 @@
 from .version import VERSION
 
 DEFAULT_CONFIG = ".octave/config.json"
+DEFAULT_STORE = ".octave/store.sqlite3"
 DEFAULT_TIMEOUT_SECONDS = 60
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RECONCILE_INTERVAL = 24 * 60 * 60 * 1000  # milliseconds
 DEFAULT_USER_AGENT = f"octave-sdk-python/{VERSION}"
 OCTAVE_API_DEFAULT = "https://octave-api.sierrawireless.io/v5.0"
 MASKED_ATTRIBUTE_VALUE = "********"
@@ -1,9 +1,12 @@
 import asyncio
+import os
 
 import aiohttp
 
 from .api.client import APIClient
+from .api.offline import OfflineClient
 from .utils.config import Config
+from .utils.store import Store
 
 
 def run(func, **kwargs):
@@ -22,6 +25,11 @@ async def start_cmd(func, **kwargs):
     config = Config(
         config_path=config_path, config_filename=config_filename
     ).as_dict()
+    if kwargs.get("offline"):
+        filename = os.path.join(config_path, kwargs["store_filename"])
+        with Store(filename) as store:
+            client = OfflineClient(store=store, **config)
+            return await func(client=client, **kwargs)
     async with aiohttp.ClientSession() as session:
         client = APIClient(session=session, **config)
         return await func(client=client, **kwargs)
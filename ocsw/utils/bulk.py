@@ -0,0 +1,228 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Bulk operations over streams of records.
+
+Rows are read lazily from CSV or NDJSON files, processed by a fixed number of
+workers and the outcome of every row is appended to a journal, so an
+interrupted run can be resumed without repeating finished rows.
+"""
+
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+from .. import errors
+
+__all__ = (
+    "INPUT_FORMATS",
+    "Journal",
+    "Progress",
+    "error_message",
+    "read_lines",
+    "read_rows",
+    "run_bulk",
+)
+
+INPUT_FORMATS = ("csv", "ndjson")
+
+# failures of an item reported to on_result instead of stopping the run
+ITEM_ERRORS = (errors.Error, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+def error_message(ex):
+    """Return message of ocsw.errors.Error or any other exception."""
+    if isinstance(ex, errors.APIError) and ex.response is not None:
+        return str(ex)
+    if isinstance(ex, errors.Error):
+        return ex.message
+    return str(ex) or type(ex).__name__
+
+
+def input_format(filename, fmt=None):
+    """Return format of the input file, by default from its extension.
+
+    >>> input_format("devices.jsonl")
+    'ndjson'
+    """
+    if fmt:
+        return fmt
+    ext = os.path.splitext(filename)[1].lower()
+    return "ndjson" if ext in (".ndjson", ".jsonl", ".json") else "csv"
+
+
+def read_rows(filename, fmt=None):
+    """Iterate over rows of CSV (with header) or NDJSON file.
+
+    Args:
+        filename (str): input file, "-" for stdin
+        fmt (str, optional): "csv" or "ndjson", default by file extension
+
+    Yields:
+        dict: row
+    """
+    fmt = input_format(filename, fmt)
+    fileptr = sys.stdin
+    if filename != "-":
+        fileptr = open(filename, "r", newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(fileptr)
+            return
+        for lineno, line in enumerate(fileptr, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                msg = f"{filename}:{lineno}: invalid JSON line"
+                raise errors.Error(msg)
+    finally:
+        if fileptr is not sys.stdin:
+            fileptr.close()
+
+
+def read_lines(filename):
+    """Iterate over stripped non-empty lines, "#" starts a comment.
+
+    Args:
+        filename (str): input file, "-" for stdin
+    """
+    fileptr = sys.stdin if filename == "-" else open(filename, "r")
+    try:
+        for line in fileptr:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line
+    finally:
+        if fileptr is not sys.stdin:
+            fileptr.close()
+
+
+class Progress:
+    """Number of processed items and throughput.
+
+    The status line is redrawn no more often than every interval seconds,
+    only if the stream is a terminal.
+    """
+
+    def __init__(self, stream=None, interval=0.5):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.isatty = self.stream.isatty()
+        self.done = self.failed = 0
+        self.started = self._drawn = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return (self.done + self.failed) / elapsed if elapsed else 0.0
+
+    def status(self):
+        return f"{self.done} done, {self.failed} failed, {self.rate:.1f}/s"
+
+    def update(self, ok=True):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if self.isatty and now - self._drawn >= self.interval:
+            self._drawn = now
+            self.stream.write(f"\r{self.status()}")
+            self.stream.flush()
+
+    def close(self):
+        self.stream.write(("\r" if self.isatty else "") + self.status() + "\n")
+        self.stream.flush()
+
+
+class Journal:
+    """Append-only NDJSON log of processed rows.
+
+    Every line is {"key": ..., "ok": bool, ...}. Rows whose last record is
+    successful are done, failed rows are processed again on resume.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.done = set()
+        if os.path.isfile(filename):
+            with open(filename, "r", encoding="utf-8") as fileptr:
+                for line in fileptr:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:  # line cut by an interrupted run
+                        continue
+                    if record.get("ok"):
+                        self.done.add(record["key"])
+                    else:
+                        self.done.discard(record["key"])
+        self.fileptr = open(filename, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def record(self, key, ok, **kwargs):
+        line = json.dumps(dict(key=key, ok=ok, **kwargs))
+        self.fileptr.write(line + "\n")
+        self.fileptr.flush()
+        if ok:
+            self.done.add(key)
+
+    def close(self):
+        self.fileptr.close()
+
+
+async def run_bulk(items, func, limiter, on_result):
+    """Call func for every item, no more than limiter.concurrency at once.
+
+    Items are taken from the iterable only when a worker is free, so the
+    input is not read into memory.
+
+    Args:
+        items (iterable): items to process
+        func (callable): coroutine function of an item
+        limiter (ocsw.utils.limiter.Limiter): concurrency and rate
+        on_result (callable): called with (item, result, error), error is
+                              None or the raised ocsw.errors.Error,
+                              aiohttp.ClientError or asyncio.TimeoutError
+    """
+    iterator = iter(items)
+
+    async def worker():
+        for item in iterator:
+            try:
+                result = await limiter.run(func(item))
+            except ITEM_ERRORS as ex:
+                on_result(item, None, ex)
+            else:
+                on_result(item, result, None)
+
+    await asyncio.gather(*[worker() for _ in range(limiter.concurrency)])
@@ -20,7 +20,9 @@
 
 """Human readable approximate time converters."""
 
+import calendar
 import time
+from datetime import datetime
 
 
 def time_ms():
@@ -28,6 +30,60 @@ def time_ms():
     return int(round(time.time() * 1000))
 
 
+TIMESTAMP_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%dT%H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+
+def parse_timestamp(value):
+    """Convert milliseconds or UTC date and time into milliseconds unixtime.
+
+    >>> parse_timestamp("1600000000000")
+    1600000000000
+    >>> parse_timestamp("2020-09-13T12:26:40")
+    1600000000000
+
+    Raises:
+        ValueError: if the value is not a timestamp
+    """
+    if value.isdigit():
+        return int(value)
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            moment = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return calendar.timegm(moment.timetuple()) * 1000
+    raise ValueError(f"Invalid timestamp {value!r}")
+
+
+DURATION_UNITS = dict(ms=1, s=1000, m=60000, h=3600000, d=86400000)
+
+
+def parse_duration(value):
+    """Convert milliseconds or a number with a unit into milliseconds.
+
+    Units are ms, s, m, h and d.
+
+    >>> parse_duration("1500")
+    1500
+    >>> parse_duration("15m")
+    900000
+
+    Raises:
+        ValueError: if the value is not a positive duration
+    """
+    number = value.rstrip("dhms")
+    unit = value.lstrip("0123456789") or "ms"
+    if not number.isdigit() or unit not in DURATION_UNITS or not int(number):
+        raise ValueError(f"Invalid duration {value!r}")
+    return int(number) * DURATION_UNITS[unit]
+
+
 TIME_PERIODS = (
     # period, units, piece
     (0, "", 0),
@@ -0,0 +1,427 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Incremental writer of an export directory.
+
+The manifest in the root of the directory keeps id, version and content hash
+of every exported object. Objects with the same id and version are not
+rendered again, files with the same content are not rewritten, and objects
+missing from the new export are removed.
+
+Rendering and writing of the files can be moved to a thread pool by
+:py:class:`BackgroundWriter`, so the event loop keeps reading responses
+while the files are serialized and written.
+
+Selected files can be stored once in a :py:class:`BlobStore` by their
+content hash, the object directory then keeps a "<name>.ref" file with the
+relative path of the blob.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+__all__ = (
+    "BackgroundWriter",
+    "BlobStore",
+    "ExportTree",
+    "content_hash",
+    "object_hash",
+    "read_file",
+    "read_manifest",
+    "write_atomic",
+    "write_file",
+    "write_manifest",
+)
+
+MANIFEST_FILENAME = ".manifest.json"
+BLOB_DIRNAME = ".objects"
+REF_SUFFIX = ".ref"
+DEFAULT_WRITE_WORKERS = 4
+DEFAULT_WRITE_QUEUE = 64
+
+
+def content_hash(data):
+    """Return sha256 hex digest of bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write(fileptr, data, fsync):
+    fileptr.write(data)
+    if fsync:
+        fileptr.flush()
+        os.fsync(fileptr.fileno())
+
+
+def _fsync_dir(dirname):
+    if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover
+        return
+    fd = os.open(dirname, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_file(filename, data, fsync=False):
+    """Write bytes into filename."""
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, "wb") as fileptr:
+        _write(fileptr, data, fsync)
+
+
+def object_hash(files):
+    """Return hash of the object from the hashes of its files."""
+    return content_hash("".join(sorted(files.values())).encode())
+
+
+def write_atomic(filename, data, fsync=False):
+    """Write bytes into a temporary file and rename it to filename.
+
+    If fsync is set the data and the rename are flushed to disk.
+    """
+    dirname = os.path.dirname(filename)
+    os.makedirs(dirname, exist_ok=True)
+    fd, tmp_filename = tempfile.mkstemp(
+        dir=dirname, prefix=f".{os.path.basename(filename)}."
+    )
+    try:
+        with os.fdopen(fd, "wb") as fileptr:
+            _write(fileptr, data, fsync)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+    if fsync:
+        _fsync_dir(dirname)
+
+
+def read_manifest(root):
+    """Return objects of the manifest in root, {} if there is no manifest."""
+    filename = os.path.join(root, MANIFEST_FILENAME)
+    try:
+        with open(filename, "r") as fileptr:
+            return json.load(fileptr).get("objects", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(root, objects, fsync=False):
+    manifest = dict(objects=objects)
+    write_atomic(
+        os.path.join(root, MANIFEST_FILENAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+        fsync=fsync,
+    )
+
+
+def read_file(filename):
+    """Read bytes of the file or of the blob referenced by "<filename>.ref".
+
+    Raises:
+        FileNotFoundError: neither the file nor the reference exists
+    """
+    ref_filename = filename + REF_SUFFIX
+    if not os.path.isfile(filename) and os.path.isfile(ref_filename):
+        with open(ref_filename, "r") as fileptr:
+            blob = fileptr.read().strip()
+        filename = os.path.join(os.path.dirname(filename), blob)
+    with open(filename, "rb") as fileptr:
+        return fileptr.read()
+
+
+class BlobStore:
+    """Content addressed storage of files.
+
+    Blobs are named by sha256 of the content and never modified, so
+    the same content is written once.
+
+    root - directory of the blobs
+    fsync - flush written blobs to disk
+    """
+
+    def __init__(self, root, fsync=False):
+        self.root = root
+        self.fsync = fsync
+        self.stats = dict(written=0, reused=0)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, data, digest=None):
+        """Store bytes, return the content hash."""
+        digest = digest or content_hash(data)
+        filename = self.path(digest)
+        if os.path.isfile(filename):
+            self.stats["reused"] += 1
+        else:
+            write_atomic(filename, data, fsync=self.fsync)
+            self.stats["written"] += 1
+        return digest
+
+    def get(self, digest):
+        """Return bytes of the blob, None if it is not stored."""
+        try:
+            with open(self.path(digest), "rb") as fileptr:
+                return fileptr.read()
+        except (OSError, TypeError):
+            return None
+
+    def ref(self, digest, dirname):
+        """Return the path of the blob relative to the dirname."""
+        return os.path.relpath(self.path(digest), dirname)
+
+    def prune(self, export_root):
+        """Remove blobs of files not listed in manifests under export_root.
+
+        Returns:
+            int: number of removed blobs
+        """
+        used = set()
+        for dirname, dirnames, filenames in os.walk(export_root):
+            dirnames[:] = [name for name in dirnames if name != BLOB_DIRNAME]
+            if MANIFEST_FILENAME not in filenames:
+                continue
+            filename = os.path.join(dirname, MANIFEST_FILENAME)
+            with open(filename, "r") as fileptr:
+                objects = json.load(fileptr).get("objects", {})
+            for entry in objects.values():
+                used.update(entry.get("files", {}).values())
+        removed = 0
+        for dirname, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                digest = os.path.basename(dirname) + name
+                if digest not in used:
+                    os.unlink(os.path.join(dirname, name))
+                    removed += 1
+        return removed
+
+
+class BackgroundWriter:
+    """Thread pool for blocking rendering and file I/O.
+
+    No more than queue_size calls are pending, further callers wait for a
+    free slot, so a fast producer can not queue the whole export in memory.
+
+    workers - number of threads
+    queue_size - maximum number of pending calls
+    """
+
+    def __init__(
+        self, workers=DEFAULT_WRITE_WORKERS, queue_size=DEFAULT_WRITE_QUEUE
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = asyncio.Semaphore(queue_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    async def run(self, func, *args, **kwargs):
+        """Call func in a worker thread, return its result."""
+        async with self._slots:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class ExportTree:
+    """Export directory with manifest.
+
+    root - directory of the export
+    incremental - if False the directory is removed before the export
+    writer - BackgroundWriter used by awrite, None to write in place
+    fsync - flush written files to disk
+    atomic - write files into temporary files and rename them
+    blobs - BlobStore for files with names from blob_names
+    blob_names - names of files stored as references to blobs
+    bases - BlobStore keeping a copy of every written file, the merge
+            base of ``cloud pull``
+    """
+
+    def __init__(
+        self,
+        root,
+        incremental=True,
+        writer=None,
+        fsync=False,
+        atomic=True,
+        blobs=None,
+        blob_names=(),
+        bases=None,
+    ):
+        self.root = root
+        self.writer = writer
+        self.fsync = fsync
+        self.atomic = atomic
+        self.blobs = blobs
+        self.blob_names = set(blob_names) if blobs else set()
+        self.bases = bases
+        self.previous = {}
+        self.objects = {}
+        self.stats = dict(written=0, skipped=0, removed=0)
+        if incremental:
+            self.previous = self.load_manifest()
+        elif os.path.isdir(root):
+            shutil.rmtree(root)
+        os.makedirs(root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_args):
+        if exc_type is None:
+            self.close()
+
+    def load_manifest(self):
+        return read_manifest(self.root)
+
+    def _exists(self, path, entry):
+        """Check files of the entry exist and are stored in the same way."""
+        for filename, digest in entry.get("files", {}).items():
+            name = filename
+            is_ref = filename.endswith(REF_SUFFIX)
+            if is_ref:
+                name = filename[: -len(REF_SUFFIX)]
+            if is_ref != (name in self.blob_names):
+                return False
+            if is_ref and not os.path.isfile(self.blobs.path(digest)):
+                return False
+            if not os.path.isfile(os.path.join(self.root, path, filename)):
+                return False
+        return True
+
+    def is_unchanged(self, path, uid, version):
+        """Check the object was exported with the same version."""
+        entry = self.previous.get(path)
+        return (
+            version is not None
+            and entry is not None
+            and entry.get("id") == uid
+            and entry.get("version") == version
+            and self._exists(path, entry)
+        )
+
+    def write(self, path, uid, version, render):
+        """Export object into the path.
+
+        Args:
+            path (str): object directory relative to the root
+            uid (str): object id
+            version (any): object version, None if unknown
+            render (callable): returns dict {filename: bytes}, called
+                               only if the version of the object changed
+
+        Returns:
+            bool: True if any file was written
+        """
+        if self._skip(path, uid, version):
+            return False
+        files, written = self._write_files(path, render)
+        return self._record(path, uid, version, files, written)
+
+    async def awrite(self, path, uid, version, render):
+        """Export object into the path, render and write in the writer.
+
+        Args and result are the same as of :py:meth:`write`.
+        """
+        if self._skip(path, uid, version):
+            return False
+        if self.writer is None:
+            files, written = self._write_files(path, render)
+        else:
+            files, written = await self.writer.run(
+                self._write_files, path, render
+            )
+        return self._record(path, uid, version, files, written)
+
+    def _skip(self, path, uid, version):
+        if not self.is_unchanged(path, uid, version):
+            return False
+        self.objects[path] = self.previous[path]
+        self.stats["skipped"] += 1
+        return True
+
+    def _write_files(self, path, render):
+        previous_files = self.previous.get(path, {}).get("files", {})
+        write = write_atomic if self.atomic else write_file
+        files = dict()
+        written = False
+        for name, data in render().items():
+            digest = content_hash(data)
+            stores = [self.blobs] if name in self.blob_names else []
+            if self.bases is not None and self.bases not in stores:
+                stores.append(self.bases)
+            for store in stores:
+                store.put(data, digest)
+            if name in self.blob_names:
+                name += REF_SUFFIX
+                dirname = os.path.join(self.root, path)
+                data = self.blobs.ref(digest, dirname).encode() + b"\n"
+            files[name] = digest
+            filename = os.path.join(self.root, path, name)
+            if previous_files.get(name) != digest or not os.path.isfile(
+                filename
+            ):
+                write(filename, data, fsync=self.fsync)
+                written = True
+        for name in set(previous_files) - set(files):
+            self._remove_file(os.path.join(self.root, path, name))
+        return files, written
+
+    def _record(self, path, uid, version, files, written):
+        digest = object_hash(files)
+        self.objects[path] = dict(
+            id=uid, version=version, hash=digest, files=files
+        )
+        self.stats["written" if written else "skipped"] += 1
+        return written
+
+    def _remove_file(self, filename):
+        if os.path.isfile(filename):
+            os.unlink(filename)
+        dirname = os.path.dirname(filename)
+        root = os.path.abspath(self.root)
+        while (
+            os.path.abspath(dirname) != root
+            and os.path.isdir(dirname)
+            and not os.listdir(dirname)
+        ):
+            os.rmdir(dirname)
+            dirname = os.path.dirname(dirname)
+
+    def close(self):
+        """Remove objects missing from the export and save the manifest."""
+        for path in set(self.previous) - set(self.objects):
+            for name in self.previous[path].get("files", {}):
+                self._remove_file(os.path.join(self.root, path, name))
+            self.stats["removed"] += 1
+        write_manifest(self.root, self.objects, fsync=self.fsync)
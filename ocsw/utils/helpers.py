@@ -50,7 +50,7 @@ def get(obj, path, default=None):
                 value = value[int(key)]
             else:
                 value = value[key]
-    except (KeyError, ValueError, TypeError):
+    except (KeyError, IndexError, ValueError, TypeError):
         value = default
     return value
 
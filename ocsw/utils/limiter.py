@@ -0,0 +1,88 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Bounded concurrency of API requests."""
+
+import asyncio
+import functools
+
+from ..constants import DEFAULT_CONCURRENCY
+
+__all__ = ("Limiter",)
+
+
+class Limiter:
+    """Limit the number of coroutines running at the same time.
+
+    Only leaf requests should be run through the limiter, a coroutine
+    holding a slot while it waits for other limited coroutines could
+    exhaust the budget.
+
+    concurrency - maximum number of running coroutines
+    rate - maximum number of coroutines started per second, None for
+           no limit
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate=None):
+        if concurrency < 1:
+            raise ValueError("concurrency must be positive")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.concurrency = concurrency
+        self.rate = rate
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.rate:
+            now = asyncio.get_event_loop().time()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + 1 / self.rate
+            if delay > 0:
+                try:
+                    await asyncio.sleep(delay)
+                except BaseException:
+                    # __aexit__ is not called if __aenter__ raises
+                    self._semaphore.release()
+                    raise
+        return self
+
+    async def __aexit__(self, *_args):
+        self._semaphore.release()
+
+    async def run(self, coro):
+        """Await the coroutine when a slot is available."""
+        async with self:
+            return await coro
+
+    def wrap(self, func):
+        """Return coroutine function calling func under the limit."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(func(*args, **kwargs))
+
+        return wrapper
+
+    async def gather(self, *coros):
+        """Run the coroutines under the limit, return results in order."""
+        return await asyncio.gather(*[self.run(coro) for coro in coros])
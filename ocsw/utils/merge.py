@@ -0,0 +1,99 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Line based three-way merge."""
+
+import difflib
+
+__all__ = ("merge3",)
+
+
+def _matches(base, other):
+    """Map indexes of base lines to indexes of the same lines in other."""
+    matcher = difflib.SequenceMatcher(None, base, other, autojunk=False)
+    result = dict()
+    for base_idx, other_idx, size in matcher.get_matching_blocks():
+        for offset in range(size):
+            result[base_idx + offset] = other_idx + offset
+    return result
+
+
+def _terminated(lines):
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+def merge3(base, local, remote, labels=("local", "remote")):
+    """Merge the changes of local and remote made to base.
+
+    Regions changed on one side only take that side, regions changed on
+    both sides in different ways are marked as conflicts.
+
+    >>> merge3("a\\nb\\nc\\n", "A\\nb\\nc\\n", "a\\nb\\nC\\n")
+    ('A\\nb\\nC\\n', 0)
+
+    Args:
+        base (str): common ancestor
+        local (str): local version
+        remote (str): remote version
+        labels (tuple): names of local and remote in conflict markers
+
+    Returns:
+        tuple: (merged text, number of conflicts)
+    """
+    base = base.splitlines(keepends=True)
+    local = local.splitlines(keepends=True)
+    remote = remote.splitlines(keepends=True)
+    local_matches = _matches(base, local)
+    remote_matches = _matches(base, remote)
+
+    # lines of base kept on both sides split the texts into chunks
+    syncs = [
+        (idx, local_matches[idx], remote_matches[idx])
+        for idx in range(len(base))
+        if idx in local_matches and idx in remote_matches
+    ]
+    syncs.append((len(base), len(local), len(remote)))
+
+    result, conflicts = [], 0
+    base_start = local_start = remote_start = 0
+    for base_end, local_end, remote_end in syncs:
+        base_chunk = base[base_start:base_end]
+        local_chunk = local[local_start:local_end]
+        remote_chunk = remote[remote_start:remote_end]
+        if local_chunk == remote_chunk or remote_chunk == base_chunk:
+            result.extend(local_chunk)
+        elif local_chunk == base_chunk:
+            result.extend(remote_chunk)
+        else:
+            conflicts += 1
+            result.append(f"<<<<<<< {labels[0]}\n")
+            result.extend(_terminated(local_chunk))
+            result.append("=======\n")
+            result.extend(_terminated(remote_chunk))
+            result.append(f">>>>>>> {labels[1]}\n")
+        if base_end < len(base):
+            result.append(base[base_end])
+        base_start = base_end + 1
+        local_start = local_end + 1
+        remote_start = remote_end + 1
+    return "".join(result), conflicts
@@ -0,0 +1,166 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Output of list records.
+
+The table format needs every row to compute column widths, the other formats
+write each record as soon as it is received.
+"""
+
+import csv
+import json
+import sys
+import textwrap
+
+from .helpers import get
+from .table import ObjTable
+
+__all__ = ("FORMATS", "add_output_argument", "get_writer", "print_records")
+
+FORMATS = ("table", "json", "ndjson", "csv", "tsv")
+
+
+def add_output_argument(parser):
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        choices=FORMATS,
+        default="table",
+        help='output format (default "%(default)s")',
+    )
+
+
+def cell_value(row_data, column_options):
+    """Get raw value of the column, JSON encoded if it is not a scalar."""
+    field = column_options.get("field")
+    val = get(row_data, field, column_options.get("default"))
+    if isinstance(val, (dict, list, tuple)):
+        return json.dumps(val)
+    return val
+
+
+class TableWriter:
+    def __init__(self, columns, stream):
+        self.columns = columns
+        self.stream = stream
+        self.data = []
+
+    def write(self, record):
+        self.data.append(record)
+
+    def close(self):
+        table = ObjTable(data=self.data, columns=self.columns)
+        print(table, file=self.stream)
+
+
+class JsonWriter:
+    """Write the records as json.dumps(records, indent=indent) would."""
+
+    def __init__(self, _columns, stream, indent=2):
+        self.stream = stream
+        self.indent = indent
+        self.count = 0
+
+    def write(self, record):
+        self.stream.write(",\n" if self.count else "[\n")
+        text = json.dumps(record, indent=self.indent)
+        self.stream.write(textwrap.indent(text, " " * self.indent))
+        self.count += 1
+
+    def close(self):
+        self.stream.write("\n]\n" if self.count else "[]\n")
+
+
+class NdjsonWriter:
+    def __init__(self, _columns, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, separators=(",", ":")))
+        self.stream.write("\n")
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    delimiter = ","
+
+    def __init__(self, columns, stream):
+        self.columns = [column for column in columns if column.get("field")]
+        self.writer = csv.writer(
+            stream, delimiter=self.delimiter, lineterminator="\n"
+        )
+        self.writer.writerow([column["field"] for column in self.columns])
+
+    def write(self, record):
+        self.writer.writerow(
+            [cell_value(record, column) for column in self.columns]
+        )
+
+    def close(self):
+        pass
+
+
+class TsvWriter(CsvWriter):
+    delimiter = "\t"
+
+
+WRITERS = dict(
+    table=TableWriter,
+    json=JsonWriter,
+    ndjson=NdjsonWriter,
+    csv=CsvWriter,
+    tsv=TsvWriter,
+)
+
+
+def get_writer(output, columns, stream=None):
+    """Return writer of the records.
+
+    Args:
+        output (str): one of FORMATS
+        columns (list): ObjTable columns
+        stream (file, optional): defaults to sys.stdout
+
+    Returns:
+        writer with write(record) and close() methods
+    """
+    return WRITERS[output or "table"](columns, stream or sys.stdout)
+
+
+async def print_records(records, columns, output="table", stream=None):
+    """Write records in the output format.
+
+    Args:
+        records (iterable, async iterable): records to write
+        columns (list): ObjTable columns
+        output (str): one of FORMATS
+        stream (file, optional): defaults to sys.stdout
+    """
+    writer = get_writer(output, columns, stream)
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            writer.write(record)
+    else:
+        for record in records:
+            writer.write(record)
+    writer.close()
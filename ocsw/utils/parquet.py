@@ -0,0 +1,169 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Columnar export of records to Apache Parquet.
+
+Records are flattened by dotted paths (the same paths used by ObjTable
+columns) into column buffers, every ``row_group_size`` rows the buffers are
+converted to an Arrow record batch and written as one Parquet row group.
+
+Requires the optional ``pyarrow`` package.
+"""
+
+import json
+
+from .. import errors
+from .helpers import get
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+__all__ = ("ParquetWriter", "column", "flatten")
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+
+
+def to_string(val):
+    if val is None or isinstance(val, str):
+        return val
+    return json.dumps(val)
+
+
+def to_float(val):
+    if isinstance(val, bool) or not isinstance(val, (int, float)):
+        return None
+    return float(val)
+
+
+def to_int(val):
+    if isinstance(val, bool) or not isinstance(val, (int, float)):
+        return None
+    return int(val)
+
+
+def to_bool(val):
+    return None if val is None else bool(val)
+
+
+CONVERTERS = dict(
+    string=to_string,
+    float64=to_float,
+    int64=to_int,
+    bool=to_bool,
+)
+
+
+def column(value):
+    """Parse column definition "PATH[:TYPE]", type defaults to "string".
+
+    >>> column("elems.temperature:float64")
+    ('elems.temperature', 'float64')
+    """
+    path, _, kind = value.partition(":")
+    kind = kind or "string"
+    if not path or kind not in CONVERTERS:
+        raise ValueError(value)
+    return path, kind
+
+
+def flatten(record, columns):
+    """Flatten record into a row of scalar values.
+
+    Values of the "string" columns that are not strings are JSON encoded,
+    values that do not match the numeric column type are replaced by None.
+
+    >>> flatten({"report": {"signal": {"bars": 3}}}, [
+    ...     ("report.signal.bars", "int64"), ("name", "string")])
+    {'report.signal.bars': 3, 'name': None}
+
+    Args:
+        record (dict): record
+        columns (list): list of (path, type) pairs,
+                        type is one of "string", "float64", "int64", "bool"
+
+    Returns:
+        dict: path to value
+    """
+    return dict(
+        (path, CONVERTERS[kind](get(record, path))) for path, kind in columns
+    )
+
+
+class ParquetWriter:
+    """Write records into Parquet file by row groups.
+
+    columns - array[(path, type)]
+        path - dotted path of the value in the record, paths are unique
+        type - "string", "float64", "int64" or "bool"
+    """
+
+    def __init__(
+        self, filename, columns, row_group_size=DEFAULT_ROW_GROUP_SIZE
+    ):
+        paths = [path for path, _ in columns]
+        duplicates = sorted(set(p for p in paths if paths.count(p) > 1))
+        if duplicates:
+            raise errors.Error(
+                f"Duplicate Parquet columns: {', '.join(duplicates)}"
+            )
+        if pyarrow is None:
+            raise errors.Error(
+                "Parquet export requires pyarrow, "
+                "install it with 'pip install pyarrow'"
+            )
+        self.columns = list(columns)
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema(
+            [
+                (path, pyarrow.type_for_alias(kind))
+                for path, kind in self.columns
+            ]
+        )
+        self.writer = pyarrow.parquet.ParquetWriter(filename, self.schema)
+        self.buffers = [[] for _ in self.columns]
+        self.count = 0
+
+    def write(self, record):
+        row = flatten(record, self.columns)
+        for buffer, value in zip(self.buffers, row.values()):
+            buffer.append(value)
+        if len(self.buffers[0]) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffers[0]:
+            return
+        batch = pyarrow.RecordBatch.from_arrays(
+            [
+                pyarrow.array(values, type=field.type)
+                for values, field in zip(self.buffers, self.schema)
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_batch(batch)
+        self.count += batch.num_rows
+        self.buffers = [[] for _ in self.columns]
+
+    def close(self):
+        self.flush()
+        self.writer.close()
@@ -0,0 +1,73 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Poll interval following the observed event rate."""
+
+__all__ = ("AdaptiveInterval",)
+
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 30.0
+
+
+class AdaptiveInterval:
+    """Seconds to wait before the next poll.
+
+    The event rate is an exponentially weighted moving average of the
+    events seen per second, the interval is the time expected to gather
+    target events, clamped to [minimum, maximum]. Busy streams are polled
+    every minimum seconds, idle ones back off to maximum.
+
+    >>> interval = AdaptiveInterval(minimum=1, maximum=8, target=4)
+    >>> interval.update(20, 1.0)
+    1
+    >>> [interval.update(0, 1.0) for _ in range(3)]
+    [1, 1, 1.6]
+    """
+
+    def __init__(
+        self,
+        minimum=DEFAULT_MIN_INTERVAL,
+        maximum=DEFAULT_MAX_INTERVAL,
+        target=5,
+        alpha=0.5,
+    ):
+        if not 0 < minimum <= maximum:
+            raise ValueError("0 < minimum <= maximum is required")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.alpha = alpha
+        self.rate = None
+        self.value = minimum
+
+    def update(self, count, elapsed):
+        """Account count events seen in elapsed seconds, return interval."""
+        rate = count / elapsed if elapsed > 0 else 0.0
+        if self.rate is None:
+            self.rate = rate
+        else:
+            self.rate = self.alpha * rate + (1 - self.alpha) * self.rate
+        if self.rate > 0:
+            value = self.target / self.rate
+        else:
+            value = self.maximum
+        self.value = min(self.maximum, max(self.minimum, value))
+        return self.value
@@ -0,0 +1,258 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Local evaluation of filter expressions.
+
+The expression language is the one compiled by
+:py:mod:`ocsw.utils.query_params`::
+
+    expr     := or
+    or       := and ("||" and)*
+    and      := unary ("&&" unary)*
+    unary    := "!" unary | "(" expr ")" | condition
+    condition:= FIELD OP LITERAL | FIELD "in" "[" LITERAL ("," LITERAL)* "]"
+              | "EXISTS" FIELD | "STARTSWITH" "(" FIELD "," STRING ")"
+
+Fields are dotted paths resolved by :py:func:`ocsw.utils.helpers.get`, a
+missing field compares as null.
+
+>>> match = compile_filter('tags.site in ["a","b"] && !(report.bars<2)')
+>>> match({"tags": {"site": "a"}, "report": {"bars": 3}})
+True
+>>> match({"tags": {"site": "c"}})
+False
+"""
+
+import json
+import operator
+import re
+
+from .helpers import get
+
+__all__ = ("compile_filter", "filter_records")
+
+MISSING = object()
+
+TOKEN_RE = re.compile(
+    r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*")
+      | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+      | (?P<op>&&|\|\||==|!=|<=|>=|<|>|!|\(|\)|\[|\]|,)
+      | (?P<name>[A-Za-z_$:][\w$:.-]*)
+    )""",
+    re.VERBOSE,
+)
+
+KEYWORDS = dict(true=True, false=False, null=None)
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def tokenize(text):
+    """Split the expression into (kind, value) tokens."""
+    tokens = []
+    pos, end = 0, len(text.rstrip())
+    while pos < end:
+        match = TOKEN_RE.match(text, pos)
+        if match is None:
+            raise ValueError(f"Invalid filter at {pos}: {text[pos:]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _value(row, field):
+    value = get(row, field, MISSING)
+    return None if value is MISSING else value
+
+
+def _compare(field, func, literal):
+    def compare(row):
+        try:
+            return func(_value(row, field), literal)
+        except TypeError:
+            # ordering of different types, e.g. null < 1
+            return False
+
+    return compare
+
+
+def _in(field, literals):
+    def is_in(row):
+        return _value(row, field) in literals
+
+    return is_in
+
+
+def _exists(field):
+    def exists(row):
+        return get(row, field, MISSING) is not MISSING
+
+    return exists
+
+
+def _startswith(field, prefix):
+    def startswith(row):
+        value = _value(row, field)
+        return isinstance(value, str) and value.startswith(prefix)
+
+    return startswith
+
+
+def _not(func):
+    return lambda row: not func(row)
+
+
+def _all(funcs):
+    return lambda row: all(func(row) for func in funcs)
+
+
+def _any(funcs):
+    return lambda row: any(func(row) for func in funcs)
+
+
+class Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def error(self, expected):
+        found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else ""
+        found = repr(found) if found else "end of expression"
+        raise ValueError(
+            f"Invalid filter {self.text!r}: expected {expected}, got {found}"
+        )
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def take(self, kind, value=None, expected=None):
+        token_kind, token_value = self.peek()
+        if token_kind != kind or (value is not None and token_value != value):
+            self.error(expected or value or kind)
+        self.pos += 1
+        return token_value
+
+    def accept(self, value):
+        if self.peek() in (("op", value), ("name", value)):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self):
+        func = self.parse_or()
+        if self.pos < len(self.tokens):
+            self.error("&& or ||")
+        return func
+
+    def parse_or(self):
+        funcs = [self.parse_and()]
+        while self.accept("||"):
+            funcs.append(self.parse_and())
+        return funcs[0] if len(funcs) == 1 else _any(funcs)
+
+    def parse_and(self):
+        funcs = [self.parse_unary()]
+        while self.accept("&&"):
+            funcs.append(self.parse_unary())
+        return funcs[0] if len(funcs) == 1 else _all(funcs)
+
+    def parse_unary(self):
+        if self.accept("!"):
+            return _not(self.parse_unary())
+        if self.accept("("):
+            func = self.parse_or()
+            self.take("op", ")")
+            return func
+        return self.parse_condition()
+
+    def parse_literal(self):
+        kind, value = self.peek()
+        if kind == "string":
+            self.pos += 1
+            return json.loads(value)
+        if kind == "number":
+            self.pos += 1
+            return json.loads(value)
+        if kind == "name" and value in KEYWORDS:
+            self.pos += 1
+            return KEYWORDS[value]
+        return self.error("value")
+
+    def parse_condition(self):
+        field = self.take("name", expected="field")
+        if field == "EXISTS":
+            return _exists(self.take("name", expected="field"))
+        if field == "STARTSWITH":
+            self.take("op", "(")
+            field = self.take("name", expected="field")
+            self.take("op", ",")
+            prefix = self.parse_literal()
+            self.take("op", ")")
+            if not isinstance(prefix, str):
+                self.error("string prefix")
+            return _startswith(field, prefix)
+        if self.accept("in"):
+            self.take("op", "[")
+            literals = [self.parse_literal()]
+            while self.accept(","):
+                literals.append(self.parse_literal())
+            self.take("op", "]")
+            return _in(field, literals)
+        kind, value = self.peek()
+        if kind != "op" or value not in COMPARISONS:
+            self.error("comparison operator")
+        self.pos += 1
+        return _compare(field, COMPARISONS[value], self.parse_literal())
+
+
+def compile_filter(expression):
+    """Compile the filter expression into a predicate of a record.
+
+    Args:
+        expression (str, ocsw.utils.query_params.Filter): filter expression
+
+    Raises:
+        ValueError: if the expression is invalid
+
+    Returns:
+        callable: function(record) -> bool
+    """
+    return Parser(str(expression)).parse()
+
+
+def filter_records(records, expression):
+    """Iterate over records matching the filter expression, if any."""
+    if not expression:
+        return iter(records)
+    return filter(compile_filter(expression), records)
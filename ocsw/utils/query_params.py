@@ -18,11 +18,259 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+"""Query parameters of the Octave Cloud API.
+
+Filter expressions can be built from :py:class:`Field` instead of
+formatting strings, values are quoted and field names are validated::
+
+    >>> path = Field("path")
+    >>> print((path != "/acme/devices/x/:inbox") & Field("elems.n").exists())
+    path!="/acme/devices/x/:inbox" && EXISTS elems.n
+    >>> print(path.startswith("/acme/") | Field("tags.site").in_(["a", "b"]))
+    STARTSWITH(path,"/acme/") || tags.site in ["a","b"]
+"""
+
+import json
+import re
+
+__all__ = (
+    "And",
+    "Compare",
+    "Exists",
+    "Field",
+    "Filter",
+    "In",
+    "Not",
+    "Or",
+    "Prefix",
+    "Raw",
+    "in_filter",
+    "query_filter",
+    "query_params",
+    "quote",
+)
+
+COMPARISON_OPERATORS = ("==", "!=", "<", "<=", ">", ">=")
+FIELD_RE = re.compile(r"^[A-Za-z_$:][\w$:-]*(\.[\w$:-]+)*$")
+
+
+def quote(value):
+    """Return literal of the filter expression.
+
+    >>> print(quote('say "hi"'))
+    "say \\"hi\\""
+    >>> print(quote(3), quote(True), quote(None))
+    3 true null
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return json.dumps(value)
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    raise ValueError(f"Unsupported filter value {value!r}")
+
+
+def check_field(name):
+    if not isinstance(name, str) or not FIELD_RE.match(name):
+        raise ValueError(f"Invalid filter field {name!r}")
+    return name
+
+
+class Filter:
+    """Node of the filter expression, str() compiles it."""
+
+    # binding strength, operands with a lower one are parenthesized
+    precedence = 3
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def compile(self):
+        raise NotImplementedError
+
+    def __str__(self):
+        return self.compile()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.compile()}>"
+
+
+def _operand(node, precedence):
+    text = node.compile()
+    return f"({text})" if node.precedence < precedence else text
+
+
+class Raw(Filter):
+    """Filter expression given as a string, e.g. by the user."""
+
+    precedence = 0
+
+    def __init__(self, text):
+        self.text = text
+
+    def compile(self):
+        return self.text
+
+
+class Compare(Filter):
+    def __init__(self, field, operator, value):
+        if operator not in COMPARISON_OPERATORS:
+            raise ValueError(f"Invalid filter operator {operator!r}")
+        self.field = check_field(field)
+        self.operator = operator
+        self.value = value
+        quote(value)
+
+    def compile(self):
+        return f"{self.field}{self.operator}{quote(self.value)}"
+
+
+class In(Filter):
+    def __init__(self, field, values):
+        self.field = check_field(field)
+        self.values = list(values)
+        if not self.values:
+            raise ValueError(f"Empty list of {field!r} values")
+
+    def compile(self):
+        values = ",".join(quote(val) for val in self.values)
+        return f"{self.field} in [{values}]"
+
+
+class Prefix(Filter):
+    def __init__(self, field, prefix):
+        self.field = check_field(field)
+        if not isinstance(prefix, str):
+            raise ValueError(f"Prefix of {field!r} must be a string")
+        self.prefix = prefix
+
+    def compile(self):
+        return f"STARTSWITH({self.field},{quote(self.prefix)})"
+
+
+class Exists(Filter):
+    def __init__(self, field):
+        self.field = check_field(field)
+
+    def compile(self):
+        return f"EXISTS {self.field}"
+
+
+class Not(Filter):
+    precedence = 3
+
+    def __init__(self, operand):
+        self.operand = _filter(operand)
+
+    def compile(self):
+        return "!" + _operand(self.operand, 4)
+
+
+class _Junction(Filter):
+    operator = None
+
+    def __init__(self, *operands):
+        self.operands = []
+        for operand in map(_filter, operands):
+            if type(operand) is type(self):
+                self.operands.extend(operand.operands)
+            else:
+                self.operands.append(operand)
+        if not self.operands:
+            raise ValueError(f"Empty {self.__class__.__name__} filter")
+
+    def compile(self):
+        return f" {self.operator} ".join(
+            _operand(operand, self.precedence + 1) for operand in self.operands
+        )
+
+
+class And(_Junction):
+    operator = "&&"
+    precedence = 2
+
+
+class Or(_Junction):
+    operator = "||"
+    precedence = 1
+
+
+def _filter(value):
+    if isinstance(value, Filter):
+        return value
+    if isinstance(value, str):
+        return Raw(value)
+    raise ValueError(f"Invalid filter {value!r}")
+
+
+class Field:
+    """Field of the objects, comparisons make filter expressions.
+
+    >>> print(Field("lastSeen") > 1600000000000)
+    lastSeen>1600000000000
+    """
+
+    __hash__ = None
+
+    def __init__(self, name):
+        self.name = check_field(name)
+
+    def __eq__(self, value):
+        return Compare(self.name, "==", value)
+
+    def __ne__(self, value):
+        return Compare(self.name, "!=", value)
+
+    def __lt__(self, value):
+        return Compare(self.name, "<", value)
+
+    def __le__(self, value):
+        return Compare(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Compare(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Compare(self.name, ">=", value)
+
+    def in_(self, values):
+        return In(self.name, values)
+
+    def startswith(self, prefix):
+        return Prefix(self.name, prefix)
+
+    def exists(self):
+        return Exists(self.name)
+
+
+def in_filter(field, values):
+    """Return filter expression matching any of the values.
+
+    >>> print(in_filter("name", ["a", "b"]))
+    name in ["a","b"]
+    """
+    return In(field, values).compile()
+
 
 def query_filter(filters):
-    # TODO: implement this
-    filters = filters or ""
-    return filters
+    """Compile the filter parameter.
+
+    Args:
+        filters (Filter, str, list): expression, a list is joined by "&&"
+
+    Returns:
+        str: filter expression
+    """
+    if not filters:
+        return ""
+    if isinstance(filters, (list, tuple)):
+        filters = And(*filters)
+    return _filter(filters).compile()
 
 
 def query_params(
@@ -21,9 +21,10 @@
 """Cell value render."""
 
 from .date_fns import distance_in_words_to_now
+from .format_date import format_date
 from .helpers import get
 
-__all__ = ("map", "yes_no", "timestamp_delta")
+__all__ = ("map", "yes_no", "timestamp_delta", "number", "date")
 
 
 def map(row_data, column_options):
@@ -76,3 +77,35 @@ def timestamp_delta(row_data, column_options):
     default = column_options.get("default", None)
     val = get(row_data, field, default)
     return distance_in_words_to_now(val) if val else ""
+
+
+def number(row_data, column_options):
+    """Format number value with 6 significant digits.
+
+    Args:
+        row_data (dict): an object containing a value
+        column_options (dict): column options {field, default}
+
+    Returns:
+        str: formatted number
+    """
+    field = column_options.get("field")
+    default = column_options.get("default", None)
+    val = get(row_data, field, default)
+    return "" if val is None else f"{val:.6g}"
+
+
+def date(row_data, column_options):
+    """Format timestamp value as local date and time.
+
+    Args:
+        row_data (dict): an object containing a value
+        column_options (dict): column options {field, default}
+
+    Returns:
+        str: date and time
+    """
+    field = column_options.get("field")
+    default = column_options.get("default", None)
+    val = get(row_data, field, default)
+    return format_date(val, "%Y-%m-%d %H:%M:%S") if val is not None else ""
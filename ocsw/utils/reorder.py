@@ -0,0 +1,72 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Bounded buffer putting items back in order of their keys."""
+
+import heapq
+import itertools
+
+__all__ = ("ReorderBuffer",)
+
+DEFAULT_REORDER_SIZE = 10000
+
+
+class ReorderBuffer:
+    """Hold items until no item with a smaller key can arrive.
+
+    Items are released in key order once the watermark reaches their key.
+    When the buffer holds more than size items the smallest ones are
+    released regardless, so memory stays bounded and a late item may then
+    come out of order.
+
+    >>> buffer = ReorderBuffer(size=3)
+    >>> buffer.push(5, "e"); buffer.push(2, "b"); buffer.push(3, "c")
+    >>> list(buffer.pop_ready(3))
+    ['b', 'c']
+    >>> buffer.push(1, "a"); buffer.push(9, "i"); buffer.push(7, "g")
+    >>> list(buffer.pop_ready(0)), len(buffer)
+    (['a'], 3)
+    >>> list(buffer.drain())
+    ['e', 'g', 'i']
+    """
+
+    def __init__(self, size=DEFAULT_REORDER_SIZE):
+        self.size = size
+        self.heap = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, key, item):
+        # the counter keeps items of equal keys in arrival order
+        heapq.heappush(self.heap, (key, next(self.counter), item))
+
+    def pop_ready(self, watermark):
+        """Release items with keys up to the watermark and the overflow."""
+        while self.heap and (
+            self.heap[0][0] <= watermark or len(self.heap) > self.size
+        ):
+            yield heapq.heappop(self.heap)[2]
+
+    def drain(self):
+        while self.heap:
+            yield heapq.heappop(self.heap)[2]
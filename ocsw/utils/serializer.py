@@ -0,0 +1,72 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""YAML serialization of exported objects.
+
+The libyaml based ``CSafeDumper`` is used when PyYAML is built with it,
+otherwise the pure Python ``SafeDumper``. Both produce the same documents.
+"""
+
+import yaml
+
+__all__ = ("Dumper", "dump_yaml")
+
+try:
+    from yaml import CSafeDumper as BaseDumper
+except ImportError:  # pragma: no cover
+    from yaml import SafeDumper as BaseDumper
+
+
+def str_presenter(dumper, data):
+    """Represent multiline strings in the literal block style."""
+    if "\n" in data:  # check for multiline string
+        items = [item.rstrip() for item in data.splitlines()]
+        return dumper.represent_scalar(
+            "tag:yaml.org,2002:str", "\n".join(items), style="|"
+        )
+    return dumper.represent_scalar("tag:yaml.org,2002:str", data)
+
+
+class Dumper(BaseDumper):
+    pass
+
+
+class PyDumper(yaml.SafeDumper):
+    pass
+
+
+for _dumper in (Dumper, PyDumper):
+    _dumper.add_representer(str, str_presenter)
+
+
+def dump_yaml(data, dumper=Dumper):
+    """Serialize data into UTF-8 encoded YAML document.
+
+    >>> dump_yaml({"js": "a\\nb  \\n", "version": 1}).decode()
+    'js: |-\\n  a\\n  b\\nversion: 1\\n'
+    """
+    return yaml.dump(
+        data,
+        default_flow_style=False,
+        allow_unicode=True,
+        encoding="utf-8",
+        Dumper=dumper,
+    )
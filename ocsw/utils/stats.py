@@ -0,0 +1,386 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Aggregates of event values computed in one pass and constant memory."""
+
+import math
+
+from . import render
+from .date_fns import parse_duration
+from .helpers import get
+from .output import print_records
+
+__all__ = (
+    "DEFAULT_BUCKET",
+    "DEFAULT_PERCENTILES",
+    "EventStats",
+    "FieldStats",
+    "QuantileSketch",
+    "TimeBuckets",
+    "add_stats_arguments",
+    "percentile",
+    "print_stats",
+)
+
+# milliseconds per rate bucket
+DEFAULT_BUCKET = 3600000
+# maximum number of rate buckets kept, wider buckets are used above it
+DEFAULT_MAX_BUCKETS = 1000
+DEFAULT_PERCENTILES = (50, 90, 99)
+# relative error of the estimated percentiles
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# maximum number of sketch bins
+DEFAULT_MAX_BINS = 2048
+# values closer to zero are counted as zero by the sketch
+MIN_SKETCH_VALUE = 1e-9
+
+
+def percentile(value):
+    """Parse percentile in [0, 100].
+
+    >>> percentile("99.9")
+    99.9
+    """
+    percent = float(value)
+    if not 0 <= percent <= 100:
+        raise ValueError(value)
+    return percent
+
+
+def add_stats_arguments(parser):
+    parser.add_argument(
+        "-e",
+        "--elem",
+        dest="paths",
+        metavar="PATH",
+        type=lambda value: f"elems.{value}",
+        action="append",
+        required=True,
+        help="aggregated value in the event elems, e.g. temperature "
+        "or report.signal.bars",
+    )
+    parser.add_argument(
+        "-p",
+        "--percentile",
+        dest="percentiles",
+        metavar="PERCENT",
+        type=percentile,
+        action="append",
+        help="estimated percentile of the values "
+        f"(default: {', '.join(map(str, DEFAULT_PERCENTILES))})",
+    )
+    parser.add_argument(
+        "--bucket",
+        type=parse_duration,
+        default=DEFAULT_BUCKET,
+        metavar="DURATION",
+        help="time per rate bucket, milliseconds or a number with unit "
+        "s, m, h or d (default: 1h)",
+    )
+    parser.add_argument(
+        "--rates",
+        action="store_true",
+        help="print the number of events per bucket instead",
+    )
+
+
+def percentile_key(percent):
+    """Key of the percentile in the summary, dots are replaced for paths.
+
+    >>> percentile_key(99.9)
+    'p99_9'
+    """
+    return f"p{percent:g}".replace(".", "_")
+
+
+class QuantileSketch:
+    """Quantiles of a value stream with relative accuracy.
+
+    Values are counted in logarithmic bins: bin i holds the values in
+    (gamma^(i-1), gamma^i], the estimate of a quantile is then within
+    relative_accuracy of a value in the stream. Negative values have bins
+    of their own. Above max_bins the bins closest to zero are merged, so
+    memory does not grow with the number of values.
+
+    >>> sketch = QuantileSketch()
+    >>> for value in range(1, 101):
+    ...     sketch.add(value)
+    >>> round(sketch.quantile(0.5))
+    50
+    """
+
+    def __init__(
+        self,
+        relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+        max_bins=DEFAULT_MAX_BINS,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("0 < relative_accuracy < 1 is required")
+        if max_bins < 2:
+            raise ValueError("max_bins >= 2 is required")
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.max_bins = max_bins
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+        self._log_gamma = math.log(self.gamma)
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index):
+        return 2 * self.gamma**index / (self.gamma + 1)
+
+    def add(self, value):
+        """Count the value."""
+        self.count += 1
+        if value > MIN_SKETCH_VALUE:
+            bins, index = self.positive, self._index(value)
+        elif value < -MIN_SKETCH_VALUE:
+            bins, index = self.negative, self._index(-value)
+        else:
+            self.zero += 1
+            return
+        bins[index] = bins.get(index, 0) + 1
+        if len(self.positive) + len(self.negative) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        # merge the two lowest bins, the ones of the smallest magnitudes
+        bins = self.positive if len(self.positive) > 1 else self.negative
+        lowest, second = sorted(bins)[:2]
+        bins[second] += bins.pop(lowest)
+
+    def quantile(self, q):
+        """Return the estimated q-quantile, None if no values were counted.
+
+        Args:
+            q (float): quantile in [0, 1]
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("0 <= q <= 1 is required")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._value(index)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.positive))
+
+
+class FieldStats:
+    """Count, minimum, maximum, mean and percentiles of numeric values.
+
+    Values that are not finite numbers are counted as missing.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.count = 0
+        self.missing = 0
+        self.min = None
+        self.max = None
+        self.total = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        """Account the value."""
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not math.isfinite(value)
+        ):
+            self.missing += 1
+            return
+        self.count += 1
+        if self.count == 1:
+            self.min = self.max = value
+        else:
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+        self.total += value
+        self.sketch.add(value)
+
+    def percentile(self, percent):
+        """Return the estimated percentile, None if no values were seen.
+
+        Percentiles 0 and 100 are the exact minimum and maximum.
+        """
+        if not self.count:
+            return None
+        if percent <= 0:
+            return self.min
+        if percent >= 100:
+            return self.max
+        value = self.sketch.quantile(percent / 100)
+        # the estimate of the bin may lie outside of the seen values
+        return min(self.max, max(self.min, value))
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """Return dict of the aggregates, percentiles keyed by
+        :py:func:`percentile_key`, e.g. "p50"."""
+        result = dict(
+            count=self.count,
+            missing=self.missing,
+            min=self.min,
+            max=self.max,
+            mean=self.total / self.count if self.count else None,
+        )
+        for percent in percentiles:
+            result[percentile_key(percent)] = self.percentile(percent)
+        return result
+
+
+class TimeBuckets:
+    """Number of events per time bucket.
+
+    Buckets are aligned to multiples of width milliseconds. When there are
+    more than max_buckets of them the width is doubled and neighbouring
+    buckets merged, so memory does not grow with the time range.
+    """
+
+    def __init__(self, width=DEFAULT_BUCKET, max_buckets=DEFAULT_MAX_BUCKETS):
+        if width <= 0:
+            raise ValueError("width > 0 is required")
+        if max_buckets < 1:
+            raise ValueError("max_buckets >= 1 is required")
+        self.width = width
+        self.max_buckets = max_buckets
+        self.counts = {}
+
+    def add(self, timestamp, count=1):
+        """Account count events at timestamp milliseconds."""
+        start = timestamp - timestamp % self.width
+        self.counts[start] = self.counts.get(start, 0) + count
+        while len(self.counts) > self.max_buckets:
+            self._widen()
+
+    def _widen(self):
+        self.width *= 2
+        counts = {}
+        for start, count in self.counts.items():
+            start -= start % self.width
+            counts[start] = counts.get(start, 0) + count
+        self.counts = counts
+
+    def rates(self):
+        """Yield dicts of start, count and events per second of non-empty
+        buckets in time order."""
+        for start in sorted(self.counts):
+            count = self.counts[start]
+            yield dict(
+                start=start, count=count, rate=count * 1000 / self.width
+            )
+
+
+class EventStats:
+    """Aggregates of event fields and the event rate.
+
+    Args:
+        paths (list): dotted paths of the aggregated values,
+                      e.g. ["elems.temperature"]
+        bucket (int): milliseconds per rate bucket
+        relative_accuracy (float): relative error of the percentiles
+        max_buckets (int): maximum number of rate buckets
+    """
+
+    def __init__(
+        self,
+        paths,
+        bucket=DEFAULT_BUCKET,
+        relative_accuracy=DEFAULT_RELATIVE_ACCURACY,
+        max_buckets=DEFAULT_MAX_BUCKETS,
+    ):
+        self.count = 0
+        self.fields = {path: FieldStats(relative_accuracy) for path in paths}
+        self.buckets = TimeBuckets(bucket, max_buckets)
+
+    def add(self, event):
+        """Account the event."""
+        self.count += 1
+        date = event.get("creationDate")
+        if date is not None:
+            self.buckets.add(date)
+        for path, stats in self.fields.items():
+            stats.add(get(event, path))
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """Return list of the aggregates of each field."""
+        return [
+            dict(field=path, **stats.summary(percentiles))
+            for path, stats in self.fields.items()
+        ]
+
+    def rates(self):
+        """Yield the event rate of each non-empty bucket."""
+        return self.buckets.rates()
+
+
+RATE_COLUMNS = [
+    dict(field="start", title="BUCKET START", render=render.date),
+    dict(field="count", title="EVENTS"),
+    dict(field="rate", title="EVENTS/S", render=render.number),
+]
+
+
+async def print_stats(
+    stats, percentiles=DEFAULT_PERCENTILES, rates=False, output="table"
+):
+    """Write aggregates of each field, or the event rates, in the format.
+
+    Args:
+        stats (EventStats): aggregates
+        percentiles (list): percentiles of the fields
+        rates (bool): write the event rate of each bucket instead
+        output (str): one of ocsw.utils.output.FORMATS
+    """
+    if rates:
+        await print_records(stats.rates(), RATE_COLUMNS, output)
+        return
+    columns = (
+        [
+            dict(field="field", title="FIELD"),
+            dict(field="count", title="COUNT"),
+            dict(field="missing", title="MISSING"),
+        ]
+        + [
+            dict(field=key, title=key.upper(), render=render.number)
+            for key in ["min", "max", "mean"]
+        ]
+        + [
+            dict(
+                field=percentile_key(percent),
+                title=f"P{percent:g}",
+                render=render.number,
+            )
+            for percent in percentiles
+        ]
+    )
+    await print_records(stats.summary(percentiles), columns, output)
@@ -0,0 +1,238 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Local SQLite mirror of cloud objects.
+
+Every collection is a table of JSON documents with the id, name, companyId
+and lastEditDate of the object extracted into indexed columns. The watermark
+table keeps the state of the incremental synchronization of the collections.
+"""
+
+import json
+import os
+import sqlite3
+
+__all__ = ("COLLECTIONS", "Store")
+
+# collection name: field stored in the "name" column
+COLLECTIONS = dict(
+    company="name",
+    device="name",
+    blueprint="displayName",
+    edge_action="description",
+    cloud_action="description",
+    connector="description",
+    stream="path",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    companyId TEXT,
+    lastEditDate INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_name ON {table} (name);
+CREATE INDEX IF NOT EXISTS {table}_company ON {table} (companyId);
+CREATE INDEX IF NOT EXISTS {table}_last_edit ON {table} (lastEditDate);
+"""
+
+WATERMARK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermark (
+    collection TEXT,
+    companyId TEXT,
+    lastEditDate INTEGER,
+    reconcileDate INTEGER,
+    PRIMARY KEY (collection, companyId)
+);
+"""
+
+INDEXED_COLUMNS = ("id", "name", "companyId", "lastEditDate")
+
+
+def project(item, fields=None):
+    """Keep only top level fields of the item, like the "only" parameter."""
+    if not fields:
+        return item
+    return dict((key, item[key]) for key in fields if key in item)
+
+
+class Store:
+    def __init__(self, filename):
+        dirname = os.path.dirname(os.path.abspath(filename))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        self.connection = sqlite3.connect(filename)
+        for table in COLLECTIONS:
+            self.connection.executescript(SCHEMA.format(table=table))
+        self.connection.executescript(WATERMARK_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_args):
+        self.close()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    @staticmethod
+    def _table(collection):
+        if collection not in COLLECTIONS:
+            raise KeyError(f"Unknown collection {collection!r}")
+        return collection
+
+    def upsert(self, collection, items, company_id=None):
+        """Insert or replace objects of the collection.
+
+        Args:
+            collection (str): one of COLLECTIONS
+            items (list): objects, each must have an "id"
+            company_id (str, optional): used if object has no "companyId"
+        """
+        table = self._table(collection)
+        name_field = COLLECTIONS[collection]
+        rows = [
+            (
+                item["id"],
+                item.get(name_field),
+                item.get("companyId", company_id),
+                item.get("lastEditDate"),
+                json.dumps(item),
+            )
+            for item in items
+        ]
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {table} "
+                "(id, name, companyId, lastEditDate, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def remove(self, collection, ids):
+        table = self._table(collection)
+        with self.connection:
+            self.connection.executemany(
+                f"DELETE FROM {table} WHERE id = ?", [(uid,) for uid in ids]
+            )
+
+    def ids(self, collection, company_id=None, last_edit_date=None):
+        """Return ids of the objects, optionally with the lastEditDate."""
+        table = self._table(collection)
+        conditions, params = [], []
+        if company_id is not None:
+            conditions.append("companyId = ?")
+            params.append(company_id)
+        if last_edit_date is not None:
+            conditions.append("lastEditDate = ?")
+            params.append(last_edit_date)
+        sql = f"SELECT id FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return set(row[0] for row in self.connection.execute(sql, params))
+
+    def prune(self, collection, keep_ids, company_id=None):
+        """Remove objects which are not in keep_ids, return removed ids."""
+        removed = self.ids(collection, company_id) - set(keep_ids)
+        self.remove(collection, removed)
+        return removed
+
+    def find(
+        self,
+        collection,
+        company_id=None,
+        sort=None,
+        order=None,
+        start=0,
+        limit=None,
+        fields=None,
+    ):
+        """List objects of the collection.
+
+        Args:
+            collection (str): one of COLLECTIONS
+            company_id (str, optional): only objects of the company
+            sort (str, optional): field to sort by
+            order (str, optional): "asc" or "desc"
+            start (int): number of objects to skip
+            limit (int, optional): maximum number of objects
+            fields (list, optional): top level fields to return
+
+        Returns:
+            list: objects
+        """
+        table = self._table(collection)
+        sql, params = f"SELECT data FROM {table}", []
+        if company_id is not None:
+            sql += " WHERE companyId = ?"
+            params.append(company_id)
+        if sort in INDEXED_COLUMNS:
+            sql += f" ORDER BY {sort}"
+        elif sort:
+            sql += " ORDER BY json_extract(data, ?)"
+            params.append(f"$.{sort}")
+        if sort and order == "desc":
+            sql += " DESC"
+        sql += " LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, start or 0])
+        return [
+            project(json.loads(row[0]), fields)
+            for row in self.connection.execute(sql, params)
+        ]
+
+    def get_watermark(self, collection, company_id=None):
+        """Return (lastEditDate, reconcileDate) of the last synchronization."""
+        row = self.connection.execute(
+            "SELECT lastEditDate, reconcileDate FROM watermark "
+            "WHERE collection = ? AND companyId IS ?",
+            (self._table(collection), company_id),
+        ).fetchone()
+        return tuple(row) if row else (None, None)
+
+    def set_watermark(
+        self, collection, company_id, last_edit_date, reconcile_date=None
+    ):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO watermark "
+                "(collection, companyId, lastEditDate, reconcileDate) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    self._table(collection),
+                    company_id,
+                    last_edit_date,
+                    reconcile_date,
+                ),
+            )
+
+    def get(self, collection, identifier, company_id=None, fields=None):
+        """Return object by id or name, None if it is not found."""
+        table = self._table(collection)
+        sql = f"SELECT data FROM {table} WHERE (id = ? OR name = ?)"
+        params = [identifier, identifier]
+        if company_id is not None:
+            sql += " AND companyId = ?"
+            params.append(company_id)
+        row = self.connection.execute(sql, params).fetchone()
+        return project(json.loads(row[0]), fields) if row else None
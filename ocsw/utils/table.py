@@ -29,13 +29,45 @@ from collections import defaultdict
 from copy import deepcopy
 from textwrap import wrap
 
-__all__ = ("ObjTable", "PropTable")
+__all__ = ("ObjTable", "PropTable", "column_fields")
 ALIGN_LEFT = "<"
 ALIGN_CENTER = "^"
 ALIGN_RIGHT = ">"
 LOG = logging.getLogger(__name__)
 
 
+def column_fields(columns, extra=()):
+    """Return top level fields of the objects displayed in the columns.
+
+    The result is meant for the "only" query parameter. A column can list
+    its fields explicitly in "fields", e.g. a column with a value joined
+    from other objects needs the fields of the join key, or none.
+
+    >>> column_fields([
+    ...     dict(field="name"),
+    ...     dict(field="report.signal.bars.value"),
+    ...     dict(field="blueprint.displayName", fields=["localVersions"]),
+    ...     dict(field="report.battery.voltage.value"),
+    ... ], extra=["id"])
+    ['name', 'report', 'localVersions', 'id']
+
+    Args:
+        columns (list): ObjTable columns
+        extra (list): fields needed besides the columns
+
+    Returns:
+        list: field names
+    """
+    fields = []
+    for column in columns:
+        if "fields" in column:
+            fields.extend(column["fields"])
+        elif column.get("field"):
+            fields.append(column["field"].split(".", 1)[0])
+    fields.extend(extra)
+    return list(dict.fromkeys(fields))
+
+
 def cell_render(row_data, column_options):
     render = column_options.get("render")
     if render:
@@ -84,6 +116,7 @@ class ObjTable:
     columns - array[dict{
         title (optional) str
         field (optional) str
+        fields (optional) list - top level fields used by the column
         render (optional) function(row_data:dict, column:dict)
         align (optional) "<", "^", ">"
         width (optional) int - max column width
@@ -0,0 +1,255 @@
+# Copyright (c) 2020 Maxim Barabash
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""Local changes of the objects downloaded by ``cloud fetch``.
+
+The fetch tree is ``<company>/<kind>/<description>__<id>`` with
+``action.js`` and ``meta.yaml`` files, the manifest of the tree keeps the
+version and content hash of the files as they were downloaded. Objects
+merged with conflicts by ``cloud pull`` list the conflicting files in the
+``conflicts`` of their manifest entry until the markers are removed.
+"""
+
+import collections
+import os
+
+import yaml
+
+from .export_tree import REF_SUFFIX, content_hash, read_file, write_atomic
+from .merge import merge3
+
+__all__ = (
+    "LocalChange",
+    "has_conflict_markers",
+    "local_changes",
+    "merge_object",
+    "object_kind",
+    "remove_object",
+    "store_bases",
+)
+
+# properties of meta.yaml sent to the server
+META_PROPS = ("disabled", "source", "description")
+
+LocalChange = collections.namedtuple(
+    "LocalChange", "path company_name kind uid version props files conflicts"
+)
+
+# first characters of the lines merge3 marks conflicts with
+CONFLICT_MARKERS = (b"<<<<<<< ", b">>>>>>> ")
+
+
+def object_kind(path):
+    """Return (company name, kind) of the object path in the fetch tree.
+
+    >>> object_kind(os.path.join("acme", "cloud_action", "dump__5f3"))
+    ('acme', 'cloud_action')
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    if len(parts) != 3:
+        return None, None
+    return parts[0], parts[1]
+
+
+def has_conflict_markers(data):
+    """Return True if the file content has merge conflict markers.
+
+    >>> has_conflict_markers(b"a\\n<<<<<<< local\\nb\\n")
+    True
+    """
+    return any(line.startswith(CONFLICT_MARKERS) for line in data.splitlines())
+
+
+def _strip_ref(filename):
+    if filename.endswith(REF_SUFFIX):
+        return filename[: -len(REF_SUFFIX)]
+    return filename
+
+
+def _read_local(root, path, name):
+    try:
+        return read_file(os.path.join(root, path, name))
+    except FileNotFoundError:
+        return None
+
+
+def _remove(root, path, name):
+    for filename in (name, name + REF_SUFFIX):
+        filename = os.path.join(root, path, filename)
+        if os.path.isfile(filename):
+            os.unlink(filename)
+    dirname = os.path.join(root, path)
+    while os.path.abspath(dirname) != os.path.abspath(root):
+        if not os.path.isdir(dirname) or os.listdir(dirname):
+            break
+        os.rmdir(dirname)
+        dirname = os.path.dirname(dirname)
+
+
+def local_changes(root, objects, kinds):
+    """Iterate over objects edited after they were downloaded.
+
+    Args:
+        root (str): directory of the fetch tree
+        objects (dict): manifest objects
+        kinds (iterable): object kinds to check, e.g. "cloud_action"
+
+    Yields:
+        LocalChange: changed object, props are the values to update,
+                     files are the new content hashes of the changed files,
+                     conflicts are the names of files merged with conflicts
+                     that still have conflict markers and of meta.yaml
+                     files that cannot be parsed
+    """
+    for path, entry in sorted(objects.items()):
+        company_name, kind = object_kind(path)
+        if kind not in kinds:
+            continue
+        props, files, conflicts = dict(), dict(), []
+        for filename, digest in entry.get("files", {}).items():
+            name = _strip_ref(filename)
+            data = _read_local(root, path, name)
+            if data is None or content_hash(data) == digest:
+                continue
+            files[filename] = content_hash(data)
+            if name in entry.get("conflicts", ()) and has_conflict_markers(
+                data
+            ):
+                conflicts.append(name)
+            if name == "action.js":
+                props["js"] = data.decode("utf-8")
+            elif name == "meta.yaml":
+                try:
+                    meta = yaml.safe_load(data) or {}
+                except yaml.YAMLError:
+                    # e.g. conflict markers left by a merge
+                    conflicts.append(name)
+                    continue
+                for key in META_PROPS:
+                    if key in meta:
+                        props[key] = meta[key]
+        if props or conflicts:
+            yield LocalChange(
+                path,
+                company_name,
+                kind,
+                entry.get("id"),
+                entry.get("version"),
+                props,
+                files,
+                sorted(set(conflicts)),
+            )
+
+
+def store_bases(root, change, bases):
+    """Store the files of the pushed change as merge bases of cloud pull.
+
+    Args:
+        root (str): directory of the fetch tree
+        change (LocalChange): change updated on the server
+        bases (BlobStore): contents of the fetched files
+    """
+    for filename in change.files:
+        data = _read_local(root, change.path, _strip_ref(filename))
+        if data is not None:
+            bases.put(data)
+
+
+def merge_object(root, old_path, entry, path, files, bases):
+    """Merge the new files of the object into the local directory.
+
+    Files not edited locally are replaced, local edits of files not changed
+    on the server are kept, files changed on both sides are merged with the
+    fetched base from bases.
+
+    Args:
+        root (str): directory of the fetch tree
+        old_path (str): object directory of the last fetch
+        entry (dict): manifest entry of the last fetch, None for new objects
+        path (str): new object directory
+        files (dict): new files {name: bytes}
+        bases (BlobStore): contents of the previously fetched files
+
+    Returns:
+        tuple: (dict {name: content hash} of the new files,
+                list of names of files with conflicts, including the
+                ones of the last pull that still have conflict markers)
+    """
+    entry = entry or {}
+    previous = dict(
+        (_strip_ref(filename), digest)
+        for filename, digest in entry.get("files", {}).items()
+    )
+    digests, conflicts = dict(), []
+    for name in sorted(set(previous) | set(files)):
+        base_digest = previous.get(name)
+        local = _read_local(root, old_path, name)
+        new = files.get(name)
+        if new is not None:
+            digests[name] = content_hash(new)
+            bases.put(new, digests[name])
+        modified = local is not None and content_hash(local) != base_digest
+        if modified and new is not None and digests[name] != base_digest:
+            base = bases.get(base_digest) or b""
+            merged, count = merge3(
+                base.decode("utf-8"),
+                local.decode("utf-8"),
+                new.decode("utf-8"),
+            )
+            if count:
+                conflicts.append(name)
+            data = merged.encode("utf-8")
+        elif modified:
+            data = local
+        else:
+            data = new
+        if (
+            name not in conflicts
+            and name in entry.get("conflicts", ())
+            and data is not None
+            and has_conflict_markers(data)
+        ):
+            conflicts.append(name)
+        if data is None or old_path != path:
+            _remove(root, old_path, name)
+        if data is None or (data == local and old_path == path):
+            continue
+        filename = os.path.join(root, path, name)
+        if os.path.isfile(filename + REF_SUFFIX):
+            os.unlink(filename + REF_SUFFIX)
+        write_atomic(filename, data)
+    return digests, conflicts
+
+
+def remove_object(root, path, entry):
+    """Remove files of the object, keep it if it was edited locally.
+
+    Returns:
+        bool: True if the object was removed
+    """
+    files = entry.get("files", {})
+    for filename, digest in files.items():
+        data = _read_local(root, path, _strip_ref(filename))
+        if data is not None and content_hash(data) != digest:
+            return False
+    for filename in files:
+        _remove(root, path, _strip_ref(filename))
+    return True
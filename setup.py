@@ -46,6 +46,7 @@ setup(
     platforms=["Independent"],
     include_package_data=True,
     install_requires=install_requires,
+    extras_require={"parquet": ["pyarrow"]},
     python_requires=">=3.6",
     classifiers=[
         "Development Status :: 3 - Alpha",
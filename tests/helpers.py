@@ -0,0 +1,76 @@
+"""Scaffolding shared by the tests of API mixins and commands."""
+
+import asyncio
+
+from ocsw.api.event import EventApiMixin
+from ocsw.api.pagination import PaginationMixin
+from ocsw.utils.predicate import filter_records
+
+
+def run(coro):
+    """Run the coroutine to completion in the event loop of the tests."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+def response(body):
+    """Return successful API response with the body."""
+    return dict(head=dict(status=200, ok=True), body=body)
+
+
+def paginate(items, start=0, limit=None):
+    """Return the items of a list endpoint page for start and limit."""
+    stop = None if limit is None else start + limit
+    return list(items)[start:stop]
+
+
+class InFlight:
+    """Requests of a fake client in flight, peak is the most at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def wait(self, delay=0.001):
+        """Hold the request for delay seconds."""
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.running -= 1
+
+
+class EventClient(EventApiMixin, PaginationMixin):
+    """Fake client serving the event endpoints from a list of events.
+
+    Events match a request by its stream path (events without a path are
+    in every stream) and filter expression, and are sorted by creation
+    date. Each request is recorded as (path, filters, start); requests
+    are held for delay seconds, if not None.
+    """
+
+    def __init__(self, events=(), delay=None):
+        self.stored = list(events)
+        self.requests = []
+        self.in_flight = InFlight()
+        self.delay = delay
+
+    async def events(
+        self, source, filters=None, order=None, start=0, limit=None, **_kw
+    ):
+        self.requests.append((source, filters and str(filters), start))
+        if self.delay is not None:
+            await self.in_flight.wait(self.delay)
+        found = sorted(
+            (
+                event
+                for event in filter_records(self.stored, filters)
+                if not source or event.get("path", source) == source
+            ),
+            key=lambda event: event["creationDate"],
+            reverse=order == "desc",
+        )
+        return response(paginate(found, start, limit))
+
+    async def events_by_stream_path(self, stream_path, **kwargs):
+        return await self.events(stream_path, **kwargs)
@@ -0,0 +1,272 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import aiohttp
+
+from ocsw import errors
+from ocsw.api.pagination import PaginationMixin
+from ocsw.cmd import cmd_device
+from ocsw.utils.bulk import (
+    Journal,
+    Progress,
+    error_message,
+    read_lines,
+    read_rows,
+    run_bulk,
+)
+from ocsw.utils.limiter import Limiter
+
+from .helpers import InFlight, paginate, run
+
+
+class FakeClient:
+    def __init__(self, fail=(), error=None):
+        self.fail = set(fail)
+        self.error = error
+        self.created = []
+        self.removed = []
+        self.in_flight = InFlight()
+
+    async def create_device(self, name, imei, fsn):
+        await self.in_flight.wait()
+        if name in self.fail:
+            raise self.error or errors.Error("Device already exists")
+        self.created.append(name)
+        return dict(head=dict(ok=True), body=dict(id=f"id-{name}"))
+
+    async def remove_device(self, device_identifier):
+        await asyncio.sleep(0.001)
+        if device_identifier in self.fail:
+            raise self.error or errors.NotFound("Device not found")
+        self.removed.append(device_identifier)
+        return dict(head=dict(ok=True), body=dict())
+
+
+class TagClient(PaginationMixin):
+    def __init__(self, count):
+        self.items = [
+            dict(id=f"id{idx}", name=f"dev{idx}", tags=dict(site=str(idx % 2)))
+            for idx in range(count)
+        ]
+        self.updated = {}
+        self.filters = []
+
+    async def devices(self, fields=None, filters=None, start=0, limit=None):
+        self.filters.append(filters)
+        return dict(body=paginate(self.items, start, limit))
+
+    async def update_device(self, device_identifier, props=None):
+        self.updated[device_identifier] = props["tags"]
+        return dict(body=dict(id=device_identifier))
+
+
+class TestBulk(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        filename = os.path.join(self.tmpdir.name, name)
+        with open(filename, "w") as fileptr:
+            fileptr.write(text)
+        return filename
+
+    def provision(self, client, filename, **kwargs):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(
+            io.StringIO()
+        ):
+            run(cmd_device.cmd_device_provision(client, filename, **kwargs))
+        return stdout.getvalue()
+
+    def test_read_rows(self):
+        csv_file = self.write("rows.csv", "name,imei,fsn\na,1,2\nb,3,4\n")
+        ndjson_file = self.write(
+            "rows.ndjson", '{"name": "a", "imei": "1", "fsn": "2"}\n\n'
+        )
+        self.assertEqual(
+            list(read_rows(csv_file)),
+            [
+                dict(name="a", imei="1", fsn="2"),
+                dict(name="b", imei="3", fsn="4"),
+            ],
+        )
+        self.assertEqual(
+            list(read_rows(ndjson_file)), [dict(name="a", imei="1", fsn="2")]
+        )
+        with self.assertRaises(errors.Error):
+            list(read_rows(self.write("bad.ndjson", "{")))
+
+    def test_journal(self):
+        filename = os.path.join(self.tmpdir.name, "journal")
+        with Journal(filename) as journal:
+            journal.record("a", True)
+            journal.record("b", True)
+            journal.record("b", False, error="gone")
+        with open(filename, "a") as fileptr:
+            fileptr.write('{"key": "c", "o')  # interrupted write
+        with Journal(filename) as journal:
+            self.assertEqual(journal.done, {"a"})
+
+    def test_provision_resume(self):
+        rows = "".join(
+            json.dumps(dict(name=f"dev{idx}", imei=str(idx), fsn="fsn")) + "\n"
+            for idx in range(100)
+        )
+        filename = self.write("devices.ndjson", rows + '{"name": "x"}\n')
+        client = FakeClient(fail=["dev7"])
+        with self.assertRaises(errors.Error):
+            self.provision(client, filename, concurrency=4)
+        self.assertEqual(len(client.created), 99)
+        self.assertEqual(client.in_flight.peak, 4)
+
+        client = FakeClient(fail=["x"])
+        with self.assertRaises(errors.Error):
+            self.provision(client, filename)
+        self.assertEqual(client.created, ["dev7"])
+
+        client = FakeClient()
+        filename = self.write("devices.ndjson", rows)
+        output = self.provision(client, filename)
+        self.assertEqual(client.created, [])
+        self.assertEqual(output, "0 provisioned, 0 failed, 100 skipped\n")
+
+    def test_run_bulk_errors(self):
+        async def func(item):
+            if item == 1:
+                raise aiohttp.ClientConnectionError("connection reset")
+            if item == 2:
+                raise asyncio.TimeoutError()
+            return item
+
+        results = {}
+
+        def on_result(item, result, error):
+            results[item] = error or result
+
+        run(run_bulk(range(5), func, Limiter(2), on_result))
+        self.assertEqual(sorted(results), [0, 1, 2, 3, 4])
+        self.assertIsInstance(results[1], aiohttp.ClientConnectionError)
+        self.assertIsInstance(results[2], asyncio.TimeoutError)
+        self.assertEqual(error_message(results[1]), "connection reset")
+        self.assertEqual(error_message(results[2]), "TimeoutError")
+
+    def test_provision_network_error(self):
+        rows = "".join(
+            json.dumps(dict(name=f"dev{idx}", imei=str(idx), fsn="fsn")) + "\n"
+            for idx in range(10)
+        )
+        filename = self.write("devices.ndjson", rows)
+        client = FakeClient(
+            fail=["dev2"], error=aiohttp.ClientConnectionError("reset")
+        )
+        with self.assertRaises(errors.Error):
+            self.provision(client, filename, concurrency=4)
+        self.assertEqual(len(client.created), 9)
+
+        client = FakeClient()
+        self.provision(client, filename)
+        self.assertEqual(client.created, ["dev2"])
+
+    def test_read_lines(self):
+        filename = self.write("ids", "a\n\n  b  # comment\n# c\n")
+        self.assertEqual(list(read_lines(filename)), ["a", "b"])
+
+    def test_progress(self):
+        stream = io.StringIO()
+        progress = Progress(stream)
+        progress.update()
+        progress.update(False)
+        progress.close()
+        self.assertTrue(stream.getvalue().startswith("1 done, 1 failed, "))
+
+    def test_rm_retry(self):
+        filename = self.write("ids", "".join(f"dev{i}\n" for i in range(20)))
+        failed_filename = os.path.join(self.tmpdir.name, "failed")
+        client = FakeClient(fail=["dev3", "dev11", "x"])
+        with self.assertRaises(errors.Error), contextlib.redirect_stderr(
+            io.StringIO()
+        ):
+            run(
+                cmd_device.cmd_device_rm(
+                    client,
+                    ["x"],
+                    filename=filename,
+                    failed_filename=failed_filename,
+                    concurrency=4,
+                )
+            )
+        self.assertEqual(len(client.removed), 18)
+        self.assertEqual(
+            sorted(read_lines(failed_filename)), ["dev11", "dev3", "x"]
+        )
+
+        client = FakeClient()
+        with contextlib.redirect_stderr(io.StringIO()):
+            run(cmd_device.cmd_device_rm(client, [], filename=failed_filename))
+        self.assertEqual(sorted(client.removed), ["dev11", "dev3", "x"])
+
+    def test_rm_network_error(self):
+        failed_filename = os.path.join(self.tmpdir.name, "failed")
+        client = FakeClient(fail=["dev1"], error=asyncio.TimeoutError())
+        with self.assertRaises(errors.Error), contextlib.redirect_stderr(
+            io.StringIO()
+        ):
+            run(
+                cmd_device.cmd_device_rm(
+                    client,
+                    ["dev0", "dev1", "dev2"],
+                    failed_filename=failed_filename,
+                )
+            )
+        self.assertEqual(sorted(client.removed), ["dev0", "dev2"])
+        self.assertEqual(list(read_lines(failed_filename)), ["dev1"])
+
+    def test_tag_delta(self):
+        tags = dict(a="1", b="2")
+        self.assertEqual(
+            cmd_device.tag_delta(tags, dict(a="3", c="4"), ["b"]),
+            (
+                dict(a="3", c="4"),
+                dict(add=dict(c="4"), remove=["b"], change=dict(a="3")),
+            ),
+        )
+        self.assertEqual(
+            cmd_device.tag_delta(tags, dict(a="1"), ["x"]), (tags, None)
+        )
+        self.assertEqual(
+            cmd_device.tag_delta(tags, dict(a="1"), replace=True)[1],
+            dict(add={}, remove=["b"], change={}),
+        )
+
+    def test_retag(self):
+        client = TagClient(250)
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            with contextlib.redirect_stderr(io.StringIO()):
+                run(
+                    cmd_device.cmd_device_retag(
+                        client,
+                        filters="lastSeen>0",
+                        match_tags=dict(fleet="x"),
+                        set_tags=dict(site="1"),
+                    )
+                )
+        self.assertEqual(
+            str(client.filters[0]), '(lastSeen>0) && tags.fleet=="x"'
+        )
+        self.assertEqual(len(client.updated), 125)
+        self.assertEqual(client.updated["id0"], dict(site="1"))
+        self.assertEqual(
+            stdout.getvalue(), "125 updated, 0 failed, 125 unchanged\n"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
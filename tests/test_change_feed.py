@@ -0,0 +1,120 @@
+import os
+import re
+import tempfile
+import unittest
+
+from ocsw.api.change_feed import ChangeFeedMixin
+from ocsw.api.pagination import PaginationMixin
+from ocsw.utils.store import Store
+
+from .helpers import paginate, run
+
+
+class FakeClient(ChangeFeedMixin, PaginationMixin):
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+
+    async def devices(self, filters=None, start=0, limit=None, **_query):
+        self.requests.append(filters)
+        items = sorted(self.items, key=lambda item: item["lastEditDate"])
+        if filters:
+            operator, value = re.match(
+                r"lastEditDate(>=|>)(\d+)", filters
+            ).groups()
+            value = int(value)
+            items = [
+                item
+                for item in items
+                if item["lastEditDate"] > value
+                or (operator == ">=" and item["lastEditDate"] == value)
+            ]
+        return {"body": paginate(items, start, limit)}
+
+
+COMPANY = dict(id="c1", name="acme")
+
+
+class TestChangeFeed(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = Store(os.path.join(self.tmpdir.name, "store.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def sync(self, client, **kwargs):
+        async def collect():
+            result = []
+            async for kind, items in client.changes(
+                "device", self.store, COMPANY, page_size=2, **kwargs
+            ):
+                if kind == "changed":
+                    self.store.upsert("device", items, company_id="c1")
+                    result.extend(item["id"] for item in items)
+                else:
+                    self.store.remove("device", items)
+                    result.extend(f"-{uid}" for uid in sorted(items))
+            return result
+
+        return run(collect())
+
+    def test_iter_changes_ties(self):
+        items = [dict(id=f"d{idx}", lastEditDate=5) for idx in range(5)]
+        items.append(dict(id="d9", lastEditDate=1))
+        client = FakeClient(items)
+
+        async def collect():
+            return [
+                item["id"]
+                async for page in client.iter_changes("device", page_size=2)
+                for item in page
+            ]
+
+        self.assertEqual(
+            sorted(run(collect())), ["d0", "d1", "d2", "d3", "d4", "d9"]
+        )
+
+    def test_watermark(self):
+        client = FakeClient(
+            [dict(id=f"d{idx}", lastEditDate=idx) for idx in range(1, 4)]
+        )
+        self.assertEqual(self.sync(client), ["d1", "d2", "d3"])
+        self.assertEqual(self.store.get_watermark("device", "c1")[0], 3)
+
+        client.items[0]["lastEditDate"] = 7
+        client.items.append(dict(id="d4", lastEditDate=4))
+        client.requests = []
+        self.assertEqual(self.sync(client, reconcile=False), ["d4", "d1"])
+        self.assertEqual(client.requests[0], "lastEditDate>=3")
+        self.assertEqual(self.store.get_watermark("device", "c1")[0], 7)
+
+        del client.items[1]
+        self.assertEqual(self.sync(client, reconcile=True), ["-d2"])
+        self.assertEqual(self.store.ids("device"), {"d1", "d3", "d4"})
+
+    def test_watermark_same_date(self):
+        client = FakeClient(
+            [dict(id=f"d{idx}", lastEditDate=idx) for idx in range(1, 4)]
+        )
+        self.sync(client)
+        # edited in the millisecond of the watermark after the last sync
+        client.items.append(dict(id="d5", lastEditDate=3))
+        self.assertEqual(self.sync(client, reconcile=False), ["d5"])
+        self.assertEqual(self.sync(client, reconcile=False), [])
+        self.assertEqual(self.store.ids("device", "c1", 3), {"d3", "d5"})
+
+    def test_watermark_edited_again(self):
+        client = FakeClient(
+            [dict(id="a", lastEditDate=10), dict(id="b", lastEditDate=5)]
+        )
+        self.assertEqual(self.sync(client), ["b", "a"])
+        # seen at the watermark, edited again later
+        client.items[0]["lastEditDate"] = 20
+        self.assertEqual(self.sync(client, reconcile=False), ["a"])
+        self.assertEqual(self.store.get_watermark("device", "c1")[0], 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
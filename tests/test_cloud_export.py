@@ -0,0 +1,148 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ocsw.api.pagination import PaginationMixin
+from ocsw.cmd import cmd_cloud
+from ocsw.utils.export_tree import ExportTree
+from ocsw.utils.limiter import Limiter
+
+from .helpers import InFlight, paginate, response, run
+
+DELAY = 0.01
+
+
+class FakeClient(PaginationMixin):
+    """Every request takes DELAY seconds."""
+
+    current_company = "c0"
+
+    def __init__(self, companies=3, blueprints=3, actions=3):
+        self.companies_ = [
+            dict(id=f"c{idx}", name=f"c{idx}") for idx in range(companies)
+        ]
+        self.blueprints_ = [
+            dict(
+                id=f"b{idx}",
+                displayName=f"bp{idx}",
+                version=1,
+                localActions=dict(
+                    (f"l{idx}{act}", dict(version=1)) for act in range(actions)
+                ),
+            )
+            for idx in range(blueprints)
+        ]
+        self.actions_ = [
+            dict(id=f"a{idx}", description=f"ca{idx}", version=1, js="x")
+            for idx in range(actions)
+        ]
+        self.requests = 0
+        self.in_flight = InFlight()
+
+    async def request(self, body):
+        self.requests += 1
+        await self.in_flight.wait(DELAY)
+        return response(body)
+
+    async def companies(self, **_kwargs):
+        return await self.request(self.companies_)
+
+    async def blueprints(self, **_kwargs):
+        return await self.request(self.blueprints_)
+
+    async def firmwares(self, **_kwargs):
+        return await self.request([])
+
+    async def actions(self, start=0, limit=None, **_kwargs):
+        return await self.request(paginate(self.actions_, start, limit))
+
+    async def inspect_edge_action(self, action_id, version_number, **_kw):
+        action = dict(
+            id=action_id, description=action_id, version=version_number, js=""
+        )
+        return await self.request(action)
+
+
+class TestCloudExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.tmpdir.name, ".octave")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def export(self, client, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(
+                cmd_cloud.cmd_cloud_export(
+                    client, self.config_path, get_all=True, **kwargs
+                )
+            )
+
+    def test_export_all(self):
+        client = FakeClient()
+        self.export(client, concurrency=100)
+        # companies, blueprints with edge packages, local actions
+        self.assertEqual(client.requests, 1 + 3 * (3 + 3 * 3))
+        # lists of all companies, then local actions of all blueprints
+        self.assertGreaterEqual(client.in_flight.peak, 3 * 3)
+        blueprints = os.path.join(
+            self.config_path, "companies", "c2", "blueprints"
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(
+                    blueprints, "bp1", "localActions", "l12", "action.js"
+                )
+            )
+        )
+
+    def test_concurrency(self):
+        client = FakeClient(companies=1)
+        self.export(client, concurrency=1)
+        self.assertEqual(client.requests, 1 + 3 + 3 * 3)
+        self.assertEqual(client.in_flight.peak, 1)
+
+    def test_incremental_local_actions(self):
+        client = FakeClient()
+        self.export(client, incremental=True)
+        self.assertEqual(client.requests, 1 + 3 * (3 + 3 * 3))
+
+        # unchanged local actions are not fetched again
+        client.requests = 0
+        self.export(client, incremental=True)
+        self.assertEqual(client.requests, 1 + 3 * 3)
+
+        client.requests = 0
+        client.blueprints_[1]["localActions"]["l12"] = dict(version=2)
+        self.export(client, incremental=True)
+        self.assertEqual(client.requests, 1 + 3 * (3 + 1))
+        client.requests = 0
+        self.export(client, incremental=True)
+        self.assertEqual(client.requests, 1 + 3 * 3)
+
+    def export_cloud_actions(self, actions):
+        client = FakeClient(actions=actions)
+        outpath = os.path.join(self.tmpdir.name, "cloud_actions")
+        dumps = mock.patch.object(
+            cmd_cloud, "dump_yaml", wraps=cmd_cloud.dump_yaml
+        )
+        with dumps as dump_yaml, ExportTree(outpath, False) as tree:
+            run(cmd_cloud._export_cloud_actions(client, Limiter(), tree))
+        self.assertEqual(len(os.listdir(outpath)), actions + 1)  # manifest
+        return dump_yaml.call_count, tree.stats["written"], client.requests
+
+    def test_cloud_actions_linear(self):
+        for actions in (10, 100, 250):
+            dumps, written, requests = self.export_cloud_actions(actions)
+            # every action is rendered and written once
+            self.assertEqual(dumps, actions)
+            self.assertEqual(written, actions)
+            self.assertEqual(requests, actions // 100 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
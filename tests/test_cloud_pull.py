@@ -0,0 +1,138 @@
+import os
+import unittest
+
+from ocsw import errors
+from ocsw.cmd import cmd_cloud
+from ocsw.utils.export_tree import read_manifest
+from ocsw.utils.merge import merge3
+
+from .test_cloud_push import CloudTreeTestCase
+
+
+class TestMerge(unittest.TestCase):
+    def test_both_sides(self):
+        base = "a\nb\nc\nd\n"
+        local = "A\nb\nc\nd\n"
+        remote = "a\nb\nc\nD\n"
+        self.assertEqual(merge3(base, local, remote), ("A\nb\nc\nD\n", 0))
+
+    def test_conflict(self):
+        merged, conflicts = merge3("a\nb\n", "a\nX\n", "a\nY")
+        self.assertEqual(conflicts, 1)
+        self.assertEqual(
+            merged, "a\n<<<<<<< local\nX\n=======\nY\n>>>>>>> remote\n"
+        )
+
+    def test_same_change(self):
+        self.assertEqual(merge3("a\n", "b\n", "b\n"), ("b\n", 0))
+
+
+class TestCloudPull(CloudTreeTestCase):
+    def pull(self):
+        return self.cmd(cmd_cloud.cmd_cloud_pull)
+
+    def read(self, name, path=None):
+        with open(os.path.join(path or self.path, name)) as fileptr:
+            return fileptr.read()
+
+    def server_update(self, idx, **props):
+        action = self.client.objects["cloud_action"][idx]
+        action.update(props, version=action["version"] + 1)
+
+    def test_nothing_changed(self):
+        output = self.pull()
+        self.assertEqual(output, "0 changed, 0 conflicts\n")
+        self.assertEqual(self.client.inspected, [])
+
+    def test_update_unmodified(self):
+        self.server_update(3, js="remote")
+        self.pull()
+        self.assertEqual(self.client.inspected, ["a3"])
+        self.assertEqual(self.read("action.js"), "remote")
+        self.assertIn("version: 2", self.read("meta.yaml"))
+        self.assertEqual(
+            self.cmd(cmd_cloud.cmd_cloud_push), "Everything up-to-date\n"
+        )
+
+    def test_merge(self):
+        self.server_update(3, js="line1\nline2\nremote\n")
+        self.pull()
+        self.edit("action.js", "local\nline2\nremote\n")
+        self.server_update(3, js="line1\nline2\nREMOTE\n")
+        output = self.pull()
+        self.assertIn("updated", output)
+        self.assertEqual(self.read("action.js"), "local\nline2\nREMOTE\n")
+        # the local change is pushed over the new version
+        self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertEqual(
+            self.client.updates[-1],
+            ("cloud_action", "a3", dict(js="local\nline2\nREMOTE\n")),
+        )
+
+    def test_merge_after_push(self):
+        self.edit("action.js", "line1\nline2\nline3\n")
+        self.cmd(cmd_cloud.cmd_cloud_push)
+        self.edit("action.js", "local\nline2\nline3\n")
+        self.server_update(3, js="line1\nline2\nremote\n")
+        output = self.pull()
+        self.assertEqual(output.splitlines()[-1], "1 changed, 0 conflicts")
+        self.assertEqual(self.read("action.js"), "local\nline2\nremote\n")
+
+    def test_keep_local(self):
+        self.edit("action.js", "local")
+        self.server_update(3, description="cloud3")
+        self.pull()
+        self.assertEqual(self.read("action.js"), "local")
+
+    def test_conflict(self):
+        self.edit("action.js", "local\n")
+        self.server_update(3, js="remote\n")
+        with self.assertRaises(errors.Error):
+            self.pull()
+        self.assertIn(
+            "<<<<<<< local\nlocal\n=======\n", self.read("action.js")
+        )
+
+    def test_push_after_conflict(self):
+        self.edit("action.js", "local\n")
+        self.server_update(3, js="remote\n")
+        with self.assertRaises(errors.Error):
+            self.pull()
+        output = self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertIn(
+            "unmerged acme/cloud_action/cloud3__a3: action.js", output
+        )
+        self.assertEqual(self.client.updates, [])
+
+        # still unresolved after the next server change
+        self.server_update(3, description="cloud3", js="remote\n")
+        with self.assertRaises(errors.Error):
+            self.pull()
+        self.cmd(cmd_cloud.cmd_cloud_push, force=True)
+        self.assertEqual(self.client.updates, [])
+
+        self.edit("action.js", "resolved\n")
+        self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertEqual(
+            self.client.updates,
+            [("cloud_action", "a3", dict(js="resolved\n"))],
+        )
+        objects = read_manifest(os.path.join(self.tmpdir.name, "company"))
+        self.assertNotIn("conflicts", objects["acme/cloud_action/cloud3__a3"])
+
+    def test_rename_and_remove(self):
+        self.server_update(1, description="renamed")
+        del self.client.objects["cloud_action"][0]
+        output = self.pull()
+        actions = os.path.join(
+            self.tmpdir.name, "company", "acme", "cloud_action"
+        )
+        self.assertEqual(
+            sorted(os.listdir(actions)),
+            ["cloud2__a2", "cloud3__a3", "cloud4__a4", "renamed__a1"],
+        )
+        self.assertIn("removed  acme/cloud_action/cloud0__a0", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from ocsw import errors
+from ocsw.api.pagination import PaginationMixin
+from ocsw.cmd import cmd_cloud
+
+from .helpers import response, run
+
+
+class FakeClient(PaginationMixin):
+    current_company = "acme"
+
+    def __init__(self):
+        self.objects = dict(
+            edge_action=[
+                dict(id="e1", companyId="c1", description="edge", version=1)
+            ],
+            cloud_action=[
+                dict(
+                    id=f"a{idx}",
+                    companyId="c1",
+                    description=f"cloud{idx}",
+                    source="/acme/in",
+                    version=1,
+                    js=f"function () {{ return {idx}; }}",
+                )
+                for idx in range(5)
+            ],
+        )
+        self.updates = []
+        self.inspected = []
+
+    async def companies(self, **_kwargs):
+        return response([dict(id="c1", name="acme")])
+
+    async def firmwares(self, **_kwargs):
+        return response([])
+
+    async def blueprints(self, **_kwargs):
+        return response([])
+
+    async def edge_actions(self, **_kwargs):
+        return response(self.objects["edge_action"])
+
+    async def actions(self, **_kwargs):
+        return response(self.objects["cloud_action"])
+
+    async def inspect(self, kind, object_id):
+        self.inspected.append(object_id)
+        for item in self.objects[kind]:
+            if item["id"] == object_id:
+                return response(dict(item))
+
+    async def inspect_action(self, object_id, **_kwargs):
+        return await self.inspect("cloud_action", object_id)
+
+    async def inspect_edge_action(self, object_id, **_kwargs):
+        return await self.inspect("edge_action", object_id)
+
+    async def update(self, kind, object_id, props):
+        self.updates.append((kind, object_id, props))
+        for item in self.objects[kind]:
+            if item["id"] == object_id:
+                item.update(props, version=item["version"] + 1)
+                return response(item)
+
+    async def update_action(self, object_id, props=None, **_kwargs):
+        return await self.update("cloud_action", object_id, props)
+
+    async def update_edge_action(self, object_id, props=None, **_kwargs):
+        return await self.update("edge_action", object_id, props)
+
+
+class CloudTreeTestCase(unittest.TestCase):
+    """Fetched tree of FakeClient objects."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config_path = self.tmpdir.name
+        self.client = FakeClient()
+        self.cmd(cmd_cloud.cmd_cloud_fetch)
+        self.path = os.path.join(
+            self.tmpdir.name, "company", "acme", "cloud_action", "cloud3__a3"
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def cmd(self, func, **kwargs):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            run(func(self.client, self.config_path, "config.json", **kwargs))
+        return stdout.getvalue()
+
+    def edit(self, name, text):
+        with open(os.path.join(self.path, name), "w") as fileptr:
+            fileptr.write(text)
+
+
+class TestCloudPush(CloudTreeTestCase):
+    def test_up_to_date(self):
+        output = self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertEqual(output, "Everything up-to-date\n")
+
+    def test_push_one(self):
+        self.edit("action.js", "function () { return 42; }")
+        output = self.cmd(cmd_cloud.cmd_cloud_push, dry_run=True)
+        self.assertIn("update", output)
+        self.assertEqual(self.client.updates, [])
+
+        self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertEqual(
+            self.client.updates,
+            [("cloud_action", "a3", dict(js="function () { return 42; }"))],
+        )
+        output = self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertEqual(output, "Everything up-to-date\n")
+
+    def test_meta(self):
+        self.edit(
+            "meta.yaml",
+            "description: renamed\ndisabled: true\nsource: /acme/in\n",
+        )
+        self.cmd(cmd_cloud.cmd_cloud_push)
+        props = self.client.updates[0][2]
+        self.assertEqual(
+            props,
+            dict(description="renamed", disabled=True, source="/acme/in"),
+        )
+
+    def test_conflict(self):
+        self.edit("action.js", "local")
+        self.client.objects["cloud_action"][3]["version"] = 2
+        output = self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertIn("conflict", output)
+        self.assertEqual(self.client.updates, [])
+        self.cmd(cmd_cloud.cmd_cloud_push, force=True)
+        self.assertEqual(len(self.client.updates), 1)
+
+    def test_invalid_meta(self):
+        self.edit(
+            "meta.yaml",
+            "<<<<<<< local\ndescription: a\n=======\n"
+            "description: b\n>>>>>>> remote\n",
+        )
+        self.edit("action.js", "local")
+        output = self.cmd(cmd_cloud.cmd_cloud_push)
+        self.assertIn(
+            "unmerged acme/cloud_action/cloud3__a3: meta.yaml", output
+        )
+        self.assertEqual(self.client.updates, [])
+
+    def test_failed(self):
+        async def fail(*_args, **_kwargs):
+            raise errors.Error("update rejected")
+
+        self.client.update_action = fail
+        self.edit("action.js", "local")
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            with self.assertRaises(errors.Error):
+                run(
+                    cmd_cloud.cmd_cloud_push(
+                        self.client, self.config_path, "config.json"
+                    )
+                )
+        self.assertIn(
+            "failed   acme/cloud_action/cloud3__a3: update rejected",
+            stdout.getvalue(),
+        )
+
+    def test_not_fetched(self):
+        with self.assertRaises(errors.Error):
+            run(
+                cmd_cloud.cmd_cloud_push(
+                    self.client, os.path.join(self.config_path, "x"), "c"
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import unittest
+
+from ocsw import errors
+from ocsw.api.device import DeviceApiMixin
+
+from .helpers import response, run
+
+
+class FakeClient(DeviceApiMixin):
+    current_company = "acme"
+
+    def __init__(self, count, supports_filter=True):
+        self.items = [
+            dict(id=f"d{idx:04}", name=f"dev-{idx}", report=idx)
+            for idx in range(count)
+        ]
+        self.supports_filter = supports_filter
+        self.requests = []
+
+    async def devices(self, filters=None, fields=None, limit=None, **_kw):
+        self.requests.append(("devices", filters, fields))
+        if not self.supports_filter:
+            raise errors.APIError("unsupported filter")
+        ids_expr, names_expr = filters.split(" || ")
+        ids = json.loads(ids_expr.partition(" in ")[2])
+        names = json.loads(names_expr.partition(" in ")[2])
+        found = [
+            item
+            for item in self.items
+            if item["id"] in ids or item["name"] in names
+        ]
+        return response(found[:limit])
+
+    async def inspect_device(self, device_identifier, **_kwargs):
+        self.requests.append(("inspect", device_identifier))
+        for item in self.items:
+            if device_identifier in (item["id"], item["name"]):
+                return response(item)
+        raise errors.NotFound(f"{device_identifier} not found")
+
+
+class TestInspectDevices(unittest.TestCase):
+    def test_chunks(self):
+        client = FakeClient(2000)
+        identifiers = [f"d{idx:04}" for idx in range(0, 2000, 2)] + [
+            f"dev-{idx}" for idx in range(1, 2000, 2)
+        ]
+        devices = run(client.inspect_devices(identifiers, fields=["report"]))
+        self.assertEqual(len(client.requests), 40)
+        self.assertEqual(devices[0]["id"], "d0000")
+        self.assertEqual(devices[1000]["name"], "dev-1")
+        self.assertEqual(client.requests[0][2], ["report", "id", "name"])
+
+    def test_fallback(self):
+        client = FakeClient(10)
+        devices = run(client.inspect_devices(["dev-3", "d0001", "dev-3"]))
+        self.assertEqual([item["report"] for item in devices], [3, 1, 3])
+        self.assertEqual(len(client.requests), 1)
+
+        client = FakeClient(10, supports_filter=False)
+        devices = run(client.inspect_devices(["dev-3", "d0001"]))
+        self.assertEqual([item["report"] for item in devices], [3, 1])
+        self.assertEqual(len(client.requests), 3)
+
+    def test_not_found(self):
+        client = FakeClient(10)
+        with self.assertRaises(errors.NotFound):
+            run(client.inspect_devices(["dev-3", "unknown"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+
+import aiohttp
+
+from ocsw.utils.limiter import Limiter
+
+from .helpers import EventClient, run
+
+
+class TestEventExport(unittest.TestCase):
+    def test_partitions(self):
+        # three events share every millisecond
+        events = [
+            dict(id=f"e{idx}", creationDate=1000 + idx // 3)
+            for idx in range(3000)
+        ]
+        client = EventClient(events, delay=0.001)
+
+        async def export():
+            exported = []
+            async for page in client.export_events(
+                "/acme/s",
+                1000,
+                2000,
+                partitions=7,
+                limiter=Limiter(4),
+                page_size=50,
+            ):
+                exported.extend(page)
+            return exported
+
+        exported = run(export())
+        self.assertEqual(
+            [event["id"] for event in exported],
+            [event["id"] for event in events],
+        )
+        self.assertEqual(client.in_flight.peak, 4)
+        self.assertEqual({start for _, _, start in client.requests}, {0})
+
+    def test_same_date(self):
+        events = [dict(id=f"e{idx}", creationDate=5) for idx in range(25)]
+        client = EventClient(events, delay=0.001)
+
+        async def export():
+            exported = []
+            async for page in client.export_events(
+                "/acme/s", 0, 10, partitions=3, page_size=10
+            ):
+                exported.extend(page)
+            return exported
+
+        self.assertEqual(len(run(export())), 25)
+        self.assertIn(10, [start for _, _, start in client.requests])
+
+    def test_network_error(self):
+        events = [dict(id=f"e{idx}", creationDate=idx) for idx in range(100)]
+        client = EventClient(events, delay=0.001)
+        events_page = client.events
+
+        async def failing(source, start=0, **kwargs):
+            if start or "50" in str(kwargs.get("filters")):
+                raise aiohttp.ClientConnectionError("connection reset")
+            return await events_page(source, start=start, **kwargs)
+
+        client.events = failing
+
+        async def export():
+            async for _ in client.export_events(
+                "/acme/s", 0, 100, partitions=2, page_size=10
+            ):
+                pass
+
+        with self.assertRaises(aiohttp.ClientConnectionError):
+            run(asyncio.wait_for(export(), 5))
+
+    def test_close(self):
+        events = [dict(id=f"e{idx}", creationDate=idx) for idx in range(100)]
+        client = EventClient(events, delay=0.001)
+
+        async def export():
+            pages = client.export_events(
+                "/acme/s", 0, 100, partitions=4, page_size=10
+            )
+            async for _ in pages:
+                break
+            await pages.aclose()
+            # the partition tasks are finished when the export is closed
+            return client.in_flight.running
+
+        self.assertEqual(run(export()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from ocsw.utils.export_tree import (
+    MANIFEST_FILENAME,
+    BackgroundWriter,
+    BlobStore,
+    ExportTree,
+    read_file,
+)
+
+
+def files(action):
+    return lambda: {
+        "action.js": action["js"].encode(),
+        "meta.yaml": str(action["version"]).encode(),
+    }
+
+
+class TestExportTree(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmpdir.name, "export")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def export(self, actions, incremental=True, **kwargs):
+        with ExportTree(self.root, incremental=incremental, **kwargs) as tree:
+            for action in actions:
+                tree.write(
+                    action["name"],
+                    action["id"],
+                    action["version"],
+                    files(action),
+                )
+        return tree
+
+    def read(self, *path):
+        with open(os.path.join(self.root, *path)) as fileptr:
+            return fileptr.read()
+
+    def test_skip_unchanged(self):
+        actions = [dict(id="a1", name="a", version=1, js="x")]
+        self.export(actions)
+        filename = os.path.join(self.root, "a", "action.js")
+        mtime = os.stat(filename).st_mtime_ns
+
+        rendered = []
+        with ExportTree(self.root) as tree:
+            tree.write("a", "a1", 1, lambda: rendered.append(1))
+        self.assertEqual(rendered, [])
+        self.assertEqual(tree.stats["skipped"], 1)
+        self.assertEqual(os.stat(filename).st_mtime_ns, mtime)
+
+    def test_rewrite_changed(self):
+        self.export([dict(id="a1", name="a", version=1, js="x")])
+        tree = self.export([dict(id="a1", name="a", version=2, js="y")])
+        self.assertEqual(self.read("a", "action.js"), "y")
+        self.assertEqual(self.read("a", "meta.yaml"), "2")
+        self.assertEqual(tree.stats["written"], 1)
+
+    def test_remove_deleted(self):
+        self.export(
+            [
+                dict(id="a1", name="a", version=1, js="x"),
+                dict(id="b1", name="b", version=1, js="z"),
+            ]
+        )
+        tree = self.export([dict(id="a1", name="a", version=1, js="x")])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "b")))
+        self.assertTrue(
+            os.path.isfile(os.path.join(self.root, "a", "meta.yaml"))
+        )
+        self.assertEqual(tree.stats, dict(written=0, skipped=1, removed=1))
+
+    def test_manifest(self):
+        self.export([dict(id="a1", name="a", version=3, js="x")])
+        with open(os.path.join(self.root, MANIFEST_FILENAME)) as fileptr:
+            objects = json.load(fileptr)["objects"]
+        self.assertEqual(objects["a"]["id"], "a1")
+        self.assertEqual(objects["a"]["version"], 3)
+        self.assertEqual(
+            set(objects["a"]["files"]), {"action.js", "meta.yaml"}
+        )
+
+    def test_not_incremental(self):
+        self.export([dict(id="a1", name="a", version=1, js="x")])
+        with open(os.path.join(self.root, "extra"), "w") as fileptr:
+            fileptr.write("extra")
+        self.export([dict(id="a1", name="a", version=1, js="x")], False)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "extra")))
+        self.assertEqual(self.read("a", "action.js"), "x")
+
+    def test_background_writer(self):
+        actions = [
+            dict(id=f"a{idx}", name=f"a{idx}", version=1, js=str(idx))
+            for idx in range(10)
+        ]
+
+        async def export(tree):
+            await asyncio.gather(
+                *[
+                    tree.awrite(
+                        action["name"],
+                        action["id"],
+                        action["version"],
+                        files(action),
+                    )
+                    for action in actions
+                ]
+            )
+
+        for options in (dict(fsync=True), dict(atomic=False)):
+            with BackgroundWriter(workers=2, queue_size=3) as writer:
+                with ExportTree(
+                    self.root, incremental=False, writer=writer, **options
+                ) as tree:
+                    asyncio.get_event_loop().run_until_complete(export(tree))
+            self.assertEqual(tree.stats["written"], 10)
+            self.assertEqual(self.read("a7", "action.js"), "7")
+
+    def test_blobs(self):
+        blobs = BlobStore(os.path.join(self.tmpdir.name, "objects"))
+        options = dict(blobs=blobs, blob_names=["action.js"])
+        actions = [
+            dict(id=f"a{idx}", name=f"a{idx}", version=1, js="same")
+            for idx in range(3)
+        ]
+        self.export(actions, **options)
+        self.assertEqual(blobs.stats, dict(written=1, reused=2))
+        self.assertFalse(
+            os.path.exists(os.path.join(self.root, "a1", "action.js"))
+        )
+        filename = os.path.join(self.root, "a1", "action.js")
+        self.assertEqual(read_file(filename), b"same")
+        self.assertEqual(
+            read_file(os.path.join(self.root, "a1", "meta.yaml")), b"1"
+        )
+
+        actions[0].update(version=2, js="changed")
+        self.export(actions, **options)
+        self.assertEqual(
+            read_file(os.path.join(self.root, "a0", "action.js")), b"changed"
+        )
+        self.assertEqual(blobs.prune(self.root), 0)
+
+        # switching off the blob store restores plain files
+        tree = self.export(actions)
+        self.assertEqual(tree.stats["written"], 3)
+        self.assertEqual(self.read("a2", "action.js"), "same")
+        self.assertFalse(os.path.exists(filename + ".ref"))
+        self.assertEqual(blobs.prune(self.root), 0)
+        self.export(actions[1:])
+        self.assertEqual(blobs.prune(self.root), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
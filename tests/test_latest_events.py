@@ -0,0 +1,54 @@
+import unittest
+
+from ocsw import errors
+
+from .helpers import EventClient, run
+
+
+class NoFilterClient(EventClient):
+    """Client rejecting path filters of events across streams."""
+
+    async def events_by_stream_path(self, stream_path, **kwargs):
+        if not stream_path:
+            raise errors.APIError("unsupported filter")
+        return await super().events_by_stream_path(stream_path, **kwargs)
+
+
+def inbox(idx):
+    return f"/acme/devices/dev-{idx}/:inbox"
+
+
+class TestLatestEvents(unittest.TestCase):
+    def test_chunks(self):
+        events = [
+            dict(path=inbox(idx), creationDate=idx * 10 + num)
+            for idx in range(100)
+            for num in range(3)
+        ]
+        client = EventClient(events)
+        paths = [inbox(idx) for idx in range(101)]
+        latest = run(client.latest_events(paths, page_size=200))
+        self.assertEqual(len(client.requests), 3)
+        self.assertEqual(latest[inbox(7)]["creationDate"], 72)
+        self.assertIsNone(latest[inbox(100)])
+
+    def test_fallback(self):
+        events = [dict(path=inbox(0), creationDate=num) for num in range(50)]
+        events.append(dict(path=inbox(1), creationDate=-1))
+        client = EventClient(events)
+        latest = run(
+            client.latest_events(
+                [inbox(0), inbox(1)], page_size=10, max_pages=2
+            )
+        )
+        self.assertEqual(latest[inbox(0)]["creationDate"], 49)
+        self.assertEqual(latest[inbox(1)]["creationDate"], -1)
+        self.assertEqual(len(client.requests), 3)
+
+        client = NoFilterClient(events)
+        latest = run(client.latest_events([inbox(0), inbox(1)]))
+        self.assertEqual(latest[inbox(1)]["creationDate"], -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import asyncio
+import unittest
+
+from ocsw.utils.limiter import Limiter
+
+from .helpers import InFlight, run
+
+
+class TestLimiter(unittest.TestCase):
+    def test_concurrency(self):
+        in_flight = InFlight()
+
+        async def task(idx):
+            await in_flight.wait()
+            return idx
+
+        limiter = Limiter(3)
+        result = run(limiter.gather(*[task(idx) for idx in range(10)]))
+        self.assertEqual(result, list(range(10)))
+        self.assertEqual(in_flight.peak, 3)
+
+    def test_rate(self):
+        loop = asyncio.get_event_loop()
+        started = []
+
+        async def task():
+            started.append(loop.time())
+
+        run(Limiter(10, rate=100).gather(*[task() for _ in range(5)]))
+        self.assertGreaterEqual(started[-1] - started[0], 0.039)
+
+    def test_cancel_rate_wait(self):
+        limiter = Limiter(1, rate=10)
+
+        async def task():
+            return True
+
+        async def cancel():
+            await limiter.run(task())
+            waiting = task()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(limiter.run(waiting), 0.01)
+            waiting.close()
+            # the slot of the cancelled call is released
+            return await asyncio.wait_for(limiter.run(task()), 1)
+
+        self.assertTrue(run(cancel()))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Limiter(0)
+        with self.assertRaises(ValueError):
+            Limiter(1, rate=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
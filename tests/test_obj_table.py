@@ -1,7 +1,7 @@
 import unittest
 from datetime import date, datetime
 
-from ocsw.utils.table import ObjTable, PropTable
+from ocsw.utils.table import ObjTable, PropTable, column_fields
 
 
 class TestObjTable(unittest.TestCase):
@@ -41,6 +41,20 @@ class TestObjTable(unittest.TestCase):
         )
         self.assertEqual(str(table), snapshot)
 
+    def test_column_fields(self):
+        columns = [
+            dict(field="name", title="NAME"),
+            dict(field="hardware.fsn", title="FSN"),
+            dict(field="hardware.imei", title="IMEI"),
+            dict(title="COUNT", render=lambda d, c: len(d)),
+            dict(field="event.0.creationDate", fields=[]),
+            dict(field="tags", title="TAGS"),
+        ]
+        self.assertEqual(
+            column_fields(columns, extra=["id", "name"]),
+            ["name", "hardware", "tags", "id"],
+        )
+
     def test_props_table_common(self):
 
         item = {"date": 1595577615.600, "model": "MODEL-1234"}
@@ -0,0 +1,88 @@
+import io
+import json
+import unittest
+
+from ocsw.api.pagination import PaginationMixin
+from ocsw.utils.output import print_records
+
+from .helpers import paginate, run
+
+
+class FakeClient(PaginationMixin):
+    def __init__(self, items):
+        self.items = items
+        self.requests = []
+
+    async def objects(self, start=0, limit=None):
+        self.requests.append((start, limit))
+        return {"body": paginate(self.items, start, limit)}
+
+
+COLUMNS = [
+    dict(field="id", title="ID"),
+    dict(field="report.bars", title="BARS"),
+    dict(field="tags", title="TAGS"),
+]
+DATA = [
+    dict(id="d1", report=dict(bars=3), tags=dict(a="1")),
+    dict(id="d2", report=dict()),
+]
+
+
+class TestOutput(unittest.TestCase):
+    def format(self, output, records=DATA):
+        stream = io.StringIO()
+        run(print_records(records, COLUMNS, output, stream))
+        return stream.getvalue()
+
+    def test_ndjson(self):
+        snapshot = (
+            '{"id":"d1","report":{"bars":3},"tags":{"a":"1"}}\n'
+            '{"id":"d2","report":{}}\n'
+        )
+        self.assertEqual(self.format("ndjson"), snapshot)
+
+    def test_csv(self):
+        snapshot = "id,report.bars,tags\n" 'd1,3,"{""a"": ""1""}"\n' "d2,,\n"
+        self.assertEqual(self.format("csv"), snapshot)
+
+    def test_tsv(self):
+        snapshot = 'id\treport.bars\ttags\nd1\t3\t"{""a"": ""1""}"\nd2\t\t\n'
+        self.assertEqual(self.format("tsv"), snapshot)
+
+    def test_json(self):
+        self.assertEqual(self.format("json", []), "[]\n")
+        self.assertEqual(
+            self.format("json"), json.dumps(DATA, indent=2) + "\n"
+        )
+
+    def test_paginate(self):
+        client = FakeClient(list(range(7)))
+
+        async def collect(**kwargs):
+            return [
+                item
+                async for item in client.iter_items(client.objects, **kwargs)
+            ]
+
+        self.assertEqual(run(collect(page_size=3)), list(range(7)))
+        self.assertEqual(client.requests, [(0, 3), (3, 3), (6, 3)])
+
+        client.requests = []
+        self.assertEqual(
+            run(collect(page_size=3, limit=4, start=1)), [1, 2, 3, 4]
+        )
+        self.assertEqual(client.requests, [(1, 3), (4, 1)])
+
+    def test_async_records(self):
+        async def records():
+            for item in DATA:
+                yield item
+
+        self.assertEqual(
+            self.format("ndjson", records()), self.format("ndjson")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
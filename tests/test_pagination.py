@@ -0,0 +1,149 @@
+import unittest
+
+from ocsw.api.pagination import KeysetCursor, PaginationMixin
+from ocsw.utils.predicate import compile_filter
+
+from .helpers import paginate, run
+
+# keys 0 0 0 1 2 2 2 2 2 2 2 3 4 4 5 ...
+RECORDS = [
+    dict(id=f"r{idx:02}", creationDate=key, name=f"n{idx:02}")
+    for idx, key in enumerate(
+        [0, 0, 0, 1] + [2] * 7 + [3, 4, 4] + list(range(5, 16))
+    )
+]
+
+
+class FakeClient(PaginationMixin):
+    def __init__(self, records=RECORDS):
+        self.records = records
+        self.requests = []
+
+    async def _list(
+        self,
+        filters=None,
+        sort=None,
+        order=None,
+        start=0,
+        limit=None,
+        fields=None,
+    ):
+        self.requests.append(
+            dict(filters=filters and str(filters), start=start, fields=fields)
+        )
+        records = list(self.records)
+        if sort:
+            records.sort(key=lambda r: r[sort], reverse=order == "desc")
+        if filters:
+            records = list(filter(compile_filter(filters), records))
+        return dict(body=paginate(records, start, limit))
+
+    async def events(self, source, **query):
+        return await self._list(**query)
+
+    async def devices(self, **query):
+        return await self._list(**query)
+
+
+def collect(client, func, *args, **kwargs):
+    async def iterate():
+        return [
+            item["id"]
+            async for item in client.iter_items(func, *args, **kwargs)
+        ]
+
+    return run(iterate())
+
+
+class TestKeysetCursor(unittest.TestCase):
+    def test_add(self):
+        cursor = KeysetCursor("k")
+        self.assertTrue(cursor.add(dict(id="a", k=1)))
+        self.assertFalse(cursor.add(dict(id="a", k=1)))
+        self.assertTrue(cursor.add(dict(id="b", k=1)))
+        self.assertFalse(cursor.add(dict(id="c", k=0)))
+        self.assertTrue(cursor.add(dict(id="c", k=2)))
+        self.assertEqual((cursor.value, cursor.ids), (2, {"c"}))
+        self.assertEqual(str(cursor.condition(cursor.value)), "k>=2")
+
+        cursor = KeysetCursor("k", 5, ["x"], descending=True)
+        self.assertFalse(cursor.add(dict(id="y", k=6)))
+        self.assertTrue(cursor.add(dict(id="y", k=4)))
+        self.assertEqual(str(cursor.condition(4)), "k<=4")
+
+
+class TestKeysetPagination(unittest.TestCase):
+    def test_duplicate_keys(self):
+        client = FakeClient()
+        ids = collect(client, client.events, "/s", page_size=4)
+        self.assertEqual(ids, [record["id"] for record in RECORDS])
+        self.assertEqual(client.requests[0]["filters"], None)
+        self.assertEqual(client.requests[1]["filters"], "creationDate>=1")
+        # the run of seven records with key 2 is longer than a page
+        self.assertIn(4, [request["start"] for request in client.requests])
+        self.assertLess(max(r["start"] for r in client.requests), 8)
+
+    def test_descending(self):
+        client = FakeClient()
+        ids = collect(client, client.events, "/s", order="desc", page_size=3)
+        expected = [
+            record["id"]
+            for record in sorted(
+                RECORDS, key=lambda r: r["creationDate"], reverse=True
+            )
+        ]
+        self.assertEqual(ids, expected)
+        self.assertTrue(
+            client.requests[1]["filters"].startswith("creationDate<=")
+        )
+
+    def test_limit_and_filters(self):
+        client = FakeClient()
+        ids = collect(
+            client,
+            client.events,
+            "/s",
+            limit=9,
+            page_size=4,
+            filters='name!="n05"',
+            fields=["name"],
+        )
+        self.assertEqual(
+            ids,
+            ["r00", "r01", "r02", "r03", "r04", "r06", "r07", "r08", "r09"],
+        )
+        self.assertEqual(
+            client.requests[1]["filters"], '(name!="n05") && creationDate>=1'
+        )
+        self.assertEqual(
+            client.requests[0]["fields"], ["name", "creationDate", "id"]
+        )
+
+    def test_offsets(self):
+        expected = [record["id"] for record in RECORDS]
+        for kwargs in (
+            dict(func="events", keyset=False),
+            dict(func="devices"),
+            dict(func="events", sort="name"),
+        ):
+            client = FakeClient()
+            func = getattr(client, kwargs.pop("func"))
+            args = ("/s",) if func == client.events else ()
+            ids = collect(client, func, *args, page_size=5, **kwargs)
+            self.assertEqual(ids, expected)
+            self.assertTrue(all(r["filters"] is None for r in client.requests))
+            self.assertEqual(client.requests[-1]["start"], 25)
+
+        client = FakeClient()
+        ids = collect(client, client.events, "/s", start=20, page_size=5)
+        self.assertEqual(ids, expected[20:])
+        self.assertEqual(client.requests[-1]["start"], 25)
+
+    def test_explicit_key(self):
+        client = FakeClient()
+        ids = collect(client, client.devices, keyset="creationDate")
+        self.assertEqual(ids, [record["id"] for record in RECORDS])
+
+
+if __name__ == "__main__":
+    unittest.main()
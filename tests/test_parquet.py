@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+from ocsw import errors
+from ocsw.utils import parquet
+
+COLUMNS = [
+    ("id", "string"),
+    ("report.battery.voltage.value", "float64"),
+    ("synced", "bool"),
+    ("tags", "string"),
+]
+DATA = [
+    dict(id="d1", report=dict(battery=dict(voltage=dict(value=4))), tags={}),
+    dict(id="d2", synced=True, tags=dict(a="1")),
+    dict(id="d3", report=dict(battery=dict(voltage=dict(value="?")))),
+]
+
+
+class TestParquet(unittest.TestCase):
+    def test_flatten(self):
+        rows = [parquet.flatten(item, COLUMNS) for item in DATA]
+        self.assertEqual(
+            [list(row.values()) for row in rows],
+            [
+                ["d1", 4.0, None, "{}"],
+                ["d2", None, True, '{"a": "1"}'],
+                ["d3", None, None, None],
+            ],
+        )
+
+    def test_column(self):
+        self.assertEqual(parquet.column("a.b"), ("a.b", "string"))
+        self.assertEqual(parquet.column("a:int64"), ("a", "int64"))
+        self.assertRaises(ValueError, parquet.column, "a:int8")
+
+    def test_duplicate_columns(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "devices.parquet")
+            with self.assertRaises(errors.Error):
+                parquet.ParquetWriter(filename, COLUMNS + [("tags", "string")])
+            self.assertFalse(os.path.exists(filename))
+
+    @unittest.skipIf(parquet.pyarrow is None, "pyarrow is not installed")
+    def test_row_groups(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "devices.parquet")
+            writer = parquet.ParquetWriter(filename, COLUMNS, row_group_size=2)
+            for item in DATA:
+                writer.write(item)
+            writer.close()
+
+            metadata = parquet.pyarrow.parquet.read_metadata(filename)
+            self.assertEqual(metadata.num_rows, 3)
+            self.assertEqual(metadata.num_row_groups, 2)
+            table = parquet.pyarrow.parquet.read_table(filename)
+            self.assertEqual(
+                table.column("id").to_pylist(), ["d1", "d2", "d3"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from ocsw.utils.predicate import compile_filter, filter_records
+from ocsw.utils.query_params import Field
+
+RECORDS = [
+    dict(name="a", path="/acme/devices/a", tags=dict(site="x"), bars=1),
+    dict(name="b", path="/acme/devices/b", tags=dict(site="y"), bars=4),
+    dict(name='c "q"', path="/other/c", elems=[dict(v=2.5)]),
+]
+
+
+def names(expression):
+    return [item["name"] for item in filter_records(RECORDS, expression)]
+
+
+class TestPredicate(unittest.TestCase):
+    def test_comparisons(self):
+        self.assertEqual(names("bars>=1 && bars<4"), ["a"])
+        self.assertEqual(names('name=="c \\"q\\""'), ['c "q"'])
+        self.assertEqual(names("elems.0.v==2.5"), ['c "q"'])
+        self.assertEqual(names("elems.1.v==null"), ["a", "b", 'c "q"'])
+        self.assertEqual(names("bars!=1"), ["b", 'c "q"'])
+        # a missing field does not compare as a number
+        self.assertEqual(names("bars<10"), ["a", "b"])
+
+    def test_logic(self):
+        self.assertEqual(names("!(bars==1) && EXISTS tags.site"), ["b"])
+        self.assertEqual(
+            names('bars==4 || tags.site=="x" && bars==1'), ["a", "b"]
+        )
+        self.assertEqual(names(""), ["a", "b", 'c "q"'])
+
+    def test_builder(self):
+        path = Field("path")
+        expr = path.startswith("/acme/") & ~Field("tags.site").in_(["y"])
+        self.assertEqual(names(expr), ["a"])
+        self.assertEqual(
+            names(path.startswith("/acme/").compile()), ["a", "b"]
+        )
+
+    def test_invalid(self):
+        for expression in (
+            "name==",
+            "name = 1",
+            "(bars>1",
+            "bars>1 bars<2",
+            "STARTSWITH(path, 1)",
+            "name in []",
+            "'a'==1",
+        ):
+            with self.assertRaises(ValueError, msg=expression):
+                compile_filter(expression)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from ocsw.utils.query_params import (
+    And,
+    Compare,
+    Field,
+    Not,
+    Or,
+    Raw,
+    query_filter,
+    query_params,
+)
+
+
+class TestFilter(unittest.TestCase):
+    def test_quoting(self):
+        self.assertEqual(
+            str(Field("description") == 'a "b"\\c\n'),
+            r'description=="a \"b\"\\c\n"',
+        )
+        self.assertEqual(str(Compare("synced", "==", True)), "synced==true")
+        self.assertEqual(str(Field("report.bars") >= 2.5), "report.bars>=2.5")
+        self.assertEqual(str(Field("id").in_(["a", 1])), 'id in ["a",1]')
+
+    def test_precedence(self):
+        name, site = Field("name"), Field("tags.site")
+        expr = (name == "a") & ((site == "x") | (site == "y")) & (name != "b")
+        self.assertEqual(
+            str(expr),
+            'name=="a" && (tags.site=="x" || tags.site=="y") && name!="b"',
+        )
+        self.assertEqual(
+            str(~((name == "a") & site.exists())),
+            '!(name=="a" && EXISTS tags.site)',
+        )
+        self.assertEqual(
+            str(Or(Raw("a>1 && b<2"), Not(Field("c") == 1))),
+            "(a>1 && b<2) || !(c==1)",
+        )
+        self.assertEqual(
+            str(And(Raw("a>1 || b<2"), Field("path").startswith("/x/"))),
+            '(a>1 || b<2) && STARTSWITH(path,"/x/")',
+        )
+
+    def test_validation(self):
+        for make in (
+            lambda: Field("name) || (1"),
+            lambda: Field("tags.") == "x",
+            lambda: Field("name") == dict(a=1),
+            lambda: Field("name").in_([]),
+            lambda: Field("path").startswith(1),
+            lambda: And(),
+        ):
+            with self.assertRaises(ValueError):
+                make()
+
+    def test_query_params(self):
+        self.assertEqual(query_filter(None), "")
+        self.assertEqual(query_filter("a==1"), "a==1")
+        self.assertEqual(
+            query_params(filters=[Field("a") == 1, "b>2 || c<3"]),
+            dict(filter="a==1 && (b>2 || c<3)"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import yaml
+
+from ocsw.utils.serializer import Dumper, PyDumper, dump_yaml
+
+BLUEPRINT = dict(
+    displayName="Blueprint",
+    version=2,
+    localActions={"l1": dict(version=1)},
+    observations={
+        "/redSensor/light/value": {
+            "obs": dict(
+                destination="cloudInterface",
+                description="Łódź °C",
+                js="function (event) {  \n  return event;\n}\n",
+                period=10.5,
+                enabled=True,
+                select=None,
+            )
+        }
+    },
+)
+
+
+class TestSerializer(unittest.TestCase):
+    def test_same_as_python_dumper(self):
+        self.assertEqual(dump_yaml(BLUEPRINT), dump_yaml(BLUEPRINT, PyDumper))
+
+    def test_multiline_block_style(self):
+        text = dump_yaml(BLUEPRINT).decode("utf-8")
+        self.assertIn("js: |-\n", text)
+        self.assertIn("Łódź", text)
+        data = yaml.safe_load(text)
+        js = data["observations"]["/redSensor/light/value"]["obs"]["js"]
+        self.assertEqual(js, "function (event) {\n  return event;\n}")
+
+    def test_libyaml(self):
+        if yaml.__with_libyaml__:
+            self.assertTrue(issubclass(Dumper, yaml.CSafeDumper))
+        else:
+            self.assertTrue(issubclass(Dumper, yaml.SafeDumper))
+
+
+if __name__ == "__main__":
+    unittest.main()
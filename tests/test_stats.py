@@ -0,0 +1,176 @@
+import io
+import json
+import random
+import statistics
+import unittest
+from contextlib import redirect_stdout
+
+from ocsw.utils.date_fns import parse_duration
+from ocsw.utils.stats import (
+    EventStats,
+    FieldStats,
+    QuantileSketch,
+    TimeBuckets,
+    print_stats,
+)
+
+from .helpers import EventClient, run
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def test_relative_accuracy(self):
+        rnd = random.Random(1)
+        values = [rnd.lognormvariate(3, 1) for _ in range(10000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for q in (0.01, 0.25, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q) / exact, 1, delta=0.011)
+
+    def test_negative_and_zero(self):
+        sketch = QuantileSketch()
+        for value in (-100, -10, 0, 0, 10):
+            sketch.add(value)
+        self.assertAlmostEqual(sketch.quantile(0), -100, delta=1)
+        self.assertAlmostEqual(sketch.quantile(0.25), -10, delta=0.1)
+        self.assertEqual(sketch.quantile(0.5), 0)
+        self.assertAlmostEqual(sketch.quantile(1), 10, delta=0.1)
+
+    def test_bounded_bins(self):
+        sketch = QuantileSketch(relative_accuracy=0.01, max_bins=64)
+        for exp in range(-300, 300):
+            sketch.add(1.1**exp)
+        self.assertLessEqual(len(sketch.positive), 64)
+        self.assertEqual(sketch.count, 600)
+        # the largest values keep their accuracy
+        self.assertAlmostEqual(sketch.quantile(1) / 1.1**299, 1, delta=0.011)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+        with self.assertRaises(ValueError):
+            QuantileSketch().quantile(2)
+
+
+class TestFieldStats(unittest.TestCase):
+    def test_summary(self):
+        rnd = random.Random(2)
+        values = [rnd.uniform(-5, 50) for _ in range(1000)]
+        stats = FieldStats()
+        for value in values + ["n/a", None, True]:
+            stats.add(value)
+        summary = stats.summary([50, 100])
+        self.assertEqual(summary["count"], 1000)
+        self.assertEqual(summary["missing"], 3)
+        self.assertEqual(summary["min"], min(values))
+        self.assertEqual(summary["max"], max(values))
+        self.assertAlmostEqual(summary["mean"], statistics.mean(values))
+        self.assertAlmostEqual(
+            summary["p50"], statistics.median(values), delta=0.5
+        )
+        self.assertEqual(summary["p100"], max(values))
+
+    def test_no_values(self):
+        summary = FieldStats().summary([50])
+        self.assertEqual(summary["count"], 0)
+        self.assertIsNone(summary["mean"])
+        self.assertIsNone(summary["p50"])
+
+
+class TestTimeBuckets(unittest.TestCase):
+    def test_rates(self):
+        buckets = TimeBuckets(width=1000)
+        for timestamp in (0, 500, 999, 1000, 5500):
+            buckets.add(timestamp)
+        self.assertEqual(
+            list(buckets.rates()),
+            [
+                dict(start=0, count=3, rate=3.0),
+                dict(start=1000, count=1, rate=1.0),
+                dict(start=5000, count=1, rate=1.0),
+            ],
+        )
+
+    def test_widen(self):
+        buckets = TimeBuckets(width=1000, max_buckets=4)
+        for timestamp in range(0, 10000, 100):
+            buckets.add(timestamp)
+        self.assertEqual(buckets.width, 4000)
+        self.assertEqual(
+            [bucket["count"] for bucket in buckets.rates()], [40, 40, 20]
+        )
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration("15m"), 900000)
+        self.assertEqual(parse_duration("250"), 250)
+        for value in ("0s", "1.5h", "1w", ""):
+            with self.assertRaises(ValueError):
+                parse_duration(value)
+
+
+class TestEventStats(unittest.TestCase):
+    def setUp(self):
+        self.events = [
+            dict(
+                id=f"e{idx}",
+                creationDate=10000 + idx * 10,
+                elems=dict(temperature=idx % 50, label="x"),
+            )
+            for idx in range(1000)
+        ]
+        self.client = EventClient(self.events)
+
+    def test_event_stats(self):
+        stats = run(
+            self.client.event_stats(
+                "/acme/s",
+                ["elems.temperature", "elems.label"],
+                until=15000,
+                bucket=1000,
+                partitions=3,
+            )
+        )
+        self.assertEqual(stats.count, 500)
+        temperature, label = stats.summary([50])
+        self.assertEqual(temperature["count"], 500)
+        self.assertEqual(temperature["min"], 0)
+        self.assertEqual(temperature["max"], 49)
+        self.assertAlmostEqual(temperature["mean"], 24.5)
+        self.assertEqual(label["missing"], 500)
+        self.assertEqual(
+            [bucket["rate"] for bucket in stats.rates()], [100.0] * 5
+        )
+
+    def test_empty_range(self):
+        stats = run(
+            self.client.event_stats(
+                "/acme/s", ["elems.temperature"], since=0, until=10000
+            )
+        )
+        self.assertEqual(stats.count, 0)
+        self.assertEqual(list(stats.rates()), [])
+
+    def test_print_stats(self):
+        stats = EventStats(["elems.temperature"], bucket=1000)
+        for event in self.events[:10]:
+            stats.add(event)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            run(print_stats(stats, [90], output="json"))
+        (summary,) = json.loads(out.getvalue())
+        self.assertEqual(summary["field"], "elems.temperature")
+        self.assertEqual(summary["count"], 10)
+        self.assertAlmostEqual(summary["p90"], 8, delta=0.1)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            run(print_stats(stats, rates=True, output="ndjson"))
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [dict(start=10000, count=10, rate=10.0)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
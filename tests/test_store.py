@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+
+from ocsw import errors
+from ocsw.api.offline import OfflineClient
+from ocsw.utils.store import Store
+
+from .helpers import run
+
+DEVICES = [
+    dict(id="d1", name="dev-b", lastEditDate=2, report=dict(bars=1)),
+    dict(id="d2", name="dev-a", lastEditDate=3, report=dict(bars=5)),
+    dict(id="d3", name="dev-c", lastEditDate=1, companyId="c2"),
+]
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        filename = os.path.join(self.tmpdir.name, ".octave", "store.sqlite3")
+        self.store = Store(filename)
+        self.store.upsert("company", [dict(id="c1", name="acme")])
+        self.store.upsert("device", DEVICES, company_id="c1")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_find(self):
+        items = self.store.find("device", company_id="c1", sort="name")
+        self.assertEqual([item["id"] for item in items], ["d2", "d1"])
+
+        items = self.store.find(
+            "device", sort="report.bars", order="desc", fields=["id"]
+        )
+        self.assertEqual(items, [dict(id="d2"), dict(id="d1"), dict(id="d3")])
+
+        items = self.store.find("device", sort="lastEditDate", start=1)
+        self.assertEqual([item["id"] for item in items], ["d1", "d2"])
+
+    def test_get_and_prune(self):
+        self.assertEqual(self.store.get("device", "dev-a")["id"], "d2")
+        self.assertIsNone(self.store.get("device", "d3", company_id="c1"))
+
+        removed = self.store.prune("device", ["d1"], company_id="c1")
+        self.assertEqual(removed, {"d2"})
+        self.assertEqual(self.store.ids("device"), {"d1", "d3"})
+
+    def test_offline_client(self):
+        client = OfflineClient(self.store, company="acme")
+        resp = run(client.devices(fields=["id"], sort="name", limit=1))
+        self.assertEqual(resp["body"], [dict(id="d2")])
+
+        resp = run(client.inspect_device("dev-b"))
+        self.assertEqual(resp["body"], DEVICES[0])
+
+        self.assertRaises(errors.NotFound, run, client.inspect_device("dev-c"))
+        self.assertRaises(errors.Error, run, client.events("/acme/x"))
+
+    def test_offline_filter(self):
+        client = OfflineClient(self.store, company="acme")
+        self.store.upsert(
+            "device",
+            [dict(id=f"x{idx}", name=f"x-{idx}") for idx in range(5)],
+            company_id="c1",
+        )
+        resp = run(
+            client.devices(
+                fields=["id"],
+                filters='report.bars>0 || name in ["x-1","x-2","x-3"]',
+                sort="name",
+                start=1,
+                limit=3,
+            )
+        )
+        self.assertEqual(
+            resp["body"], [dict(id="d1"), dict(id="x1"), dict(id="x2")]
+        )
+        self.assertRaises(errors.Error, run, client.devices(filters="name=="))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import asyncio
+import unittest
+
+import aiohttp
+
+from ocsw import errors
+from ocsw.api.event import EventCursor
+from ocsw.utils.date_fns import time_ms
+from ocsw.utils.limiter import Limiter
+from ocsw.utils.poll import AdaptiveInterval
+
+from .helpers import EventClient, run
+
+
+def event(uid, date, path="s"):
+    return dict(id=uid, creationDate=date, path=path)
+
+
+class TestTail(unittest.TestCase):
+    def test_cursor(self):
+        cursor = EventCursor(5, ["a"])
+        self.assertFalse(cursor.add(event("a", 5)))
+        self.assertTrue(cursor.add(event("b", 5)))
+        self.assertFalse(cursor.add(event("c", 4)))
+        self.assertTrue(cursor.add(event("d", 6)))
+        self.assertEqual((cursor.date, cursor.ids), (6, {"d"}))
+
+    def test_poll_same_date(self):
+        client = EventClient(
+            [event(f"e{idx}", 10) for idx in range(25)] + [event("x", 11)]
+        )
+        cursor = EventCursor(10, ["e0"])
+        events = run(client.poll_events("s", cursor, page_size=10))
+        self.assertEqual(len(events), 25)
+        self.assertEqual(events[-1]["id"], "x")
+        self.assertEqual(run(client.poll_events("s", cursor)), [])
+
+    def test_follow(self):
+        client = EventClient([event(f"old{idx}", idx) for idx in range(5)])
+
+        async def follow():
+            seen = []
+            interval = AdaptiveInterval(0.01, 0.02)
+            async for item in client.follow_events(
+                "s", last=2, interval=interval
+            ):
+                seen.append(item["id"])
+                if item["id"] == "old4":
+                    client.stored += [event("new1", 9), event("new0", 8)]
+                if len(seen) == 4:
+                    return seen
+
+        self.assertEqual(run(follow()), ["old3", "old4", "new0", "new1"])
+        self.assertEqual(client.requests[1][1], "creationDate>=4")
+
+    def test_follow_retry(self):
+        client = EventClient([event("e0", 1)])
+        events_page = client.events
+        calls = []
+
+        async def failing(source, **kwargs):
+            calls.append(source)
+            if len(calls) in (1, 3, 4):
+                raise asyncio.TimeoutError()
+            return await events_page(source, **kwargs)
+
+        client.events = failing
+
+        async def follow(retries):
+            seen = []
+            interval = AdaptiveInterval(0.001, 0.002)
+            async for item in client.follow_events(
+                "s", last=1, interval=interval, retries=retries
+            ):
+                seen.append(item["id"])
+                if item["id"] == "e0":
+                    client.stored.append(event("e1", 2))
+                if len(seen) == 2:
+                    return seen
+
+        self.assertEqual(run(asyncio.wait_for(follow(2), 5)), ["e0", "e1"])
+        calls.clear()
+        with self.assertRaises(asyncio.TimeoutError):
+            run(asyncio.wait_for(follow(0), 5))
+
+    def test_follow_error(self):
+        client = EventClient([event("e0", 1)])
+
+        async def failing(_source, **_kwargs):
+            raise errors.Error("denied")
+
+        client.events = failing
+
+        async def follow():
+            async for _item in client.follow_events("s"):
+                pass
+
+        with self.assertRaises(errors.Error):
+            run(asyncio.wait_for(follow(), 5))
+
+    def test_follow_limiter(self):
+        client = EventClient([event(f"e{idx}", idx) for idx in range(3)])
+
+        class CountingLimiter(Limiter):
+            runs = 0
+
+            async def run(self, coro):
+                self.runs += 1
+                return await super().run(coro)
+
+        limiter = CountingLimiter(1)
+
+        async def follow():
+            async for item in client.follow_events(
+                "s",
+                last=1,
+                interval=AdaptiveInterval(0.001, 0.002),
+                limiter=limiter,
+            ):
+                client.stored.append(event("new", 9))
+                if item["id"] == "new":
+                    return
+
+        run(asyncio.wait_for(follow(), 5))
+        self.assertEqual(limiter.runs, len(client.requests))
+
+    def test_follow_streams(self):
+        now = time_ms()
+        client = EventClient(
+            [
+                event("a1", now - 300, "a"),
+                event("a2", now - 100, "a"),
+                event("b1", now - 200, "b"),
+                event("c0", now - 900, "c"),
+            ]
+        )
+
+        async def follow():
+            seen = []
+            async for item in client.follow_streams(
+                ["a", "b", "c"],
+                last=5,
+                limiter=Limiter(2),
+                min_interval=0.01,
+                max_interval=0.02,
+                skew=0,
+            ):
+                seen.append(item["id"])
+                if item["id"] == "a2":
+                    date = time_ms()
+                    client.stored += [
+                        event("b2", date + 5, "b"),
+                        event("a3", date + 1, "a"),
+                        event("c1", date + 3, "c"),
+                    ]
+                if len(seen) == 7:
+                    return seen
+
+        self.assertEqual(
+            run(follow()), ["c0", "a1", "b1", "a2", "a3", "c1", "b2"]
+        )
+
+    def follow_failing(self, error, failures, retries=5):
+        client = EventClient([event("a1", 1, "a"), event("b1", 2, "b")])
+        events_page = client.events
+        calls = []
+
+        async def failing(source, **kwargs):
+            if source == "b" and len(calls) < failures:
+                calls.append(source)
+                raise error
+            return await events_page(source, **kwargs)
+
+        client.events = failing
+
+        async def follow():
+            seen = []
+            async for item in client.follow_streams(
+                ["a", "b"],
+                last=1,
+                min_interval=0.001,
+                max_interval=0.002,
+                skew=0,
+                retries=retries,
+            ):
+                seen.append(item["id"])
+                if len(seen) == 2:
+                    return seen
+
+        return run(asyncio.wait_for(follow(), 5))
+
+    def test_follow_streams_retry(self):
+        error = aiohttp.ClientConnectionError("connection reset")
+        self.assertEqual(self.follow_failing(error, 2), ["a1", "b1"])
+        with self.assertRaises(aiohttp.ClientConnectionError):
+            self.follow_failing(error, 3, retries=2)
+
+    def test_follow_streams_error(self):
+        with self.assertRaises(errors.Error):
+            self.follow_failing(errors.Error("denied"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()